@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+background_library.py
+İndirilmiş arka plan videoları için yerel kütüphane (disk bütçeli LRU)
+
+- Anahtar: (Pexels video ID, rendition) → aynı dosya asla iki kez indirilmez
+- Süre, çözünürlük, arama terimi ve boyut SQLite dizininde tutulur
+- Seçim önce yerel envanterden: bir sorgu / süre aralığı için yeterli klip
+  (MIN_INVENTORY) varsa ağa hiç gidilmez, en uzun süredir kullanılmayanlar
+  arasından rastgele biri seçilir
+- Disk bütçesi aşılınca en uzun süredir kullanılmayan (LRU) klipler silinir
+- İşe teslim: sabit bağlantı (hard link), olmazsa kopya (ör. /dev/shm)
+- Normalizasyon: her klip bir kez 1080x1920, 30 fps, yuv420p, kısa GOP'lu
+  bir ara dosyaya (mezzanine) dönüştürülür ve kaynağın yerini alır. Montaj
+  artık her short'ta tam çözünürlüklü kaynağı ölçekleyip kırpmaz; 50/60 fps
+  kaynaklar da 30 fps çözülür. Tek seferlik maliyet, klibi kullanan her
+  short'a bölünür (SHORTS_NORMALIZE_BACKGROUNDS=0 ile kapatılır).
+  Aynı klibi normalize eden işçiler klip başına bir flock ile sıralanır.
+
+Kullanım:
+    python background_library.py stats
+    python background_library.py evict --budget-mb 1024
+    python background_library.py prune
+    python background_library.py normalize
+"""
+
+import argparse
+import contextlib
+import fcntl
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import threading
+import time
+from job_workspace import atomic_output
+from tracing import span, traced_run
+
+BACKGROUND_DIR = os.environ.get('SHORTS_BACKGROUND_DIR', "backgrounds")
+BACKGROUND_BUDGET_MB = int(os.environ.get('SHORTS_BACKGROUND_BUDGET_MB', "4096"))
+LIBRARY_DB = "library.db"
+MIN_INVENTORY = 4  # Bir sorgu / süre aralığı için bundan azsa yeni klip indirilir
+STALE_PART_HOURS = 24  # Devam için tutulan yarım indirmelerin ömrü
+PICK_POOL = 3  # En uzun süredir kullanılmayan bu kadar klip arasından rastgele seçim
+
+# Mezzanine biçimi (compose_video_v2 hedefiyle aynı)
+NORMALIZE_BACKGROUNDS = os.environ.get('SHORTS_NORMALIZE_BACKGROUNDS', '1') != '0'
+MEZZANINE_WIDTH = 1080
+MEZZANINE_HEIGHT = 1920
+MEZZANINE_FPS = 30
+MEZZANINE_GOP = 30  # 1 saniyelik GOP: kesim/arama noktaları yakın
+MEZZANINE_CRF = 18  # Montajda yeniden kodlanacağı için yüksek kalite
+MEZZANINE_PRESET = "veryfast"
+
+NORMALIZE_PENDING = 0
+NORMALIZE_DONE = 1
+NORMALIZE_FAILED = -1  # Tekrar denenmez, kaynak kullanılır
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS backgrounds (
+    video_id INTEGER NOT NULL,
+    rendition TEXT NOT NULL,             -- ör. 1080x1920
+    path TEXT NOT NULL,
+    query TEXT,
+    duration REAL NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    size_bytes INTEGER NOT NULL,
+    added_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    use_count INTEGER NOT NULL DEFAULT 0,
+    normalized INTEGER NOT NULL DEFAULT 0, -- 1 = path bir mezzanine
+    PRIMARY KEY (video_id, rendition)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_backgrounds_duration ON backgrounds (duration);
+CREATE INDEX IF NOT EXISTS idx_backgrounds_lru ON backgrounds (last_used_at);
+"""
+
+COLUMNS = ("video_id", "rendition", "path", "query", "duration", "width", "height",
+           "size_bytes", "added_at", "last_used_at", "use_count", "normalized")
+
+
+def rendition_key(video_file: dict) -> str:
+    """Pexels video_files entry → rendition key (e.g. '1080x1920')."""
+    return f"{video_file.get('width', 0)}x{video_file.get('height', 0)}"
+
+
+def mezzanine_command(source: str, output: str) -> list[str]:
+    """FFmpeg command for the normalized copy (fps first: fewer frames to scale)."""
+    return [
+        "ffmpeg", "-v", "error",
+        "-i", source,
+        "-vf", (f"fps={MEZZANINE_FPS},"
+                f"scale=w={MEZZANINE_WIDTH}:h={MEZZANINE_HEIGHT}:force_original_aspect_ratio=increase,"
+                f"crop={MEZZANINE_WIDTH}:{MEZZANINE_HEIGHT},setsar=1"),
+        "-c:v", "libx264",
+        "-preset", MEZZANINE_PRESET,
+        "-crf", str(MEZZANINE_CRF),
+        "-pix_fmt", "yuv420p",
+        "-g", str(MEZZANINE_GOP),
+        "-keyint_min", str(MEZZANINE_GOP),
+        "-sc_threshold", "0",
+        "-an",  # Arka plan sesi montajda kullanılmıyor
+        "-movflags", "+faststart",
+        "-y", output,
+    ]
+
+
+class BackgroundLibrary:
+    """
+    Thread-safe index of downloaded background clips under `root`.
+    Each thread gets its own SQLite connection.
+    """
+
+    def __init__(self, root: str = BACKGROUND_DIR, budget_mb: int = BACKGROUND_BUDGET_MB):
+        self.root = root
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self._local = threading.local()
+        os.makedirs(root, exist_ok=True)
+        conn = self.connection()
+        conn.executescript(SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(backgrounds)")}
+        if 'normalized' not in columns:
+            conn.execute("ALTER TABLE backgrounds ADD COLUMN normalized INTEGER NOT NULL DEFAULT 0")
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.root, LIBRARY_DB), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _rows(self, sql: str, params: tuple = ()) -> list[dict]:
+        rows = self.connection().execute(f"SELECT {', '.join(COLUMNS)} FROM backgrounds {sql}", params)
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def _forget(self, entry: dict):
+        self.connection().execute(
+            "DELETE FROM backgrounds WHERE video_id = ? AND rendition = ?",
+            (entry['video_id'], entry['rendition'])
+        )
+
+    def __len__(self) -> int:
+        return self.connection().execute("SELECT COUNT(*) FROM backgrounds").fetchone()[0]
+
+    def path_for(self, video_id: int, rendition: str) -> str:
+        """Library file path of a rendition (where downloads are written)."""
+        return os.path.join(self.root, f"{video_id}_{rendition}.mp4")
+
+    def get(self, video_id: int, rendition: str) -> dict | None:
+        """
+        Returns the entry of an already downloaded rendition, or None.
+        Entries whose file has disappeared are dropped.
+        """
+        rows = self._rows("WHERE video_id = ? AND rendition = ?", (video_id, rendition))
+        if not rows:
+            return None
+        if not os.path.exists(rows[0]['path']):
+            self._forget(rows[0])
+            return None
+        return rows[0]
+
+    def renditions(self, video_id: int) -> set:
+        """Rendition keys of a video that are already downloaded."""
+        rows = self.connection().execute(
+            "SELECT rendition, path FROM backgrounds WHERE video_id = ?", (video_id,)
+        ).fetchall()
+        return {rendition for rendition, path in rows if os.path.exists(path)}
+
+    def add(
+        self,
+        video_id: int,
+        rendition: str,
+        path: str,
+        query: str | None,
+        duration: float,
+        width: int | None = None,
+        height: int | None = None
+    ) -> dict:
+        """
+        Records a downloaded file (already at `path`, normally path_for())
+        as just used, then evicts down to the disk budget.
+        """
+        now = time.time()
+        self.connection().execute(
+            f"INSERT OR REPLACE INTO backgrounds ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            (video_id, rendition, path, query, duration, width, height,
+             os.path.getsize(path), now, now, 1, NORMALIZE_PENDING)
+        )
+        self.evict(keep=(video_id, rendition))
+        return self.get(video_id, rendition)
+
+    def candidates(self, min_duration: float, max_duration: float, query: str | None = None) -> list[dict]:
+        """Clips within the duration range (optionally of one query), least recently used first."""
+        if query is None:
+            return self._rows("WHERE duration BETWEEN ? AND ? ORDER BY last_used_at",
+                              (min_duration, max_duration))
+        return self._rows("WHERE duration BETWEEN ? AND ? AND query = ? ORDER BY last_used_at",
+                          (min_duration, max_duration, query))
+
+    def inventory(self, min_duration: float, max_duration: float, query: str | None = None) -> int:
+        """Number of clips available locally for a query / duration range."""
+        return len(self.candidates(min_duration, max_duration, query))
+
+    def pick(self, min_duration: float, max_duration: float, query: str | None = None) -> dict | None:
+        """
+        Picks a local clip for the range: random among the PICK_POOL least
+        recently used, so consecutive shorts do not repeat a background.
+        """
+        pool = []
+        for entry in self.candidates(min_duration, max_duration, query):
+            if os.path.exists(entry['path']):
+                pool.append(entry)
+                if len(pool) == PICK_POOL:
+                    break
+            else:
+                self._forget(entry)
+        if not pool:
+            return None
+        entry = random.choice(pool)
+        self.touch(entry)
+        return entry
+
+    @contextlib.contextmanager
+    def _entry_lock(self, entry: dict):
+        """
+        Exclusive flock on one clip across threads and processes. The lock
+        file may be removed by eviction while we wait, so the inode is checked
+        after locking.
+        """
+        lock_path = os.path.join(self.root, f".{entry['video_id']}_{entry['rendition']}.lock")
+        while True:
+            fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.path.exists(lock_path) and os.stat(lock_path).st_ino == os.fstat(fd).st_ino:
+                break
+            os.close(fd)
+        try:
+            yield
+        finally:
+            os.close(fd)
+
+    def touch(self, entry: dict):
+        """Marks a clip as used now (LRU order)."""
+        self.connection().execute(
+            "UPDATE backgrounds SET last_used_at = ?, use_count = use_count + 1 "
+            "WHERE video_id = ? AND rendition = ?",
+            (time.time(), entry['video_id'], entry['rendition'])
+        )
+
+    def normalize(self, entry: dict) -> dict:
+        """
+        Replaces a clip's source file with its mezzanine (once per clip).
+        The entry keeps its Pexels rendition key, so the source is never
+        downloaded again. On FFmpeg failure the source stays in use.
+
+        Returns:
+            The (possibly updated) entry
+        """
+        if entry['normalized'] != NORMALIZE_PENDING:
+            return entry
+        with self._entry_lock(entry):
+            # Beklerken başka bir işçi dönüştürmüş (veya klip silinmiş) olabilir
+            current = self.get(entry['video_id'], entry['rendition'])
+            if current is None or current['normalized'] != NORMALIZE_PENDING:
+                return current or entry
+            normalized = self._normalize_locked(current)
+        if normalized['normalized'] == NORMALIZE_DONE:
+            # Mezzanine kaynaktan büyük olabilir (ör. düşük bit hızlı kaynak)
+            self.evict(keep=(entry['video_id'], entry['rendition']))
+        return normalized
+
+    def _normalize_locked(self, entry: dict) -> dict:
+        key = (entry['video_id'], entry['rendition'])
+        mezzanine = os.path.join(self.root, f"{entry['video_id']}_{entry['rendition']}.mezz.mp4")
+        print(f"🎞️  Normalizing background {entry['video_id']} ({entry['rendition']}) → "
+              f"{MEZZANINE_WIDTH}x{MEZZANINE_HEIGHT}@{MEZZANINE_FPS}")
+        started = time.perf_counter()
+        try:
+            with atomic_output(mezzanine) as tmp:
+                with span("background_normalize", "subprocess", video_id=entry['video_id']) as s:
+                    traced_run(mezzanine_command(entry['path'], tmp), capture_output=True, text=True, check=True)
+                    s.add_bytes(os.path.getsize(tmp))
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"⚠️  Normalization failed, using the source: {getattr(e, 'stderr', None) or e}")
+            self.connection().execute(
+                "UPDATE backgrounds SET normalized = ? WHERE video_id = ? AND rendition = ? AND normalized = ?",
+                (NORMALIZE_FAILED, *key, NORMALIZE_PENDING)
+            )
+            return self.get(*key) or {**entry, 'normalized': NORMALIZE_FAILED}
+
+        size = os.path.getsize(mezzanine)
+        updated = self.connection().execute(
+            "UPDATE backgrounds SET path = ?, size_bytes = ?, width = ?, height = ?, normalized = ? "
+            "WHERE video_id = ? AND rendition = ? AND normalized = ?",
+            (mezzanine, size, MEZZANINE_WIDTH, MEZZANINE_HEIGHT, NORMALIZE_DONE, *key, NORMALIZE_PENDING)
+        ).rowcount
+        if not updated:
+            # Satır bu arada silindi/değişti: sahipsiz mezzanine bırakma
+            os.remove(mezzanine)
+            return self.get(*key) or entry
+        # İşlere verilmiş sabit bağlantılar kaynağı tutmaya devam eder
+        if entry['path'] != mezzanine and os.path.exists(entry['path']):
+            os.remove(entry['path'])
+        print(f"   Done in {time.perf_counter() - started:.1f}s "
+              f"({entry['size_bytes'] / 1e6:.1f} MB → {size / 1e6:.1f} MB)")
+        return {**entry, 'path': mezzanine, 'size_bytes': size, 'width': MEZZANINE_WIDTH,
+                'height': MEZZANINE_HEIGHT, 'normalized': NORMALIZE_DONE}
+
+    def materialize(self, entry: dict, output_file: str) -> str:
+        """
+        Places a library clip at `output_file` for a job: a hard link (no
+        copy, and it survives eviction), or a copy across filesystems.
+        """
+        os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+        with atomic_output(output_file) as tmp:
+            try:
+                os.link(entry['path'], tmp)
+            except OSError:
+                shutil.copyfile(entry['path'], tmp)
+        return output_file
+
+    def total_bytes(self) -> int:
+        return self.connection().execute("SELECT COALESCE(SUM(size_bytes), 0) FROM backgrounds").fetchone()[0]
+
+    def evict(self, budget_bytes: int | None = None, keep: tuple | None = None) -> list[dict]:
+        """
+        Deletes least recently used clips until the library fits the budget.
+
+        Args:
+            keep: (video_id, rendition) that must stay (the clip just added)
+
+        Returns:
+            Evicted entries
+        """
+        budget_bytes = self.budget_bytes if budget_bytes is None else budget_bytes
+        total = self.total_bytes()
+        evicted = []
+        if total <= budget_bytes:
+            return evicted
+        for entry in self._rows("ORDER BY last_used_at"):
+            if total <= budget_bytes:
+                break
+            if keep and (entry['video_id'], entry['rendition']) == tuple(keep):
+                continue
+            if os.path.exists(entry['path']):
+                os.remove(entry['path'])
+            self._forget(entry)
+            total -= entry['size_bytes']
+            evicted.append(entry)
+        return evicted
+
+    def prune(self) -> tuple[int, int]:
+        """
+        Drops entries whose file is missing and deletes files that are not
+        in the index (e.g. after a crash), including partial downloads and
+        transcode temp files (*.part.mp4) older than STALE_PART_HOURS;
+        younger ones may belong to a download or transcode in progress.
+        Returns (entries, files) removed.
+        """
+        known = set()
+        keys = set()
+        missing = 0
+        for entry in self._rows(""):
+            if os.path.exists(entry['path']):
+                known.add(os.path.abspath(entry['path']))
+                keys.add(f".{entry['video_id']}_{entry['rendition']}.lock")
+            else:
+                self._forget(entry)
+                missing += 1
+        orphans = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.endswith((".part", ".part.json", ".part.mp4")):
+                if time.time() - os.path.getmtime(path) > STALE_PART_HOURS * 3600:
+                    os.remove(path)
+                    orphans += 1
+                continue
+            if name.endswith(".lock") and name not in keys:
+                os.remove(path)  # _entry_lock bekleyenler inode değişimini fark eder
+                continue
+            if name.endswith(".mp4") and os.path.abspath(path) not in known:
+                os.remove(path)
+                orphans += 1
+        return missing, orphans
+
+    def stats(self) -> dict:
+        rows = self.connection().execute(
+            "SELECT query, COUNT(*), SUM(size_bytes), SUM(use_count) FROM backgrounds GROUP BY query"
+        ).fetchall()
+        return {
+            'clips': sum(row[1] for row in rows),
+            'bytes': sum(row[2] for row in rows),
+            'budget_bytes': self.budget_bytes,
+            'by_query': {query: {'clips': count, 'bytes': size, 'uses': uses}
+                         for query, count, size, uses in rows},
+        }
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_library = None
+_library_lock = threading.Lock()
+
+
+def get_background_library(root: str | None = None) -> BackgroundLibrary:
+    """Returns the shared library (one per process)."""
+    global _library
+    with _library_lock:
+        if _library is None or (root and _library.root != root):
+            _library = BackgroundLibrary(root or BACKGROUND_DIR)
+        return _library
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Local background video library")
+    parser.add_argument("--root", default=BACKGROUND_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("stats", help="Show clips and disk use per query")
+    p_evict = sub.add_parser("evict", help="Delete least recently used clips down to a budget")
+    p_evict.add_argument("--budget-mb", type=int, default=BACKGROUND_BUDGET_MB)
+    sub.add_parser("prune", help="Drop missing files from the index and delete unindexed files")
+    sub.add_parser("normalize", help="Transcode every pending clip to its mezzanine")
+
+    args = parser.parse_args(argv)
+    library = BackgroundLibrary(args.root)
+
+    if args.command == "stats":
+        stats = library.stats()
+        print(f"📊 {stats['clips']} clips, {stats['bytes'] / 1e6:.1f} MB "
+              f"of {stats['budget_bytes'] / 1e6:.0f} MB budget")
+        for query, info in sorted(stats['by_query'].items(), key=lambda item: str(item[0])):
+            print(f"   {str(query):32s} {info['clips']:3d} clips {info['bytes'] / 1e6:8.1f} MB "
+                  f"{info['uses']:4d} uses")
+    elif args.command == "evict":
+        evicted = library.evict(args.budget_mb * 1024 * 1024)
+        print(f"🧹 Evicted {len(evicted)} clips ({sum(e['size_bytes'] for e in evicted) / 1e6:.1f} MB)")
+    elif args.command == "prune":
+        missing, orphans = library.prune()
+        print(f"🧹 Dropped {missing} missing entries, deleted {orphans} unindexed files")
+    elif args.command == "normalize":
+        pending = library._rows("WHERE normalized = ?", (NORMALIZE_PENDING,))
+        done = sum(library.normalize(entry)['normalized'] == NORMALIZE_DONE for entry in pending)
+        print(f"🎞️  Normalized {done} of {len(pending)} pending clips")
+
+
+if __name__ == "__main__":
+    main()
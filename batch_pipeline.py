@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+batch_pipeline.py
+Aşama boru hattı zamanlayıcısı (toplu mod)
+
+Her aşama grubu kendi iş parçacığında çalışır ve gruplar sınırlı
+kuyruklarla birbirine bağlanır. Böylece ağ bekleyen aşamalar (Reddit,
+TTS, Pexels, YouTube) FFmpeg montajıyla aynı anda ilerler; kuyruk
+kapasitesi de aynı anda diskte bekleyen iş sayısını sınırlar.
+"""
+
+import queue
+import threading
+import time
+
+_STOP = object()  # Kuyruk sonu işareti
+SKIPPED = "skipped"  # Kaynak durduktan sonra başlatılmayan işlerin failed_stage değeri
+
+
+def _run_callback(callback, job: dict):
+    """Runs an on_complete / on_failed callback; errors never stop the stage thread."""
+    if callback is None:
+        return
+    try:
+        callback(job)
+    except Exception as e:
+        print(f"⚠️  Cleanup failed: {e}")
+
+
+def _stage_worker(
+    name: str,
+    stages: list,
+    inbox: queue.Queue,
+    outbox: queue.Queue | None,
+    stats: dict,
+    results: list,
+    lock: threading.Lock,
+    stop_event: threading.Event,
+    is_source: bool,
+    on_complete=None,
+    on_failed=None
+):
+    """
+    Pulls jobs from `inbox`, runs the group's stages, pushes to `outbox`.
+    """
+    while True:
+        job = inbox.get()
+        if job is _STOP:
+            if outbox is not None:
+                outbox.put(_STOP)
+            return
+
+        if stop_event.is_set() and is_source:
+            # Kaynak tükendi: kalan işleri atla (raporda başarısız sayılır)
+            job['failed_stage'] = SKIPPED
+            with lock:
+                results.append(job)
+            _run_callback(on_failed, job)
+            continue
+
+        started = time.perf_counter()
+        ok = True
+        for stage in stages:
+            try:
+                ok = stage(job)
+            except Exception as e:
+                print(f"❌ Stage '{stage.__name__}' crashed: {e}")
+                ok = False
+            if not ok:
+                job['failed_stage'] = stage.__name__
+                break
+        elapsed = time.perf_counter() - started
+
+        with lock:
+            stats[name]['busy'] += elapsed
+            stats[name]['jobs'] += 1
+
+        if not ok:
+            with lock:
+                results.append(job)
+            _run_callback(on_failed, job)
+            if is_source:
+                # İlk aşama başarısızsa (uygun post kalmadı) yeni iş başlatma
+                print(f"⚠️  Source stage '{name}' failed, no more jobs will be started")
+                stop_event.set()
+            continue
+
+        if outbox is not None:
+            outbox.put(job)
+        else:
+            with lock:
+                results.append(job)
+            _run_callback(on_complete, job)
+
+
+def run_pipeline(
+    jobs,
+    stage_groups: list[tuple[str, list]],
+    queue_size: int = 1,
+    on_complete=None,
+    on_failed=None
+) -> dict:
+    """
+    Runs jobs through stage groups with one thread per group.
+
+    Args:
+        jobs: Iterable of job dictionaries
+        stage_groups: [(group_name, [stage_func, ...]), ...] in pipeline order.
+            Each stage_func(job) -> bool.
+        queue_size: Capacity of the queue between two groups
+        on_complete: Optional callback(job) after the last group succeeds
+        on_failed: Optional callback(job) after a stage fails
+
+    Returns:
+        Report dictionary (completed, failed, elapsed, shorts_per_hour, stages)
+    """
+    queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stage_groups]
+    stats = {name: {'busy': 0.0, 'jobs': 0} for name, _ in stage_groups}
+    results = []
+    lock = threading.Lock()
+    stop_event = threading.Event()
+
+    threads = []
+    for i, (name, stages) in enumerate(stage_groups):
+        outbox = queues[i + 1] if i + 1 < len(queues) else None
+        t = threading.Thread(
+            target=_stage_worker,
+            name=f"stage-{name}",
+            args=(name, stages, queues[i], outbox, stats, results, lock,
+                  stop_event, i == 0),
+            kwargs={'on_complete': on_complete, 'on_failed': on_failed},
+            daemon=True
+        )
+        t.start()
+        threads.append(t)
+
+    started = time.perf_counter()
+
+    # Besleyici: ilk kuyruk doluysa bekler (geri basınç). Durma işareti bir
+    # sonraki iş üretilmeden önce kontrol edilir (new_job çalışma dizini açar);
+    # üretilen her iş kaynağa verilir, orada atlanıp raporlanır
+    jobs = iter(jobs)
+    while not stop_event.is_set():
+        job = next(jobs, None)
+        if job is None:
+            break
+        queues[0].put(job)
+    queues[0].put(_STOP)
+
+    for t in threads:
+        t.join()
+
+    elapsed = time.perf_counter() - started
+    completed = [job for job in results if 'failed_stage' not in job]
+    failed = [job for job in results if 'failed_stage' in job]
+
+    report = {
+        'completed': len(completed),
+        'failed': len(failed),
+        'elapsed': elapsed,
+        'shorts_per_hour': (len(completed) / elapsed * 3600) if elapsed > 0 else 0.0,
+        'stages': stats,
+    }
+    print_report(report)
+    return report
+
+
+def print_report(report: dict):
+    """
+    Prints throughput and per-stage utilisation.
+    """
+    elapsed = report['elapsed']
+    print()
+    print("=" * 70)
+    print("📊 Batch report")
+    print("=" * 70)
+    print(f"   Completed: {report['completed']}")
+    print(f"   Failed: {report['failed']}")
+    print(f"   Wall time: {elapsed:.1f}s")
+    print(f"   Throughput: {report['shorts_per_hour']:.1f} shorts/hour")
+    print()
+    print("   Stage utilisation:")
+    for name, s in report['stages'].items():
+        util = (s['busy'] / elapsed * 100) if elapsed > 0 else 0.0
+        avg = (s['busy'] / s['jobs']) if s['jobs'] else 0.0
+        print(f"   {name:18s} {s['jobs']:3d} jobs  avg {avg:6.1f}s  busy {util:5.1f}%")
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+benchmark_pipeline.py
+Çevrimdışı uçtan uca benchmark (yedek servislerle)
+
+Reddit, Pexels, TTS ve YouTube yerine offline_services sunucularını
+başlatır, sabit tohumla tüm V4 aşamalarını çalıştırır ve aşama başına
+duvar süresi, CPU süresi (alt süreçler dahil) ve tepe bellek ölçer.
+Sonuç JSON olarak yazılır; değişikliklerin etkisi karşılaştırılabilir.
+Her çalıştırma boş bir dizinde ve sıfırlanmış süreç içi önbelleklerle
+(soğuk) başlar; böylece tekrarlar birbirinin önbelleğini ısıtmaz.
+
+Kullanım:
+    python benchmark_pipeline.py --runs 3 --output bench.json
+    python benchmark_pipeline.py --dag   # toplam süreyi DAG ile de ölç
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+RSS_SAMPLE_INTERVAL = 0.01
+
+# Süreç içi paylaşılan nesneler: (modül, global ad). Her çalıştırmada
+# sıfırlanır, yoksa ikinci çalıştırma ilkinin önbelleklerini ve
+# kullanılmış post listesini görür.
+PROCESS_SINGLETONS = [
+    ("main_v4", "_reddit"),
+    ("main_v4", "_youtube_service"),
+    ("used_post_store", "_store"),
+    ("near_duplicate_index", "_index"),
+    ("reddit_cache", "_cache"),
+    ("pexels_cache", "_cache"),
+    ("candidate_pool", "_pool"),
+    ("background_library", "_library"),
+    ("ranged_download", "_session"),
+]
+
+
+def current_rss_kb() -> int:
+    """Resident set size of this process (Linux /proc, else peak RSS)."""
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class RSSSampler:
+    """Samples this process's RSS in a thread to find a per-stage peak."""
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_kb = max(self.peak_kb, current_rss_kb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_kb = current_rss_kb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_kb = max(self.peak_kb, current_rss_kb())
+
+
+def reset_process_state(main_v4):
+    """Drops every shared client, store and cache so the next run starts cold."""
+    for module_name, attribute in PROCESS_SINGLETONS:
+        module = sys.modules.get(module_name)
+        if module is not None:
+            setattr(module, attribute, None)
+    if 'reddit_fetcher' in sys.modules:
+        sys.modules['reddit_fetcher']._thread_clients = threading.local()  # Oturum açmış iş parçacığı istemcileri
+    main_v4._claimed_post_ids.clear()
+
+
+def fresh_run(main_v4, work_dir: str, label: str, seed: int) -> str:
+    """Enters an empty directory for one run with reset state and seed."""
+    run_dir = os.path.join(work_dir, label)
+    os.makedirs(run_dir)
+    os.chdir(run_dir)
+    reset_process_state(main_v4)
+    random.seed(seed)
+    return run_dir
+
+
+def measure_stage(job: dict, name: str, run_stage) -> dict:
+    """
+    Runs one stage and returns its wall/CPU/memory measurements.
+    """
+    children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+
+    with RSSSampler() as sampler:
+        ok = run_stage(job, name)
+
+    wall = time.perf_counter() - started
+    cpu = time.process_time() - cpu_before
+    children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    children_cpu = (
+        (children_after.ru_utime - children_before.ru_utime)
+        + (children_after.ru_stime - children_before.ru_stime)
+    )
+
+    return {
+        'ok': ok,
+        'wall': round(wall, 4),
+        'cpu': round(cpu, 4),
+        'children_cpu': round(children_cpu, 4),
+        'peak_rss_kb': sampler.peak_kb,
+        # Sonlanmış alt süreçlerin en büyüğü (ffmpeg) - kümülatif tepe
+        'children_peak_rss_kb': children_after.ru_maxrss,
+    }
+
+
+def run_serial(main_v4, order: list[str]) -> dict:
+    """One job, stages run one after another in topological order."""
+    job = main_v4.new_job()
+    stages = {}
+    started = time.perf_counter()
+    try:
+        for name in order:
+            stages[name] = measure_stage(job, name, main_v4.run_stage)
+            if not stages[name]['ok']:
+                print(f"❌ Stage {name} failed, stopping this run")
+                break
+    finally:
+        job['workspace'].cleanup(success=True)
+    return {'mode': 'serial', 'wall': round(time.perf_counter() - started, 4), 'stages': stages}
+
+
+def run_dag(main_v4) -> dict:
+    """One job through the stage DAG (total wall time only)."""
+    from stage_dag import run_dag_sync
+
+    job = main_v4.new_job()
+    try:
+        ok = run_dag_sync(job, main_v4.STAGE_SPECS, main_v4.run_stage_async)
+    finally:
+        job['workspace'].cleanup(success=True)
+    return {
+        'mode': 'dag',
+        'ok': ok,
+        'wall': round(job.get('wall_time') or 0.0, 4),
+        'stage_timings': job.get('stage_timings'),
+    }
+
+
+def summarize(runs: list[dict]) -> dict:
+    """Median of every serial measurement across runs."""
+    summary = {}
+    serial = [r for r in runs if r['mode'] == 'serial']
+    for name in (serial[0]['stages'] if serial else {}):
+        samples = [r['stages'][name] for r in serial if name in r['stages']]
+        summary[name] = {
+            key: statistics.median(s[key] for s in samples)
+            for key in ('wall', 'cpu', 'children_cpu', 'peak_rss_kb')
+        }
+    if serial:
+        summary['total_serial_wall'] = statistics.median(r['wall'] for r in serial)
+    dag = [r for r in runs if r['mode'] == 'dag']
+    if dag:
+        summary['total_dag_wall'] = statistics.median(r['wall'] for r in dag)
+    return summary
+
+
+def run_benchmark(
+    runs: int = 1,
+    seed: int = 1234,
+    with_dag: bool = False,
+    media_dir: str | None = None
+) -> dict:
+    """
+    Starts the stand-ins, runs the pipeline `runs` times and returns the
+    measurements. Every run (serial and DAG) starts cold: its own empty
+    working directory and no shared stores, caches or clients.
+    """
+    from offline_services import start_standins, stop_standins, standin_environment
+
+    media_dir = os.path.abspath(media_dir or os.path.join(REPO_DIR, ".bench_media"))
+    servers = start_standins(seed=seed, media_dir=media_dir)
+    os.environ.update(standin_environment(servers))
+
+    original_cwd = os.getcwd()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="shorts_bench_") as work_dir:
+        os.chdir(work_dir)
+        try:
+            # Ortam değişkenleri ayarlandıktan sonra import et (uç noktalar import'ta okunur)
+            import main_v4
+            from stage_dag import topological_order
+
+            order = topological_order(main_v4.STAGE_SPECS)
+            for i in range(runs):
+                fresh_run(main_v4, work_dir, f"run{i}_serial", seed)
+                print(f"⏱️  Run {i + 1}/{runs} (serial)")
+                results.append(run_serial(main_v4, order))
+                if with_dag:
+                    fresh_run(main_v4, work_dir, f"run{i}_dag", seed)
+                    print(f"⏱️  Run {i + 1}/{runs} (dag)")
+                    results.append(run_dag(main_v4))
+        finally:
+            os.chdir(original_cwd)
+            stop_standins(servers)
+
+    return {
+        'seed': seed,
+        'runs': results,
+        'summary': summarize(results),
+        'python': sys.version.split()[0],
+        'created_at': time.time(),
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark")
+    parser.add_argument("--runs", type=int, default=1, help="Repetitions (median is reported)")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for data and random choices")
+    parser.add_argument("--dag", action="store_true", help="Also time a DAG run per repetition")
+    parser.add_argument("--media-dir", help="Cache for generated test clips")
+    parser.add_argument("--output", help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(runs=args.runs, seed=args.seed, with_dag=args.dag, media_dir=args.media_dir)
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(encoded)
+        print(f"📊 Benchmark written to {args.output}")
+    else:
+        print(encoded)
+
+
+if __name__ == "__main__":
+    main()
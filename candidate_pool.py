@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+candidate_pool.py
+Render'a hazır post adayları havuzu (SQLite)
+
+Harvester uygunluk kurallarından geçen postları (başlık + en iyi yorumlar
+dahil, post_data biçiminde) buraya yazar. Render işleri Reddit API'sine
+gitmeden havuzdan mikrosaniyeler içinde bir aday alır (pop).
+
+- Alınan aday 'claimed' olarak işaretlenir; CLAIM_TIMEOUT içinde
+  kullanılmış olarak kaydedilmezse tekrar 'ready' sayılır. Render
+  başarısız olursa release() adayı hemen geri verir (MAX_RELEASES
+  sonra siler), kalıcı hatada remove() siler
+- Her adayın bir son kullanma zamanı (expires_at) vardır: harvester
+  adayları MAX_CANDIDATE_AGE sonra, arşiv dökümünden gelenler (zaten eski
+  postlar) add(max_age=...) ile verilen daha uzun süre sonra seçilmez ve
+  prune() ile silinir
+- Seçim candidate_ranker ile: saklanan statik puan + anlık tazelik puanı,
+  isteğe bağlı subreddit ağırlığıyla çarpılır (çoklu subreddit karışımı)
+- Havuzdayken yakın kopyası kullanılan adaylar pop() sırasında elenir
+- Başlık ve yorumlar üzerinde FTS5 indeksi: pop(topic="haunted, ghost")
+  yalnızca konuyla eşleşen adaylar arasından seçer (temalı günler).
+  İndeks tetikleyicilerle (trigger) güncel tutulur; her silme yolu onu da
+  temizler.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from candidate_ranker import freshness_scores, static_score, top_indices
+
+CANDIDATE_POOL_DB = os.environ.get('SHORTS_CANDIDATE_POOL', "candidate_pool.db")
+CLAIM_TIMEOUT = 3600  # Render bu sürede bitmezse aday geri döner
+MAX_CANDIDATE_AGE = 2 * 24 * 3600  # Reddit'te eskimiş postları seçme
+POP_BATCH = 32  # pop() her turda bu kadar en iyi adayı kontrol eder
+MAX_RELEASES = 3  # Bu kadar başarısız render'dan sonra aday silinir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    post_id TEXT PRIMARY KEY,
+    subreddit TEXT NOT NULL,
+    post_json TEXT NOT NULL,
+    rank_score REAL NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'ready',   -- ready | claimed
+    harvested_at REAL NOT NULL,
+    claimed_at REAL,
+    created_utc REAL,                      -- Reddit'teki oluşturulma zamanı
+    text_rowid INTEGER,                    -- candidate_text satırı
+    expires_at REAL,                       -- bu zamandan sonra seçilmez
+    releases INTEGER NOT NULL DEFAULT 0    -- başarısız render sayısı
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_candidates_state ON candidates (state, harvested_at);
+"""
+
+# Tam metin indeksi; porter: "haunted" → "haunt" (haunting, haunts da eşleşir)
+TEXT_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS candidate_text USING fts5(
+    title, comments, tokenize = 'porter unicode61'
+);
+CREATE INDEX IF NOT EXISTS idx_candidates_text ON candidates (text_rowid);
+CREATE TRIGGER IF NOT EXISTS candidates_text_insert AFTER INSERT ON candidates BEGIN
+    INSERT INTO candidate_text (title, comments) VALUES (
+        json_extract(new.post_json, '$.title'),
+        (SELECT group_concat(json_extract(value, '$.body'), ' ')
+         FROM json_each(new.post_json, '$.comments'))
+    );
+    UPDATE candidates SET text_rowid = last_insert_rowid() WHERE post_id = new.post_id;
+END;
+CREATE TRIGGER IF NOT EXISTS candidates_text_delete AFTER DELETE ON candidates BEGIN
+    DELETE FROM candidate_text WHERE rowid = old.text_rowid;
+END;
+"""
+
+TOPIC_WORD = re.compile(r"\w+")
+
+
+def topic_query(topic: str) -> str:
+    """
+    FTS5 query for a topic: comma-separated alternatives, all words of an
+    alternative must appear ("scary story, haunted" → scary AND story, OR
+    haunted). Words are quoted so user input cannot inject FTS syntax.
+    """
+    alternatives = []
+    for part in topic.split(","):
+        words = TOPIC_WORD.findall(part)
+        if words:
+            alternatives.append("(" + " ".join(f'"{word}"' for word in words) + ")")
+    if not alternatives:
+        raise ValueError(f"Empty topic: {topic!r}")
+    return " OR ".join(alternatives)
+
+
+def subreddit_filter(subreddit: "str | list[str] | None") -> tuple[str, list]:
+    """SQL condition for one subreddit, "a+b" or a list (case-insensitive)."""
+    if not subreddit:
+        return "", []
+    names = subreddit.split("+") if isinstance(subreddit, str) else list(subreddit)
+    names = [name.strip().lower() for name in names if name.strip()]
+    return f" AND lower(subreddit) IN ({','.join('?' * len(names))})", names
+
+
+def weight_expression(weights: dict | None) -> tuple[str, list]:
+    """SQL expression of the per-subreddit score factor (missing = 1.0)."""
+    if not weights:
+        return "1.0", []
+    cases = " ".join("WHEN ? THEN ?" for _ in weights)
+    params = [value for name, weight in weights.items() for value in (name.lower(), float(weight))]
+    return f"CASE lower(subreddit) {cases} ELSE 1.0 END", params
+
+
+class CandidatePool:
+    """
+    Persistent pool of ready-to-render posts (thread- and process-safe).
+    """
+
+    def __init__(self, path: str = CANDIDATE_POOL_DB):
+        self.path = path
+        self._local = threading.local()
+        conn = self.connection()
+        conn.executescript(SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(candidates)")}
+        if 'created_utc' not in columns:
+            conn.execute("ALTER TABLE candidates ADD COLUMN created_utc REAL")
+        if 'text_rowid' not in columns:
+            conn.execute("ALTER TABLE candidates ADD COLUMN text_rowid INTEGER")
+        if 'expires_at' not in columns:
+            conn.execute("ALTER TABLE candidates ADD COLUMN expires_at REAL")
+            conn.execute("UPDATE candidates SET expires_at = harvested_at + ?", (MAX_CANDIDATE_AGE,))
+        if 'releases' not in columns:
+            conn.execute("ALTER TABLE candidates ADD COLUMN releases INTEGER NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_expiry ON candidates (state, expires_at)")
+        conn.executescript(TEXT_SCHEMA)
+        self._index_missing_text()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _index_missing_text(self):
+        """Indexes candidates added before the full-text index existed."""
+        conn = self.connection()
+        missing = conn.execute("SELECT post_id, post_json FROM candidates WHERE text_rowid IS NULL").fetchall()
+        if not missing:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for post_id, post_json in missing:
+                post_data = json.loads(post_json)
+                cursor = conn.execute(
+                    "INSERT INTO candidate_text (title, comments) VALUES (?, ?)",
+                    (post_data.get('title', ''),
+                     " ".join(c.get('body', '') for c in post_data.get('comments', [])))
+                )
+                conn.execute("UPDATE candidates SET text_rowid = ? WHERE post_id = ?",
+                             (cursor.lastrowid, post_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def add(self, post_data: dict, rank_score: float | None = None, max_age: float = MAX_CANDIDATE_AGE) -> bool:
+        """
+        Adds a candidate (ignored if the post is already in the pool).
+
+        Args:
+            rank_score: Time-independent score (default: candidate_ranker.static_score)
+            max_age: Seconds the candidate stays selectable after being added
+
+        Returns:
+            True if it was new
+        """
+        now = time.time()
+        cursor = self.connection().execute(
+            "INSERT OR IGNORE INTO candidates "
+            "(post_id, subreddit, post_json, rank_score, harvested_at, created_utc, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                post_data['id'],
+                post_data.get('subreddit', ''),
+                json.dumps(post_data, ensure_ascii=False),
+                static_score(post_data) if rank_score is None else rank_score,
+                now,
+                post_data.get('created_utc'),
+                now + max_age,
+            )
+        )
+        return cursor.rowcount == 1
+
+    def known_ids(self) -> set:
+        """Every post ID in the pool (harvester skips these)."""
+        return {row[0] for row in self.connection().execute("SELECT post_id FROM candidates")}
+
+    def pop(
+        self,
+        exclude_ids: set | None = None,
+        subreddit: "str | list[str] | None" = None,
+        topic: str | None = None,
+        weights: dict | None = None
+    ) -> dict | None:
+        """
+        Claims the best ready candidate that is not used or excluded.
+        All ready candidates are scored in one NumPy pass (static score +
+        freshness); only the winner's JSON is loaded. Candidates that became
+        near-duplicates of a used post since harvesting are dropped. The
+        best POP_BATCH are checked per round until one qualifies or every
+        ready candidate was checked.
+
+        Args:
+            subreddit: One name, "a+b" or a list of names
+            topic: Only candidates whose title or comments match (see topic_query)
+            weights: {subreddit: factor} applied to the score (missing = 1.0)
+
+        Returns:
+            post_data dictionary or None if the pool is empty
+        """
+        from near_duplicate_index import get_duplicate_index
+        from used_post_store import get_used_store
+
+        now = time.time()
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")  # İki işçi aynı adayı alamaz
+        try:
+            weight_sql, params = weight_expression(weights)
+            query = (
+                f"SELECT post_id, rank_score, COALESCE(created_utc, harvested_at), {weight_sql} FROM candidates "
+                "WHERE (state = 'ready' OR claimed_at < ?) AND expires_at > ?"
+            )
+            params += [now - CLAIM_TIMEOUT, now]
+            condition, names = subreddit_filter(subreddit)
+            query += condition
+            params += names
+            if topic:
+                query += " AND text_rowid IN (SELECT rowid FROM candidate_text WHERE candidate_text MATCH ?)"
+                params.append(topic_query(topic))
+
+            rows = conn.execute(query, params).fetchall()
+            if not rows:
+                conn.execute("COMMIT")
+                return None
+
+            ids, static, created, factor = zip(*rows)
+            scores = np.asarray(static, dtype=np.float32) + freshness_scores(np.asarray(created, dtype=np.float64), now)
+            if weights:
+                scores *= np.asarray(factor, dtype=np.float32)
+
+            duplicates = get_duplicate_index()
+            for start in range(0, len(ids), POP_BATCH):
+                # Kontrol edilenler -inf: sonraki tur bir sonraki en iyi POP_BATCH'i alır
+                batch = top_indices(scores, POP_BATCH)[:len(ids) - start]
+                scores[batch] = -np.inf
+                best = [ids[i] for i in batch]
+
+                used = get_used_store().used_among(best)
+                if used:
+                    # Başka yoldan kullanılmış: havuzdan çıkar
+                    conn.executemany("DELETE FROM candidates WHERE post_id = ?", [(i,) for i in used])
+
+                for post_id in best:
+                    if post_id in used or (exclude_ids and post_id in exclude_ids):
+                        continue
+                    post_data = json.loads(conn.execute(
+                        "SELECT post_json FROM candidates WHERE post_id = ?", (post_id,)
+                    ).fetchone()[0])
+                    if duplicates.is_duplicate(post_data):
+                        conn.execute("DELETE FROM candidates WHERE post_id = ?", (post_id,))
+                        continue
+                    conn.execute(
+                        "UPDATE candidates SET state = 'claimed', claimed_at = ? WHERE post_id = ?",
+                        (now, post_id)
+                    )
+                    conn.execute("COMMIT")
+                    return post_data
+
+            conn.execute("COMMIT")
+            return None
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release(self, post_id: str) -> bool:
+        """
+        Returns a claimed candidate to the pool after a retryable render
+        failure. A candidate that failed MAX_RELEASES times is removed.
+
+        Returns:
+            True if the candidate is ready again
+        """
+        conn = self.connection()
+        released = conn.execute(
+            "UPDATE candidates SET state = 'ready', claimed_at = NULL, releases = releases + 1 WHERE post_id = ?",
+            (post_id,)
+        ).rowcount
+        removed = conn.execute(
+            "DELETE FROM candidates WHERE post_id = ? AND releases >= ?", (post_id, MAX_RELEASES)
+        ).rowcount
+        return released == 1 and not removed
+
+    def remove(self, post_id: str):
+        """Drops a candidate for good (e.g. its render failed permanently)."""
+        self.connection().execute("DELETE FROM candidates WHERE post_id = ?", (post_id,))
+
+    def size(self, subreddit: "str | list[str] | None" = None, topic: str | None = None) -> int:
+        """Number of ready (unclaimed, not expired) candidates."""
+        query = "SELECT COUNT(*) FROM candidates WHERE state = 'ready' AND expires_at > ?"
+        params = [time.time()]
+        condition, names = subreddit_filter(subreddit)
+        query += condition
+        params += names
+        if topic:
+            query += " AND text_rowid IN (SELECT rowid FROM candidate_text WHERE candidate_text MATCH ?)"
+            params.append(topic_query(topic))
+        return self.connection().execute(query, params).fetchone()[0]
+
+    def prune(self) -> int:
+        """Deletes candidates that have expired or are already used."""
+        from used_post_store import get_used_store
+
+        conn = self.connection()
+        removed = conn.execute("DELETE FROM candidates WHERE expires_at <= ?", (time.time(),)).rowcount
+        used = get_used_store().used_among(self.known_ids())
+        conn.executemany("DELETE FROM candidates WHERE post_id = ?", [(i,) for i in used])
+        return removed + len(used)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_candidate_pool(path: str | None = None) -> CandidatePool:
+    """Returns the shared pool for this process."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or (path and _pool.path != path):
+            path = path or CANDIDATE_POOL_DB
+            _pool = CandidatePool(path)
+        return _pool
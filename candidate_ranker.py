@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+candidate_ranker.py
+Vektörel aday puanlama ve sıralama (NumPy)
+
+"Filtreden geçen ilk hot post" yerine adayların en iyisini seçer.
+Özellikler sıkı diziler (float32/float64) halinde tutulur ve tüm parti
+tek seferde puanlanır; 100 bin adaylık havuzda da milisaniyeler sürer.
+
+Puan bileşenleri (ağırlıklar DEFAULT_WEIGHTS):
+- popularity:   post skoru (log ölçek)
+- comments:     okunacak yorumların toplam skoru (log ölçek)
+- length_fit:   tahmini anlatım süresinin Shorts hedefine yakınlığı
+- balance:      yorum uzunluklarının dengesi (tek dev yorum yerine)
+- freshness:    yaş (yarı ömür FRESHNESS_HALF_LIFE_HOURS)
+
+freshness zamana bağlı olduğu için ayrı hesaplanır; geri kalanı
+(static_scores) havuza eklenirken bir kez hesaplanıp saklanabilir.
+"""
+
+import time
+
+import numpy as np
+
+from duration_predictor import DEFAULT_SECONDS_PER_CHAR, rate_factor
+
+TARGET_SECONDS = 50.0  # Hedef anlatım süresi (Shorts 60 sn sınırının altında pay)
+MAX_SECONDS = 60.0  # Bunu aşan adaylar ağır ceza alır
+LENGTH_TOLERANCE = 15.0  # Hedeften bu kadar sapma puanı ~%37'ye düşürür
+OVERLONG_FACTOR = 0.1
+FRESHNESS_HALF_LIFE_HOURS = 12.0
+SCORE_SCALE = np.log1p(100_000)  # log1p(skor) / SCORE_SCALE ≈ 0..1
+
+# Anlatımda okunan yorumlar (main_v4.MAX_COMMENTS ve subtitle_generator_v2 ile aynı)
+SPOKEN_COMMENTS = 5
+SPOKEN_COMMENT_CHARS = 200
+
+DEFAULT_WEIGHTS = {
+    'popularity': 1.0,
+    'comments': 1.0,
+    'length_fit': 2.0,
+    'balance': 0.5,
+    'freshness': 1.0,
+}
+
+
+class CandidateFeatures:
+    """
+    Column arrays for a batch of candidates (row i = ids[i]).
+    """
+    __slots__ = ('ids', 'score', 'comment_score', 'spoken_chars', 'segments',
+                 'comment_len_mean', 'comment_len_std', 'created_utc')
+
+    def __init__(self, size: int):
+        self.ids = [None] * size
+        self.score = np.zeros(size, dtype=np.float32)
+        self.comment_score = np.zeros(size, dtype=np.float32)
+        self.spoken_chars = np.zeros(size, dtype=np.float32)
+        self.segments = np.zeros(size, dtype=np.float32)
+        self.comment_len_mean = np.zeros(size, dtype=np.float32)
+        self.comment_len_std = np.zeros(size, dtype=np.float32)
+        self.created_utc = np.zeros(size, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def extract_features(posts: list[dict], default_created: float | None = None) -> CandidateFeatures:
+    """
+    Builds the feature columns from post_data dictionaries.
+
+    Args:
+        posts: post_data dictionaries, Post objects or a post_model.PostBatch
+            (whose columns give the features without a Python loop)
+        default_created: Timestamp for posts without created_utc (default: now)
+    """
+    if hasattr(posts, 'features'):
+        return posts.features(default_created)
+    default_created = time.time() if default_created is None else default_created
+    size = len(posts)
+    features = CandidateFeatures(size)
+
+    # Satır başına NumPy çağrısı yavaş: önce düz listeler, sonra tek dönüşüm
+    score, comment_score, chars, segments = [0] * size, [0] * size, [0] * size, [0] * size
+    len_mean, len_sq_mean, created = [0.0] * size, [0.0] * size, [0.0] * size
+    for i, post in enumerate(posts):
+        comments = post.get('comments', [])[:SPOKEN_COMMENTS]
+        lengths = [min(len(c.get('body', '')), SPOKEN_COMMENT_CHARS) for c in comments]
+        features.ids[i] = post['id']
+        score[i] = post.get('score', 0)
+        comment_score[i] = sum(max(0, c.get('score', 0)) for c in comments)
+        chars[i] = len(post.get('title', '')) + sum(lengths)
+        segments[i] = 1 + len(lengths)
+        if lengths:
+            len_mean[i] = sum(lengths) / len(lengths)
+            len_sq_mean[i] = sum(n * n for n in lengths) / len(lengths)
+        created[i] = post.get('created_utc') or default_created
+
+    features.score[:] = score
+    features.comment_score[:] = comment_score
+    features.spoken_chars[:] = chars
+    features.segments[:] = segments
+    mean = np.asarray(len_mean, dtype=np.float64)
+    features.comment_len_mean[:] = mean
+    features.comment_len_std[:] = np.sqrt(np.maximum(np.asarray(len_sq_mean) - mean * mean, 0))
+    features.created_utc[:] = created
+    return features
+
+
+def predicted_seconds(
+    features: CandidateFeatures,
+    seconds_per_char: float = DEFAULT_SECONDS_PER_CHAR['edge'],
+    rate: str = "+10%",
+    pause_between: float = 0.8
+) -> np.ndarray:
+    """Vectorised duration_predictor.predict_narration_duration."""
+    speech = features.spoken_chars * (seconds_per_char / rate_factor(rate))
+    return speech + pause_between * np.maximum(features.segments - 1, 0)
+
+
+def static_scores(
+    features: CandidateFeatures,
+    weights: dict = DEFAULT_WEIGHTS,
+    target: float = TARGET_SECONDS,
+    seconds_per_char: float = DEFAULT_SECONDS_PER_CHAR['edge']
+) -> np.ndarray:
+    """
+    Time-independent part of the score (everything except freshness).
+    """
+    popularity = np.log1p(np.maximum(features.score, 0)) / SCORE_SCALE
+    comments = np.log1p(features.comment_score) / SCORE_SCALE
+
+    seconds = predicted_seconds(features, seconds_per_char)
+    length_fit = np.exp(-np.square((seconds - target) / LENGTH_TOLERANCE))
+    length_fit = np.where(seconds > MAX_SECONDS, length_fit * OVERLONG_FACTOR, length_fit)
+
+    # Varyasyon katsayısı: 0 = eşit uzunlukta yorumlar
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variation = np.where(features.comment_len_mean > 0,
+                             features.comment_len_std / features.comment_len_mean, 1.0)
+    balance = 1.0 - np.clip(variation, 0.0, 1.0)
+
+    return (
+        weights['popularity'] * popularity
+        + weights['comments'] * comments
+        + weights['length_fit'] * length_fit
+        + weights['balance'] * balance
+    ).astype(np.float32)
+
+
+def freshness_scores(
+    created_utc: np.ndarray,
+    now: float | None = None,
+    weights: dict = DEFAULT_WEIGHTS
+) -> np.ndarray:
+    """Exponential decay with FRESHNESS_HALF_LIFE_HOURS."""
+    now = time.time() if now is None else now
+    age_hours = np.maximum(now - created_utc, 0) / 3600.0
+    return (weights['freshness'] * np.exp2(-age_hours / FRESHNESS_HALF_LIFE_HOURS)).astype(np.float32)
+
+
+def score_features(features: CandidateFeatures, now: float | None = None,
+                   weights: dict = DEFAULT_WEIGHTS) -> np.ndarray:
+    return static_scores(features, weights) + freshness_scores(features.created_utc, now, weights)
+
+
+def top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k best scores, best first (argpartition: O(n), not a full sort).
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(len(scores))
+    return part[np.argsort(-scores[part], kind='stable')]
+
+
+def rank_posts(posts: list[dict], top_k: int | None = None, now: float | None = None) -> list[tuple[dict, float]]:
+    """
+    Scores post_data dictionaries and returns (post, score), best first.
+    """
+    if not posts:
+        return []
+    scores = score_features(extract_features(posts, now), now)
+    order = top_indices(scores, top_k or len(posts))
+    return [(posts[i], float(scores[i])) for i in order]
+
+
+def static_score(post: dict) -> float:
+    """Static score of a single post (stored with pool candidates)."""
+    return float(static_scores(extract_features([post]))[0])
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+check_import_time.py
+Başlangıç (import) süresi bütçe kontrolü
+
+`python -X importtime` çıktısını ayrıştırır, toplam süreyi ve en pahalı
+modülleri raporlar. Toplam bütçeyi aşarsa veya ağır bağımlılıklardan
+biri (praw, edge_tts, gtts, googleapiclient, PIL, requests, numpy) modül
+yüklenirken import edilirse 1 ile çıkar; başlangıç gerilemeleri görünür.
+
+Kullanım:
+    python check_import_time.py                 # main_v4, bütçe 250 ms
+    python check_import_time.py --budget-ms 150 --top 15
+    python check_import_time.py --module daemon_server
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+DEFAULT_MODULE = "main_v4"
+DEFAULT_BUDGET_MS = 250.0
+DEFAULT_RUNS = 5
+
+# Yalnızca ilgili aşamada yüklenmesi gereken paketler
+HEAVY_MODULES = ["praw", "edge_tts", "gtts", "googleapiclient", "google.oauth2", "PIL", "requests", "numpy"]
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """
+    Parses `-X importtime` lines:
+        import time: self [us] | cumulative | imported package
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            entries.append({
+                'module': name.strip(),
+                'depth': (len(name) - len(name.lstrip())) // 2,
+                'self_us': int(self_us),
+                'cumulative_us': int(cumulative_us),
+            })
+        except ValueError:
+            continue
+    return entries
+
+
+def measure_import(module: str) -> dict:
+    """
+    Imports `module` in a fresh interpreter and returns the parsed timings
+    plus the heavy modules that ended up loaded.
+    """
+    code = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=REPO_DIR
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = parse_importtime(result.stderr)
+    top_level = [e for e in entries if e['depth'] == 0]
+    return {
+        'entries': entries,
+        'total_us': sum(e['cumulative_us'] for e in top_level),
+        'heavy_loaded': json.loads(result.stdout.strip().splitlines()[-1]),
+    }
+
+
+def check_import_time(
+    module: str = DEFAULT_MODULE,
+    budget_ms: float = DEFAULT_BUDGET_MS,
+    runs: int = DEFAULT_RUNS,
+    top: int = 10
+) -> bool:
+    """
+    Runs the measurement `runs` times (the fastest run is reported, to
+    filter out noise) and prints the report.
+
+    Returns:
+        True if within budget and no heavy module was imported eagerly
+    """
+    best = min((measure_import(module) for _ in range(max(1, runs))), key=lambda m: m['total_us'])
+    total_ms = best['total_us'] / 1000
+
+    print(f"⏱️  import {module}: {total_ms:.1f} ms (budget {budget_ms:.0f} ms, best of {runs})")
+    print(f"   Top {top} by cumulative time:")
+    heaviest = sorted(best['entries'], key=lambda e: -e['cumulative_us'])[:top]
+    for entry in heaviest:
+        print(f"   {entry['cumulative_us'] / 1000:8.1f} ms  (self {entry['self_us'] / 1000:6.1f})  {entry['module']}")
+
+    ok = True
+    if best['heavy_loaded']:
+        print(f"❌ Heavy dependencies imported at start-up: {', '.join(best['heavy_loaded'])}")
+        ok = False
+    if total_ms > budget_ms:
+        print(f"❌ Import time over budget by {total_ms - budget_ms:.1f} ms")
+        ok = False
+    if ok:
+        print("✅ Start-up within budget")
+    return ok
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Import-time budget check")
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.environ.get('IMPORT_BUDGET_MS', DEFAULT_BUDGET_MS)))
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    ok = check_import_time(args.module, args.budget_ms, args.runs, args.top)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+daemon_server.py
+Sıcak (uzun ömürlü) daemon modu ve yerel HTTP iş API'si
+
+Başlangıçta bir kez: ağır import'lar, Reddit girişi, YouTube servis
+kurulumu ve font yükleme. Sonra render işleri yerel HTTP (veya Unix
+soketi) üzerinden kabul edilir; her iş sabit başlangıç maliyeti ödemeden
+aşama DAG'ı ile çalışır.
+
+API:
+    GET  /health          → {"status": "ok", ...}
+    POST /jobs            → {"id": "...", "status": "queued"}
+         gövde (isteğe bağlı): {"post": {post_data}}
+    GET  /jobs            → tüm işler
+    GET  /jobs/<id>       → iş durumu
+
+Kullanım:
+    python daemon_server.py --port 8765 --renderers 2
+    python daemon_server.py --socket /tmp/shorts_bot.sock
+"""
+
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = int(os.environ.get('SHORTS_DAEMON_PORT', '8765'))
+MAX_REQUEST_BYTES = 1024 * 1024
+MAX_FINISHED_JOBS = 500  # Bellekte tutulan bitmiş iş kaydı
+
+
+class JobRegistry:
+    """
+    Thread-safe job status store and render queue.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._order = []
+        self._lock = threading.Lock()
+        self.pending = queue.Queue()
+
+    def submit(self, post_data: dict | None = None) -> dict:
+        job_id = uuid.uuid4().hex[:12]
+        status = {
+            'id': job_id,
+            'status': 'queued',
+            'post_id': post_data['id'] if post_data else None,
+            'created_at': time.time(),
+        }
+        with self._lock:
+            self._jobs[job_id] = status
+            self._order.append(job_id)
+            self._trim()
+        self.pending.put((job_id, post_data))
+        return dict(status)
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def all(self) -> list[dict]:
+        with self._lock:
+            return [dict(self._jobs[job_id]) for job_id in self._order]
+
+    def _trim(self):
+        # En eski bitmiş işleri unut (sınırsız büyümesin)
+        finished = [j for j in self._order if self._jobs[j]['status'] in ('done', 'failed')]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            self._order.remove(job_id)
+            del self._jobs[job_id]
+
+
+def warm_up() -> dict:
+    """
+    Pays the fixed per-run costs once: imports, Reddit login, YouTube
+    service build and font loading.
+
+    Returns:
+        {component: seconds}
+    """
+    timings = {}
+
+    started = time.perf_counter()
+    import main_v4
+    main_v4.preload_stage_modules()
+    timings['imports'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    reddit_ok = main_v4.get_reddit_client() is not None
+    timings['reddit_login'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    youtube_ok = main_v4.get_youtube_service() is not None
+    timings['youtube_build'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    from reddit_frame_creator import load_font, FONT_PATH_REGULAR, FONT_SIZE_META
+    load_font(FONT_PATH_REGULAR, FONT_SIZE_META)
+    timings['fonts'] = time.perf_counter() - started
+
+    print("🔥 Warm-up complete:")
+    for name, seconds in timings.items():
+        print(f"   {name:15s} {seconds:6.2f}s")
+    if not reddit_ok:
+        print("⚠️  Reddit login failed, jobs without a post will fail")
+    if not youtube_ok:
+        print("⚠️  YouTube service unavailable, uploads will fail")
+    return timings
+
+
+def render_worker(registry: JobRegistry, use_tmpfs: bool = False):
+    """
+    Runs queued jobs one at a time with the warm clients.
+    (Renderer'lar Reddit/YouTube istemcilerini paylaşır; main_v4 fetch ve
+    upload aşamalarında kilitle sıraya sokar.)
+    """
+    import main_v4
+    from stage_dag import run_dag_sync
+
+    while True:
+        job_id, post_data = registry.pending.get()
+        registry.update(job_id, status='running', started_at=time.time())
+
+        job = main_v4.new_job(use_tmpfs=use_tmpfs)
+        try:
+            if post_data:
+                main_v4.seed_post_stage(job, post_data)
+            ok = run_dag_sync(job, main_v4.STAGE_SPECS, main_v4.run_stage_async)
+        except Exception as e:
+            print(f"❌ Job {job_id} crashed: {e}")
+            job['failed_stage'] = job.get('failed_stage') or 'crash'
+            ok = False
+
+        fields = {
+            'finished_at': time.time(),
+            'post_id': (job.get('post_data') or {}).get('id'),
+            'stage_timings': job.get('stage_timings'),
+            'wall_time': job.get('wall_time'),
+        }
+        if ok:
+            # Yüklenen video renders/ altında birikmesin (kotada pending_uploads/'a kopyalandı)
+            main_v4.finish_batch_job(job)
+            registry.update(job_id, status='done', upload_result=job.get('upload_result'), **fields)
+        else:
+            job['workspace'].cleanup(success=False)
+            registry.update(job_id, status='failed', failed_stage=job.get('failed_stage'),
+                            workspace=job['workspace'].path, **fields)
+
+
+def make_handler(registry: JobRegistry, warmup: dict):
+
+    class JobAPIHandler(BaseHTTPRequestHandler):
+        server_version = "ShortsBotDaemon/1.0"
+
+        def address_string(self):
+            # Unix soketinde client_address boş string
+            return self.client_address[0] if self.client_address else "unix"
+
+        def _send_json(self, code: int, payload):
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {
+                    'status': 'ok',
+                    'queued': registry.pending.qsize(),
+                    'warmup': warmup,
+                })
+            elif self.path == "/jobs":
+                self._send_json(200, registry.all())
+            elif self.path.startswith("/jobs/"):
+                job = registry.get(self.path[len("/jobs/"):])
+                if job:
+                    self._send_json(200, job)
+                else:
+                    self._send_json(404, {'error': 'job not found'})
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != "/jobs":
+                self._send_json(404, {'error': 'not found'})
+                return
+
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_REQUEST_BYTES:
+                self._send_json(413, {'error': 'request too large'})
+                return
+
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send_json(400, {'error': 'invalid JSON'})
+                return
+            if not isinstance(payload, dict):
+                self._send_json(400, {'error': 'body must be a JSON object'})
+                return
+
+            post_data = payload.get('post')
+            if post_data is not None and (not isinstance(post_data, dict)
+                                          or not all(k in post_data for k in ('id', 'title', 'url'))):
+                self._send_json(400, {'error': "post needs 'id', 'title' and 'url'"})
+                return
+
+            self._send_json(202, registry.submit(post_data))
+
+    return JobAPIHandler
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: str | None = None,
+    renderers: int = 1,
+    use_tmpfs: bool = False
+):
+    """
+    Warms up, starts render threads and serves the job API forever.
+    """
+    warmup = warm_up()
+    registry = JobRegistry()
+
+    for i in range(max(1, renderers)):
+        threading.Thread(
+            target=render_worker,
+            args=(registry, use_tmpfs),
+            name=f"renderer-{i}",
+            daemon=True
+        ).start()
+
+    handler = make_handler(registry, warmup)
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, handler)
+        print(f"🛰️  Daemon listening on unix:{socket_path}")
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        print(f"🛰️  Daemon listening on http://{host}:{port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print()
+        print("⚠️  Daemon stopped")
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Reddit Shorts Bot daemon")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="Serve on a Unix socket instead of TCP")
+    parser.add_argument("--renderers", type=int, default=1, help="Jobs rendered in parallel")
+    parser.add_argument("--tmpfs", action="store_true", help="Job workspaces on /dev/shm")
+    args = parser.parse_args(argv)
+
+    serve(
+        host=args.host,
+        port=args.port,
+        socket_path=args.socket,
+        renderers=args.renderers,
+        use_tmpfs=args.tmpfs
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+dump_ingest.py
+Arşivlenmiş Reddit dökümlerinden (zstd NDJSON) aday havuzunu doldurma
+
+Reddit API'sine hiç gitmeden, submission (RS_*.zst) ve comment (RC_*.zst)
+dökümlerinden shorts adayı çıkarır:
+
+1. Geçiş: submission dökümü satır satır açılır; fetch_popular_post ile
+   aynı liste kuralları (is_listing_candidate) uygulanır. Bellek sınırı
+   için yalnızca en yüksek skorlu MAX_TRACKED_POSTS post, slotted Post
+   olarak tutulur (min-heap); ardından kullanılmış ve yakın-kopya başlıklar elenir.
+2. Geçiş: comment dökümü satır satır açılır; yalnızca tutulan postların
+   üst düzey yorumları (parent_id == link_id) alınır, post başına en iyi
+   TOP_COMMENTS_SCANNED yorum (heap) saklanır.
+3. En az MIN_COMMENTS kullanılabilir yorumu olan postlar post_data
+   biçiminde candidate_pool'a yazılır (--batch-out ile ayrıca bellek
+   eşlemeli sütunlu PostBatch dizini olarak, bkz. post_model.py).
+   Arşiv postları zaten eski olduğundan havuzda canlı adayların 2 günü
+   yerine DUMP_CANDIDATE_AGE boyunca seçilebilir kalır.
+
+Dosyalar asla belleğe tamamen yüklenmez: zstd akışı 1 MB'lık tamponla
+okunur, JSON yalnızca ucuz bayt kontrolünden (subreddit / link_id)
+geçen satırlar için çözülür. Pushshift dökümleri 2 GB'lık pencere
+kullandığı için max_window_size buna göre ayarlanır.
+
+.zst olmayan dosyalar düz NDJSON olarak okunur.
+
+Kullanım:
+    python dump_ingest.py RS_2023-01.zst RC_2023-01.zst --subreddits AskReddit
+    python dump_ingest.py submissions.ndjson comments.ndjson --max-posts 20000
+"""
+
+import argparse
+import heapq
+import io
+import json
+import re
+import sys
+import time
+
+from candidate_pool import get_candidate_pool
+from post_model import Comment, Post, PostBatch
+from reddit_fetcher import (
+    MIN_COMMENTS, MIN_COMMENT_LENGTH, TOP_COMMENTS_SCANNED,
+    build_post_data, is_listing_candidate
+)
+
+READ_BUFFER = 1 << 20  # 1 MB
+ZSTD_MAX_WINDOW = 1 << 31  # Pushshift dökümleri --long=31 ile sıkıştırılmış
+MAX_TRACKED_POSTS = 50_000  # 1. geçişte bellekte tutulan en fazla post
+PROGRESS_EVERY = 1_000_000  # Bu kadar satırda bir ilerleme yaz
+DELETED_BODIES = ("[deleted]", "[removed]")
+DUMP_CANDIDATE_AGE = 90 * 24 * 3600  # Dökümden gelen adayların havuzdaki ömrü
+
+# JSON çözmeden önce ucuz ön eleme
+SUBREDDIT_FIELD = re.compile(rb'"subreddit"\s*:\s*"([^"]+)"')
+LINK_ID_FIELD = re.compile(rb'"link_id"\s*:\s*"t3_([a-z0-9]+)"')
+
+
+def open_lines(path: str):
+    """
+    Yields raw lines (bytes) of a zstd-compressed or plain NDJSON file,
+    streaming with a bounded buffer.
+    """
+    with open(path, 'rb') as raw:
+        if path.endswith(".zst"):
+            import zstandard
+
+            decompressor = zstandard.ZstdDecompressor(max_window_size=ZSTD_MAX_WINDOW)
+            with decompressor.stream_reader(raw, read_size=READ_BUFFER) as reader:
+                yield from io.BufferedReader(reader, buffer_size=READ_BUFFER)
+        else:
+            yield from io.BufferedReader(raw, buffer_size=READ_BUFFER)
+
+
+class Throughput:
+    """Records-per-second counter for one pass."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.records = 0
+        self.parsed = 0
+        self.started = time.perf_counter()
+
+    def tick(self):
+        self.records += 1
+        if self.records % PROGRESS_EVERY == 0:
+            print(f"   {self.label}: {self.records:,} records ({self.rate():,.0f}/s)")
+
+    def rate(self) -> float:
+        return self.records / max(time.perf_counter() - self.started, 1e-9)
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            'records': self.records,
+            'parsed': self.parsed,
+            'seconds': round(elapsed, 6),
+            'records_per_second': round(self.rate(), 1),
+        }
+
+
+def snapshot_dump_submission(record: dict) -> dict:
+    """Dump record → the listing snapshot used by reddit_fetcher."""
+    return {
+        'id': record['id'],
+        'title': record.get('title') or '',
+        'selftext': record.get('selftext') or '',
+        'permalink': record.get('permalink') or f"/r/{record.get('subreddit')}/comments/{record['id']}/",
+        'score': record.get('score') or 0,
+        'stickied': bool(record.get('stickied')),
+        'over_18': bool(record.get('over_18')),
+        'num_comments': record.get('num_comments') or 0,
+        'created_utc': float(record['created_utc']) if record.get('created_utc') else None,
+        'subreddit': record.get('subreddit') or '',
+    }
+
+
+def scan_submissions(path: str, subreddits: set | None, max_posts: int) -> tuple[dict, dict]:
+    """
+    Pass 1: qualifying submissions, keeping the `max_posts` highest scored.
+
+    Returns:
+        ({post_id: Post without comments}, throughput summary)
+    """
+    meter = Throughput("submissions")
+    kept = []  # (score, id, Post) min-heap; id benzersiz, Post hiç karşılaştırılmaz
+    kept_ids = set()  # Dökümlerde aynı submission birden fazla kez geçebilir
+    for line in open_lines(path):
+        meter.tick()
+        if subreddits is not None:
+            match = SUBREDDIT_FIELD.search(line)
+            if not match or match.group(1).decode('utf-8', 'replace').lower() not in subreddits:
+                continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        meter.parsed += 1
+        if record.get('removed_by_category') or record.get('selftext') in DELETED_BODIES:
+            continue
+
+        snapshot = snapshot_dump_submission(record)
+        if not is_listing_candidate(snapshot, set()):
+            continue
+        key = (snapshot['score'], snapshot['id'])
+        if key[1] in kept_ids or (len(kept) == max_posts and key <= kept[0][:2]):
+            continue
+        post = Post.from_dict(build_post_data(snapshot, snapshot['subreddit'], []))
+        kept_ids.add(key[1])
+        if len(kept) < max_posts:
+            heapq.heappush(kept, (*key, post))
+        else:
+            kept_ids.discard(heapq.heapreplace(kept, (*key, post))[1])
+
+    return {post.id: post for _, _, post in kept}, meter.summary()
+
+
+def scan_comments(path: str, posts: dict) -> tuple[dict, dict]:
+    """
+    Pass 2: the best TOP_COMMENTS_SCANNED usable top-level comments of
+    each tracked post.
+
+    Returns:
+        ({post_id: [comment, ...] best first}, throughput summary)
+    """
+    meter = Throughput("comments")
+    best = {}  # post_id → (score, seq, comment) min-heap
+    seq = 0
+    for line in open_lines(path):
+        meter.tick()
+        match = LINK_ID_FIELD.search(line)
+        if not match or match.group(1).decode() not in posts:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        meter.parsed += 1
+
+        body = record.get('body') or ''
+        if record.get('parent_id') != record.get('link_id') or body in DELETED_BODIES:
+            continue
+        if len(body) <= MIN_COMMENT_LENGTH:
+            continue
+
+        post_id = record['link_id'][3:]
+        author = record.get('author')
+        comment = Comment.from_dict({
+            'author': author if author and author != "[deleted]" else 'deleted',
+            'body': body,
+            'score': record.get('score') or 0,
+        })
+        seq += 1
+        heap = best.setdefault(post_id, [])
+        entry = (comment.score, -seq, comment)
+        if len(heap) < TOP_COMMENTS_SCANNED:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+    comments = {
+        post_id: [c.to_dict() for _, _, c in sorted(heap, key=lambda e: e[:2], reverse=True)]
+        for post_id, heap in best.items()
+    }
+    return comments, meter.summary()
+
+
+def ingest_dumps(
+    submissions_path: str,
+    comments_path: str,
+    subreddits: list[str] | None = None,
+    max_posts: int = MAX_TRACKED_POSTS,
+    pool=None,
+    batch_out: str | None = None
+) -> dict:
+    """
+    Two streaming passes over the dumps; eligible posts go to the pool.
+
+    Args:
+        batch_out: Also save the eligible posts as a columnar PostBatch here
+
+    Returns:
+        Report with per-pass throughput and the number of candidates added
+    """
+    from near_duplicate_index import get_duplicate_index
+    from used_post_store import get_used_store
+
+    pool = pool or get_candidate_pool()
+    wanted = {s.lower() for s in subreddits} if subreddits else None
+
+    print(f"📦 Pass 1: {submissions_path}")
+    posts, submissions_report = scan_submissions(submissions_path, wanted, max_posts)
+    print(f"   {len(posts):,} qualifying submissions "
+          f"({submissions_report['records_per_second']:,.0f} records/s)")
+
+    # Kullanılmış, havuzda zaten olan veya repost başlıklı postlar yorum geçişine girmez
+    duplicates = get_duplicate_index()
+    skip = get_used_store().used_among(posts) | (pool.known_ids() & posts.keys())
+    skip |= {post_id for post_id, post in posts.items() if post_id not in skip and duplicates.is_duplicate(post)}
+    for post_id in skip:
+        del posts[post_id]
+
+    print(f"💬 Pass 2: {comments_path}")
+    comments, comments_report = scan_comments(comments_path, posts)
+    print(f"   Comments for {len(comments):,} posts "
+          f"({comments_report['records_per_second']:,.0f} records/s)")
+
+    added = few_comments = near_duplicates = 0
+    eligible = []
+    for post_id, post in posts.items():
+        post_comments = comments.get(post_id, [])
+        if len(post_comments) < MIN_COMMENTS:
+            few_comments += 1
+            continue
+        post_data = {**post.to_dict(), 'comments': post_comments}
+        if duplicates.is_duplicate(post_data):
+            near_duplicates += 1
+            continue
+        if batch_out:
+            eligible.append(post_data)
+        if pool.add(post_data, max_age=DUMP_CANDIDATE_AGE):
+            added += 1
+
+    if batch_out:
+        PostBatch.from_posts(eligible).save(batch_out)
+        print(f"🗃️  Saved {len(eligible):,} posts as a columnar batch: {batch_out}")
+
+    total_records = submissions_report['records'] + comments_report['records']
+    total_seconds = submissions_report['seconds'] + comments_report['seconds']
+    report = {
+        'submissions': submissions_report,
+        'comments': comments_report,
+        'records_per_second': round(total_records / max(total_seconds, 1e-9), 1),
+        'skipped_known': len(skip),
+        'few_comments': few_comments,
+        'near_duplicates': near_duplicates,
+        'added': added,
+    }
+    print(f"✅ Added {added:,} candidates ({few_comments:,} with too few comments, "
+          f"{near_duplicates:,} near-duplicates, {len(skip):,} already used, pooled or reposts)")
+    print(f"   {total_records:,} records in {total_seconds:.1f}s → {report['records_per_second']:,.0f} records/s")
+    return report
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Fill the candidate pool from Reddit dump files")
+    parser.add_argument("submissions", help="Submission dump (.zst or plain NDJSON)")
+    parser.add_argument("comments", help="Comment dump (.zst or plain NDJSON)")
+    parser.add_argument("--subreddits", default=None,
+                        help="Comma-separated subreddit names (default: all)")
+    parser.add_argument("--max-posts", type=int, default=MAX_TRACKED_POSTS,
+                        help="Highest-scored submissions kept for the comment pass")
+    parser.add_argument("--batch-out", default=None,
+                        help="Also write eligible posts as a memory-mappable PostBatch directory")
+    parser.add_argument("--report", default=None, help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    subreddits = [s.strip() for s in args.subreddits.split(",") if s.strip()] if args.subreddits else None
+    report = ingest_dumps(args.submissions, args.comments, subreddits, args.max_posts,
+                          batch_out=args.batch_out)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+duration_predictor.py
+Seslendirme süresi tahmini (TTS bitmeden arka plan indirmek için)
+
+Metin uzunluğu, ses ve konuşma hızından süreyi tahmin eder. Her gerçek
+çalıştırmadan sonra ses başına "karakter başına saniye" değeri
+duration_calibration.json dosyasında güncellenir (üstel ortalama).
+"""
+
+import json
+import os
+import re
+import threading
+from job_workspace import atomic_output
+
+CALIBRATION_FILE = "duration_calibration.json"
+CALIBRATION_ALPHA = 0.3  # Yeni ölçümün ağırlığı
+DURATION_TOLERANCE = 8.0  # Tahmin hatası bu kadar saniyeyi geçerse arka plan düzeltilir
+
+# Kalibrasyon yokken kullanılan başlangıç değerleri (hız +0% için, s/karakter)
+DEFAULT_SECONDS_PER_CHAR = {
+    'edge': 0.072,
+    'gtts': 0.075,
+}
+
+GTTS_VOICE_KEY = "gtts"
+
+_lock = threading.Lock()
+
+
+def rate_factor(rate: str) -> float:
+    """
+    Converts an edge-tts rate string ("+10%", "-5%") to a speed multiplier.
+    """
+    match = re.fullmatch(r"\s*([+-]?\d+(?:\.\d+)?)%\s*", rate or "")
+    if not match:
+        return 1.0
+    return max(0.1, 1.0 + float(match.group(1)) / 100.0)
+
+
+def spoken_segments(title: str, comments: list[dict], engine: str = "edge") -> list[str]:
+    """
+    Texts that the TTS engine will actually speak (mirrors the generators).
+
+    Args:
+        title: Post title
+        comments: Comment dictionaries
+        engine: "edge" (subtitle_generator_v2) or "gtts" (subtitle_generator_v3)
+    """
+    if engine == "gtts":
+        segments = [f"The question is: {title}"]
+        segments += [f"Answer {i}: {c.get('body', '')}" for i, c in enumerate(comments, 1)]
+        return segments
+
+    segments = [title]
+    for comment in comments[:5]:
+        body = comment.get('body', '')
+        if len(body) > 200:
+            body = body[:197] + "..."
+        segments.append(body)
+    return segments
+
+
+def _voice_key(voice: str, engine: str) -> str:
+    return GTTS_VOICE_KEY if engine == "gtts" else voice
+
+
+def load_calibration(path: str = CALIBRATION_FILE) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def seconds_per_char(voice: str, engine: str = "edge", path: str = CALIBRATION_FILE) -> float:
+    """
+    Calibrated speaking cost at +0% rate, falling back to the engine default.
+    """
+    entry = load_calibration(path).get(_voice_key(voice, engine))
+    if entry:
+        return entry['seconds_per_char']
+    return DEFAULT_SECONDS_PER_CHAR.get(engine, DEFAULT_SECONDS_PER_CHAR['edge'])
+
+
+def predict_narration_duration(
+    title: str,
+    comments: list[dict],
+    voice: str = "en-US-GuyNeural",
+    rate: str = "+10%",
+    pause_between: float = 0.8,
+    engine: str = "edge",
+    path: str = CALIBRATION_FILE
+) -> float:
+    """
+    Predicts the narration length in seconds.
+
+    Returns:
+        Predicted duration (seconds)
+    """
+    segments = spoken_segments(title, comments, engine)
+    chars = sum(len(seg) for seg in segments)
+    speed = 1.0 if engine == "gtts" else rate_factor(rate)
+    speech = chars * seconds_per_char(voice, engine, path) / speed
+    pauses = pause_between * max(0, len(segments) - 1)
+    return speech + pauses
+
+
+def record_narration_duration(
+    title: str,
+    comments: list[dict],
+    actual_duration: float,
+    voice: str = "en-US-GuyNeural",
+    rate: str = "+10%",
+    pause_between: float = 0.8,
+    engine: str = "edge",
+    path: str = CALIBRATION_FILE
+) -> float | None:
+    """
+    Updates the calibration for a voice from a measured narration.
+
+    Returns:
+        New seconds-per-char value or None if the sample was unusable
+    """
+    segments = spoken_segments(title, comments, engine)
+    chars = sum(len(seg) for seg in segments)
+    speech = actual_duration - pause_between * max(0, len(segments) - 1)
+    if chars == 0 or speech <= 0:
+        return None
+
+    speed = 1.0 if engine == "gtts" else rate_factor(rate)
+    measured = speech * speed / chars
+    key = _voice_key(voice, engine)
+
+    with _lock:
+        calibration = load_calibration(path)
+        entry = calibration.get(key)
+        if entry:
+            value = (1 - CALIBRATION_ALPHA) * entry['seconds_per_char'] + CALIBRATION_ALPHA * measured
+            samples = entry.get('samples', 0) + 1
+        else:
+            value = measured
+            samples = 1
+        calibration[key] = {'seconds_per_char': value, 'samples': samples}
+
+        with atomic_output(path) as tmp:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(calibration, f, indent=2)
+
+    return value
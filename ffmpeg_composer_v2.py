@@ -6,11 +6,16 @@ Gelişmiş 4 katmanlı video montajı:
 2. Reddit çerçevesi (PIL - şeffaf metin alanı)
 3. Altyazılar (edge-tts - yakılmış)
 4. Ses (edge-tts - senkronize)
+
+Arka plan zaten hedef boyuttaysa (background_library mezzanine'i) ölçekleme
+ve kırpma atlanır.
 """
 
 import subprocess
 import os
 import json
+from job_workspace import atomic_output
+from tracing import span, traced_run
 
 
 def get_video_duration(video_path: str) -> float | None:
@@ -26,7 +31,7 @@ def get_video_duration(video_path: str) -> float | None:
             video_path
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        result = traced_run(cmd, capture_output=True, text=True, check=True)
         data = json.loads(result.stdout)
         duration = float(data['format']['duration'])
         
@@ -37,6 +42,38 @@ def get_video_duration(video_path: str) -> float | None:
         return None
 
 
+def get_video_stream_info(video_path: str) -> dict | None:
+    """
+    İlk video akışının boyutlarını ve kare hızını ffprobe ile alır.
+    
+    Returns:
+        {'width', 'height', 'fps', 'pix_fmt'} veya None
+    """
+    try:
+        cmd = [
+            "ffprobe",
+            "-v", "error",
+            "-select_streams", "v:0",
+            "-show_entries", "stream=width,height,r_frame_rate,pix_fmt",
+            "-of", "json",
+            video_path
+        ]
+        
+        result = traced_run(cmd, capture_output=True, text=True, check=True)
+        stream = json.loads(result.stdout)['streams'][0]
+        num, _, den = stream.get('r_frame_rate', '0/1').partition('/')
+        return {
+            'width': int(stream['width']),
+            'height': int(stream['height']),
+            'fps': float(num) / float(den) if den and float(den) else float(num),
+            'pix_fmt': stream.get('pix_fmt'),
+        }
+        
+    except Exception as e:
+        print(f"⚠️  Could not probe video stream: {e}")
+        return None
+
+
 def compose_video_v2(
     background_video: str,
     reddit_frame: str,
@@ -99,14 +136,24 @@ def compose_video_v2(
     # Altyazı dosyasını escape et (Windows path için)
     sub_path = subtitle_file.replace('\\', '/').replace(':', '\\:')
     
+    # Normalize edilmiş arka plan (mezzanine) zaten 9:16 hedef boyutta
+    stream = get_video_stream_info(background_video)
+    normalized = stream is not None and (stream['width'], stream['height']) == (target_width, target_height)
+    if normalized:
+        background_filter = "[0:v]null[bg];"
+    else:
+        background_filter = (
+            f"[0:v]scale=w={target_width}:h={target_height}:force_original_aspect_ratio=increase,"
+            f"crop={target_width}:{target_height}[bg];"
+        )
+    
     # FFmpeg filter_complex zinciri
     # [0:v] = background video
     # [1:v] = reddit frame (PNG with alpha)
     
     filter_complex = (
-        # KATMAN 1: Arka plan videosu - 9:16'ya ölçekle ve kırp
-        f"[0:v]scale=w={target_width}:h={target_height}:force_original_aspect_ratio=increase,"
-        f"crop={target_width}:{target_height}[bg];"
+        # KATMAN 1: Arka plan videosu - 9:16'ya ölçekle ve kırp (mezzanine ise olduğu gibi)
+        background_filter +
         
         # KATMAN 2: Reddit çerçevesini üst üste bindirme
         f"[1:v]scale={target_width}:-1[frame];"
@@ -143,12 +190,15 @@ def compose_video_v2(
         "-shortest",             # Ses süresiyle eşleştir
         "-movflags", "+faststart",
         "-y",
-        output_file
+        output_file              # Çalıştırırken geçici dosyayla değiştirilir
     ]
     
     print()
     print("⚙️  FFmpeg filter_complex:")
-    print("   1. Scale background to 9:16")
+    if normalized:
+        print(f"   1. Background already {target_width}x{target_height} (mezzanine, no scale/crop)")
+    else:
+        print("   1. Scale background to 9:16")
     print("   2. Overlay Reddit frame")
     print("   3. Burn subtitles (karaoke style)")
     print("   4. Sync with audio")
@@ -156,13 +206,18 @@ def compose_video_v2(
     print("⏳ Processing video (this may take 30-60 seconds)...")
     
     try:
-        result = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=True
-        )
+        # Yarım kalan render hiçbir zaman output_file olarak görünmez
+        with atomic_output(output_file) as tmp_output:
+            cmd[-1] = tmp_output
+            with span("ffmpeg", "subprocess", output=os.path.basename(output_file)) as s:
+                result = subprocess.run(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    check=True
+                )
+                s.add_bytes(os.path.getsize(tmp_output))
         
         # Başarılı
         if os.path.exists(output_file):
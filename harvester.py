@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+harvester.py
+Arka planda aday toplayıcı: render'a hazır post havuzunu doldurur
+
+Bir veya daha fazla subreddit'i periyodik olarak tarar (hot/top; birden
+fazla subreddit tek multireddit isteğiyle, r/a+b+c), fetch_popular_post
+ile aynı uygunluk kurallarını uygular ve başlık +
+en iyi yorumların anlık görüntüsünü candidate_pool'a yazar. Render
+işleri böylece kritik yolda Reddit API'sini beklemez.
+
+Kullanım:
+    python harvester.py --once                       # tek tur (cron)
+    python harvester.py --subreddits AskReddit,NoStupidQuestions --interval 300
+    python harvester.py --target 200                 # havuz bu boyuta ulaşınca bekle
+"""
+
+import argparse
+import sys
+import time
+
+from candidate_pool import get_candidate_pool, CandidatePool
+from reddit_cache import RedditCache, LISTING_TTL
+
+DEFAULT_INTERVAL = 300  # Turlar arası bekleme (saniye)
+DEFAULT_TARGET = 100  # Bu kadar hazır aday varsa tur atlanır
+DEFAULT_SORTS = ("hot", "top")
+
+
+def harvest_once(
+    reddit,
+    subreddits: list[str],
+    pool: CandidatePool,
+    sorts: tuple = DEFAULT_SORTS,
+    cache: RedditCache | None = None,
+    target: int | None = None,
+    quotas: dict | None = None
+) -> int:
+    """
+    One harvesting pass: one combined listing of all subreddits per sort.
+
+    Args:
+        quotas: {subreddit: max candidates per listing} (see apply_quotas)
+
+    Returns:
+        Number of new candidates added to the pool
+    """
+    from reddit_fetcher import iter_qualifying_posts
+
+    added = 0
+    known = pool.known_ids()
+    started = time.perf_counter()
+
+    for sort in sorts:
+        if target is not None and pool.size() >= target:
+            break
+        try:
+            for post_data in iter_qualifying_posts(reddit, subreddits, exclude_ids=known,
+                                                   cache=cache, sort=sort, quotas=quotas):
+                known.add(post_data['id'])
+                if pool.add(post_data):
+                    added += 1
+        except Exception as e:
+            print(f"⚠️  Harvest of r/{'+'.join(subreddits)} ({sort}) failed: {e}")
+
+    elapsed = time.perf_counter() - started
+    print(f"🌾 Harvested {added} new candidates in {elapsed:.1f}s (pool: {pool.size()} ready)")
+    return added
+
+
+def run_harvester(
+    subreddits: list[str],
+    interval: float = DEFAULT_INTERVAL,
+    target: int = DEFAULT_TARGET,
+    once: bool = False,
+    sorts: tuple = DEFAULT_SORTS
+):
+    """
+    Harvests until interrupted (or a single pass with once=True).
+    """
+    import main_v4
+
+    reddit = main_v4.get_reddit_client()
+    if not reddit:
+        print("❌ Reddit authentication failed")
+        return False
+
+    pool = get_candidate_pool()
+    # Listeler tur aralığından daha uzun önbellekte kalmasın
+    cache = RedditCache(listing_ttl=min(LISTING_TTL, interval / 2))
+
+    while True:
+        removed = pool.prune()
+        if removed:
+            print(f"🧹 Pruned {removed} stale or used candidates")
+
+        if pool.size() < target:
+            harvest_once(reddit, subreddits, pool, sorts=sorts, cache=cache, target=target,
+                         quotas=main_v4.SUBREDDIT_QUOTAS)
+        else:
+            print(f"✅ Pool full ({pool.size()} ready), skipping this pass")
+
+        if once:
+            return True
+        time.sleep(interval)
+
+
+def main(argv: list[str] | None = None):
+    import main_v4
+
+    parser = argparse.ArgumentParser(description="Fill the candidate pool from Reddit")
+    parser.add_argument("--subreddits", default=",".join(main_v4.SUBREDDITS),
+                        help="Comma-separated subreddit names")
+    parser.add_argument("--sorts", default=",".join(DEFAULT_SORTS),
+                        help="Listings to scan: hot, top (day), new")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL)
+    parser.add_argument("--target", type=int, default=DEFAULT_TARGET,
+                        help="Stop harvesting while this many candidates are ready")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    args = parser.parse_args(argv)
+
+    try:
+        ok = run_harvester(
+            subreddits=[s.strip() for s in args.subreddits.split(",") if s.strip()],
+            interval=args.interval,
+            target=args.target,
+            once=args.once,
+            sorts=tuple(s.strip() for s in args.sorts.split(",") if s.strip())
+        )
+    except KeyboardInterrupt:
+        print()
+        print("⚠️  Harvester stopped")
+        ok = True
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+job_manifest.py
+İş manifestosu: aşama başına girdi/çıktı kaydı ve içerik özetleri
+
+Her aşama tamamlandığında girdilerinin parmak izi, çıktı dosyalarının
+SHA-256 özetleri ve sonraki aşamaların ihtiyaç duyduğu durum alanları
+manifest.json'a yazılır. Yeniden çalıştırmada çıktıları hâlâ geçerli
+olan aşamalar atlanır (ör. sadece YouTube yüklemesi tekrar denenir).
+Her çalıştırma bir deneme sayılır; MAX_RESUME_ATTEMPTS denemede de
+bitmeyen iş bırakılır, sürekli çöken bir iş sonsuza dek devam ettirilmez.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from job_workspace import WORKSPACE_ROOT, atomic_output
+
+MANIFEST_FILE = "manifest.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+MAX_RESUME_ATTEMPTS = 3  # Bu kadar çalıştırmada bitmeyen iş bırakılır
+
+
+def file_digest(path: str) -> str:
+    """
+    SHA-256 of a file, read in 1 MB chunks.
+    """
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint(data) -> str:
+    """
+    Stable hash of a JSON-serialisable value.
+    """
+    encoded = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class JobManifest:
+    """
+    Per-job record of completed stages, stored as JSON in the workspace.
+
+    Structure:
+        {
+          "created_at": ..., "finished": false, "attempts": 1,
+          "stages": {
+            "<stage>": {
+              "inputs": "<fingerprint>",
+              "outputs": {"<key>": {"path", "sha256", "size", "mtime_ns"}},
+              "state": {...},
+              "digest": "<fingerprint of outputs + state>",
+              "completed_at": ...
+            }
+          }
+        }
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()  # Eşzamanlı aşamalar aynı dosyayı yazar
+        self.data = {'created_at': time.time(), 'finished': False, 'stages': {}}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Could not read manifest, starting fresh: {e}")
+
+    def save(self):
+        with self._lock:
+            with atomic_output(self.path) as tmp:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(self.data, f, indent=2, ensure_ascii=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.data.get('finished', False)
+
+    @property
+    def attempts(self) -> int:
+        return self.data.get('attempts', 0)
+
+    def start_attempt(self) -> int:
+        """Counts one more run of this job and returns the new count."""
+        with self._lock:
+            self.data['attempts'] = self.attempts + 1
+            self.save()
+            return self.data['attempts']
+
+    def abandon(self):
+        """Gives the job up: it is no longer offered for resume."""
+        with self._lock:
+            self.data['abandoned'] = True
+            self.save()
+
+    def stage_digest(self, name: str) -> str | None:
+        """Digest of a completed stage's outputs (None if not completed)."""
+        entry = self.data['stages'].get(name)
+        return entry['digest'] if entry else None
+
+    def completed_stages(self) -> list[str]:
+        return list(self.data['stages'].keys())
+
+    def record(self, name: str, inputs: dict, outputs: dict, state: dict):
+        """
+        Records a completed stage.
+
+        Args:
+            name: Stage name
+            inputs: Everything the stage result depends on (JSON-serialisable)
+            outputs: {key: file path} produced by the stage
+            state: Extra job fields to restore on resume (JSON-serialisable)
+        """
+        recorded_outputs = {}
+        for key, path in outputs.items():
+            st = os.stat(path)
+            recorded_outputs[key] = {
+                'path': path,
+                'sha256': file_digest(path),
+                'size': st.st_size,
+                'mtime_ns': st.st_mtime_ns,
+            }
+
+        entry = {
+            'inputs': fingerprint(inputs),
+            'outputs': recorded_outputs,
+            'state': state,
+            'digest': fingerprint({
+                'outputs': {k: v['sha256'] for k, v in recorded_outputs.items()},
+                'state': state,
+            }),
+            'completed_at': time.time(),
+        }
+        with self._lock:
+            self.data['stages'][name] = entry
+            self.save()
+
+    def is_valid(self, name: str, inputs: dict) -> bool:
+        """
+        True if the stage was completed with the same inputs and all of its
+        output files still exist with the recorded content.
+        """
+        entry = self.data['stages'].get(name)
+        if not entry or entry['inputs'] != fingerprint(inputs):
+            return False
+
+        for output in entry['outputs'].values():
+            path = output['path']
+            if not os.path.exists(path):
+                return False
+            st = os.stat(path)
+            if st.st_size != output['size']:
+                return False
+            # Boyut ve mtime aynıysa tekrar hash'leme
+            if st.st_mtime_ns != output['mtime_ns'] and file_digest(path) != output['sha256']:
+                return False
+        return True
+
+    def restore(self, name: str, job: dict):
+        """Copies a completed stage's outputs and state back into the job."""
+        entry = self.data['stages'][name]
+        for key, output in entry['outputs'].items():
+            job[key] = output['path']
+        job.update(entry['state'])
+
+    def invalidate(self, name: str):
+        """Forgets a stage (e.g. when a later check rejects its output)."""
+        with self._lock:
+            if self.data['stages'].pop(name, None) is not None:
+                self.save()
+
+    def mark_finished(self):
+        with self._lock:
+            self.data['finished'] = True
+            self.data['finished_at'] = time.time()
+            self.save()
+
+
+def find_unfinished_workspace(root: str = WORKSPACE_ROOT,
+                              max_attempts: int = MAX_RESUME_ATTEMPTS) -> str | None:
+    """
+    Returns the most recent workspace whose manifest is not finished
+    (left behind by a failed or killed run), or None. Jobs that already
+    ran max_attempts times are abandoned instead of resumed again.
+    """
+    if not os.path.isdir(root):
+        return None
+
+    candidates = []
+    for entry in os.scandir(root):
+        manifest_path = os.path.join(entry.path, MANIFEST_FILE)
+        if entry.is_dir() and os.path.exists(manifest_path):
+            manifest = JobManifest(manifest_path)
+            if manifest.finished or manifest.data.get('abandoned') or not manifest.completed_stages():
+                continue
+            if manifest.attempts >= max_attempts:
+                print(f"⚠️  Giving up on {entry.path} after {manifest.attempts} attempts")
+                manifest.abandon()
+            else:
+                candidates.append((os.path.getmtime(manifest_path), entry.path))
+
+    if not candidates:
+        return None
+    return max(candidates)[1]
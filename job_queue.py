@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+job_queue.py
+Kalıcı SQLite iş kuyruğu ve çok süreçli render işçileri
+
+- Post adayları ve aşama durumları job_queue.db'de tutulur (WAL modu)
+- İşçiler işleri kiralama (lease) ile alır; çöken işçinin kirası dolunca
+  iş başka bir işçiye geçer (deneme sayısı artar, MAX_ATTEMPTS'ta durur)
+- Her aşama kendi süreç grubunda bir alt süreçte çalışır; kira yenilenemezse
+  (başka işçi almış) grup FFmpeg dahil öldürülür, aynı post iki kez render
+  edilip yüklenmez
+- Kalıcı olarak başarısız işlerin çalışma dizinleri incelemeye açık kalır,
+  STALE_WORKSPACE_HOURS sonra purge_failed_workspaces() ile silinir
+- Aşama başına eşzamanlılık sınırı: FFmpeg CPU'yu boğmaz, ağ aşamaları
+  daha fazla slot alır
+
+Kullanım:
+    python job_queue.py enqueue --count 10
+    python job_queue.py work --workers 4
+    python job_queue.py status
+"""
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import multiprocessing
+
+from job_workspace import STALE_WORKSPACE_HOURS
+
+QUEUE_DB = "job_queue.db"
+LEASE_SECONDS = 120  # Kira süresi (işçi yaşadıkça yenilenir)
+LEASE_RENEW_SECONDS = 30
+MAX_ATTEMPTS = 3  # Aşama başına deneme sayısı
+RETRY_DELAY = 30  # Başarısız denemeden sonra bekleme (saniye)
+POLL_INTERVAL = 1.0
+
+CPU_COUNT = os.cpu_count() or 2
+
+# Aşama başına aynı anda çalışabilecek iş sayısı
+STAGE_CONCURRENCY = {
+    'fetch': CPU_COUNT,
+    'background_search': 4,
+    'background': 4,
+    'audio': 4,
+    'frame': CPU_COUNT,
+    'background_verify': 4,
+    'compose': max(1, CPU_COUNT // 4),  # libx264 zaten çok çekirdek kullanır
+    'upload': 2,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    post_id TEXT UNIQUE NOT NULL,
+    post_json TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',   -- pending | done | failed
+    workspace TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    not_before REAL NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (state, stage, lease_expires);
+"""
+
+
+def connect(db_path: str = QUEUE_DB) -> sqlite3.Connection:
+    """
+    Opens the queue database in WAL mode (readers never block the writer).
+    """
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def stage_order() -> list[str]:
+    """Stages in dependency order (from main_v4.STAGE_SPECS)."""
+    from main_v4 import STAGE_SPECS
+    from stage_dag import topological_order
+    return topological_order(STAGE_SPECS)
+
+
+def enqueue_post(conn: sqlite3.Connection, post_data: dict) -> bool:
+    """
+    Adds a post candidate. Returns False if it is already queued.
+    """
+    now = time.time()
+    cur = conn.execute(
+        "INSERT OR IGNORE INTO jobs (post_id, post_json, stage, created_at, updated_at) "
+        "VALUES (?, ?, 'fetch', ?, ?)",
+        (post_data['id'], json.dumps(post_data, ensure_ascii=False), now, now)
+    )
+    return cur.rowcount == 1
+
+
+def queued_post_ids(conn: sqlite3.Connection) -> set:
+    return {row['post_id'] for row in conn.execute("SELECT post_id FROM jobs")}
+
+
+def claim_job(conn: sqlite3.Connection, worker_id: str, limits: dict = None) -> dict | None:
+    """
+    Leases the oldest runnable job whose current stage has a free slot.
+    Reclaiming an expired lease (the worker died or hung) counts as an
+    attempt; a job that keeps killing its workers fails after MAX_ATTEMPTS.
+
+    Returns:
+        Job row as dict or None
+    """
+    limits = limits or STAGE_CONCURRENCY
+    now = time.time()
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        active = {
+            row['stage']: row['n'] for row in conn.execute(
+                "SELECT stage, COUNT(*) AS n FROM jobs "
+                "WHERE state = 'pending' AND lease_expires > ? GROUP BY stage",
+                (now,)
+            )
+        }
+
+        rows = conn.execute(
+            "SELECT * FROM jobs WHERE state = 'pending' "
+            "AND (lease_expires IS NULL OR lease_expires <= ?) AND not_before <= ? "
+            "ORDER BY id",
+            (now, now)
+        ).fetchall()
+
+        for row in rows:
+            if active.get(row['stage'], 0) >= limits.get(row['stage'], 1):
+                continue
+            attempts = row['attempts']
+            if row['lease_owner'] is not None:
+                # Süresi dolmuş kira: önceki işçi aşamayı bitiremedi
+                attempts += 1
+                if attempts >= MAX_ATTEMPTS:
+                    conn.execute(
+                        "UPDATE jobs SET state = 'failed', attempts = ?, error = ?, "
+                        "lease_owner = NULL, lease_expires = NULL, updated_at = ? WHERE id = ?",
+                        (attempts, f"lease of {row['lease_owner']} expired in stage {row['stage']}",
+                         now, row['id'])
+                    )
+                    continue
+            conn.execute(
+                "UPDATE jobs SET lease_owner = ?, lease_expires = ?, attempts = ?, updated_at = ? WHERE id = ?",
+                (worker_id, now + LEASE_SECONDS, attempts, now, row['id'])
+            )
+            conn.execute("COMMIT")
+            return {**dict(row), 'attempts': attempts, 'lease_owner': worker_id}
+
+        conn.execute("COMMIT")
+        return None
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def renew_lease(conn: sqlite3.Connection, job_id: int, worker_id: str) -> bool:
+    cur = conn.execute(
+        "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ?",
+        (time.time() + LEASE_SECONDS, job_id, worker_id)
+    )
+    return cur.rowcount == 1
+
+
+def complete_stage(conn: sqlite3.Connection, job_id: int, worker_id: str, next_stage: str | None, workspace: str):
+    """Moves a job to its next stage (or done) and releases the lease."""
+    state = 'pending' if next_stage else 'done'
+    conn.execute(
+        "UPDATE jobs SET stage = ?, state = ?, workspace = ?, attempts = 0, "
+        "lease_owner = NULL, lease_expires = NULL, error = NULL, updated_at = ? "
+        "WHERE id = ? AND lease_owner = ?",
+        (next_stage or 'done', state, workspace, time.time(), job_id, worker_id)
+    )
+
+
+def fail_stage(conn: sqlite3.Connection, job: dict, worker_id: str, error: str, workspace: str | None):
+    """Schedules a retry, or marks the job failed after MAX_ATTEMPTS."""
+    attempts = job['attempts'] + 1
+    state = 'failed' if attempts >= MAX_ATTEMPTS else 'pending'
+    conn.execute(
+        "UPDATE jobs SET state = ?, attempts = ?, workspace = ?, error = ?, "
+        "lease_owner = NULL, lease_expires = NULL, not_before = ?, updated_at = ? "
+        "WHERE id = ? AND lease_owner = ?",
+        (state, attempts, workspace, error, time.time() + RETRY_DELAY, time.time(),
+         job['id'], worker_id)
+    )
+
+
+def purge_failed_workspaces(conn: sqlite3.Connection, max_age_hours: float = STALE_WORKSPACE_HOURS) -> int:
+    """
+    Deletes the workspaces of jobs that failed more than `max_age_hours`
+    ago (kept until then for inspection).
+
+    Returns:
+        Number of removed workspaces
+    """
+    rows = conn.execute(
+        "SELECT id, workspace FROM jobs WHERE state = 'failed' AND workspace IS NOT NULL AND updated_at < ?",
+        (time.time() - max_age_hours * 3600,)
+    ).fetchall()
+    for row in rows:
+        shutil.rmtree(row['workspace'], ignore_errors=True)
+        conn.execute("UPDATE jobs SET workspace = NULL WHERE id = ?", (row['id'],))
+    return len(rows)
+
+
+def has_unfinished_jobs(conn: sqlite3.Connection) -> bool:
+    row = conn.execute("SELECT COUNT(*) AS n FROM jobs WHERE state = 'pending'").fetchone()
+    return row['n'] > 0
+
+
+class _LeaseKeeper(threading.Thread):
+    """
+    Renews a job's lease while its stage is running. If a renewal fails
+    (another worker reclaimed the job) `lost` is set and `on_lost` is
+    called to interrupt the stage.
+    """
+
+    def __init__(self, db_path: str, job_id: int, worker_id: str, on_lost=None):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.on_lost = on_lost
+        self.stopped = threading.Event()
+        self.lost = threading.Event()
+
+    def run(self):
+        conn = connect(self.db_path)
+        try:
+            while not self.stopped.wait(LEASE_RENEW_SECONDS):
+                if not renew_lease(conn, self.job_id, self.worker_id):
+                    self.lost.set()
+                    if self.on_lost and not self.stopped.is_set():
+                        self.on_lost()
+                    return
+        finally:
+            conn.close()
+
+
+def run_claimed_stage(row: dict, order: list[str]) -> tuple[bool, str]:
+    """
+    Rebuilds the job from its workspace manifest and runs its current stage.
+
+    Returns:
+        (success, workspace path)
+    """
+    import main_v4
+
+    job = main_v4.new_job(resume_path=row['workspace'])
+    manifest = job['manifest']
+
+    # Daha önce tamamlanan aşamaların çıktılarını job'a geri yükle
+    for name in order:
+        if name == row['stage']:
+            break
+        if name in manifest.completed_stages():
+            manifest.restore(name, job)
+
+    if row['stage'] == 'fetch':
+        # Post kuyruğa eklenirken seçildi: Reddit'e tekrar gitme
+        ok = main_v4.seed_post_stage(job, json.loads(row['post_json']))
+    else:
+        ok = main_v4.run_stage(job, row['stage'])
+
+    if ok and row['stage'] == order[-1]:
+        main_v4.finish_batch_job(job)
+
+    return ok, job['workspace'].path
+
+
+def _stage_process(row: dict, order: list[str], sender):
+    """Child process body: runs the stage and sends (ok, workspace, error)."""
+    os.setsid()  # FFmpeg gibi torunlar da bu grupta: kira kaybında birlikte öldürülür
+    workspace = row['workspace']
+    try:
+        ok, workspace = run_claimed_stage(row, order)
+        error = None if ok else f"stage {row['stage']} failed"
+    except Exception as e:
+        ok, error = False, f"{type(e).__name__}: {e}"
+    sender.send((ok, workspace, error))
+
+
+def _kill_stage(process: multiprocessing.Process):
+    """Kills a stage process and everything it started."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        process.kill()  # setsid henüz çalışmadı
+
+
+def run_leased_stage(db_path: str, row: dict, worker_id: str, order: list[str],
+                     target=_stage_process) -> tuple[bool, str | None, str | None, bool]:
+    """
+    Runs the claimed stage in a child process while its lease is renewed.
+    Stage code is never interrupted from inside: if the lease is lost the
+    whole process group is killed, so no `except Exception` can swallow it.
+
+    Returns:
+        (success, workspace path, error, lease lost)
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=target, args=(row, order, sender))
+    process.start()
+    sender.close()
+    keeper = _LeaseKeeper(db_path, row['id'], worker_id, on_lost=lambda: _kill_stage(process))
+    keeper.start()
+    try:
+        ok, workspace, error = receiver.recv()
+    except EOFError:
+        ok, workspace, error = False, row['workspace'], None  # Sonuç göndermeden öldü
+    finally:
+        process.join()
+        keeper.stopped.set()
+        keeper.join()
+        receiver.close()
+    if error is None and not ok:
+        error = f"stage {row['stage']} process exited with {process.exitcode}"
+    return ok, workspace, error, keeper.lost.is_set()
+
+
+def worker_loop(db_path: str = QUEUE_DB, wait: bool = False):
+    """
+    Claims and runs stages until the queue is drained (or forever if wait).
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    conn = connect(db_path)
+    order = stage_order()
+    print(f"👷 Worker {worker_id} started")
+
+    while True:
+        row = claim_job(conn, worker_id)
+        if row is None:
+            if not wait and not has_unfinished_jobs(conn):
+                break
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        print(f"👷 [{worker_id}] job {row['id']} ({row['post_id']}) → {row['stage']}")
+        ok, workspace, error, lost = run_leased_stage(db_path, row, worker_id, order)
+
+        if lost:
+            # İş artık başka işçide: sonucu kaydetme, temizleme de yapma
+            print(f"⚠️  [{worker_id}] job {row['id']}: lease lost during {row['stage']}, abandoned")
+            continue
+        if ok:
+            index = order.index(row['stage'])
+            next_stage = order[index + 1] if index + 1 < len(order) else None
+            complete_stage(conn, row['id'], worker_id, next_stage, workspace)
+        else:
+            print(f"❌ [{worker_id}] job {row['id']}: {error}")
+            fail_stage(conn, row, worker_id, error, workspace)
+            if row['attempts'] + 1 >= MAX_ATTEMPTS:
+                # Kalıcı hata: aday havuzdan düşer; çalışma dizini diskte
+                # incelemeye kalır (tmpfs'te hemen silinir)
+                from candidate_pool import get_candidate_pool
+                get_candidate_pool().remove(row['post_id'])
+                if workspace:
+                    from job_workspace import JobWorkspace
+                    JobWorkspace(path=workspace).cleanup(success=False)
+
+    conn.close()
+    print(f"👷 Worker {worker_id} finished")
+
+
+def run_workers(count: int = CPU_COUNT, db_path: str = QUEUE_DB, wait: bool = False):
+    """
+    Starts `count` worker processes and waits for them.
+    """
+    conn = connect(db_path)
+    purged = purge_failed_workspaces(conn)
+    conn.close()
+    if purged:
+        print(f"🧹 Removed {purged} workspaces of failed jobs")
+    print(f"🏭 Starting {count} workers (limits: {STAGE_CONCURRENCY})")
+    processes = [
+        multiprocessing.Process(target=worker_loop, args=(db_path, wait), name=f"worker-{i}")
+        for i in range(count)
+    ]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+
+
+def enqueue_candidates(count: int, db_path: str = QUEUE_DB, topic: str | None = None) -> int:
+    """
+    Moves `count` new post candidates into the queue: harvested ones from
+    the candidate pool first (only those matching `topic`, if given), the
+    rest fetched from Reddit.
+    """
+    import main_v4
+    from candidate_pool import get_candidate_pool
+    from reddit_fetcher import fetch_popular_post
+
+    conn = connect(db_path)
+    pool = get_candidate_pool()
+    reddit = None
+
+    exclude = queued_post_ids(conn)
+    added = 0
+    for _ in range(count):
+        post_data = pool.pop(exclude_ids=exclude, subreddit=main_v4.SUBREDDITS, topic=topic,
+                             weights=main_v4.SUBREDDIT_WEIGHTS)
+        if not post_data:
+            reddit = reddit or main_v4.get_reddit_client()
+            if not reddit:
+                print("❌ Reddit authentication failed")
+                break
+            post_data = fetch_popular_post(reddit, main_v4.SUBREDDITS, exclude_ids=exclude,
+                                           weights=main_v4.SUBREDDIT_WEIGHTS, quotas=main_v4.SUBREDDIT_QUOTAS)
+        if not post_data:
+            break
+        exclude.add(post_data['id'])
+        if enqueue_post(conn, post_data):
+            added += 1
+            print(f"📥 Queued {post_data['id']}: {post_data['title'][:60]}")
+
+    conn.close()
+    return added
+
+
+def print_status(db_path: str = QUEUE_DB):
+    conn = connect(db_path)
+    now = time.time()
+    print("📊 Queue status")
+    for row in conn.execute(
+        "SELECT state, stage, COUNT(*) AS n, "
+        "SUM(CASE WHEN lease_expires > ? THEN 1 ELSE 0 END) AS leased "
+        "FROM jobs GROUP BY state, stage ORDER BY state, stage",
+        (now,)
+    ):
+        print(f"   {row['state']:8s} {row['stage']:18s} {row['n']:4d} jobs ({row['leased']} running)")
+    conn.close()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Durable render job queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_enqueue = sub.add_parser("enqueue", help="Fetch post candidates into the queue")
+    p_enqueue.add_argument("--count", type=int, default=5)
+    p_enqueue.add_argument("--topic", help="Prefer pool candidates about this topic")
+
+    p_work = sub.add_parser("work", help="Run render workers")
+    p_work.add_argument("--workers", type=int, default=CPU_COUNT)
+    p_work.add_argument("--wait", action="store_true", help="Keep polling for new jobs")
+
+    sub.add_parser("status", help="Show queue status")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "enqueue":
+        added = enqueue_candidates(args.count, topic=args.topic)
+        print(f"✅ {added} jobs queued")
+        if added == 0:
+            sys.exit(1)
+    elif args.command == "work":
+        run_workers(args.workers, wait=args.wait)
+    else:
+        print_status()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+job_workspace.py
+İş başına izole çalışma dizini (aynı makinede paralel işler için)
+
+- Her iş benzersiz bir dizinde çalışır (isteğe bağlı /dev/shm tmpfs)
+- Çıktılar önce geçici isimle yazılır, bitince atomik olarak yerine taşınır
+- Temizlik kuralları: başarıda silinir, hatada (diskteyse) incelemek için kalır
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+
+WORKSPACE_ROOT = os.environ.get('SHORTS_WORKSPACE_ROOT', 'workspaces')
+TMPFS_ROOT = "/dev/shm/shorts_bot"
+RENDERS_DIR = "renders"  # Bitmiş videoların yayınlandığı dizin
+STALE_WORKSPACE_HOURS = 24
+
+
+def tmpfs_available() -> bool:
+    """True if /dev/shm exists and is writable."""
+    return os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK)
+
+
+def temp_path_for(path: str) -> str:
+    """
+    Returns a hidden temporary sibling of `path` that keeps its extension
+    (FFmpeg picks the muxer from the extension).
+    """
+    directory, name = os.path.split(path)
+    base, ext = os.path.splitext(name)
+    return os.path.join(directory, f".{base}.{uuid.uuid4().hex[:8]}.part{ext}")
+
+
+def move_atomic(src: str, dest: str) -> str:
+    """
+    Moves `src` to `dest` atomically, also across filesystems
+    (copy next to `dest` first, then rename).
+    """
+    dest_dir = os.path.dirname(dest)
+    if dest_dir:
+        os.makedirs(dest_dir, exist_ok=True)
+    try:
+        os.replace(src, dest)
+    except OSError:
+        # Farklı dosya sistemi (ör. /dev/shm → disk)
+        staging = temp_path_for(dest)
+        shutil.copy2(src, staging)
+        os.replace(staging, dest)
+        os.remove(src)
+    return dest
+
+
+@contextmanager
+def atomic_output(path: str):
+    """
+    Context manager that yields a temporary path for a writer and renames it
+    to `path` only if the block finishes without an exception.
+
+    Example:
+        with atomic_output("background.mp4") as tmp:
+            download_to(tmp)
+    """
+    tmp = temp_path_for(path)
+    try:
+        yield tmp
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    if os.path.exists(tmp):
+        move_atomic(tmp, path)
+
+
+class JobWorkspace:
+    """
+    Unique working directory for one render job.
+
+    Args:
+        job_id: Human readable prefix for the directory name
+        use_tmpfs: Put the workspace on /dev/shm when available
+        root: Parent directory (overrides use_tmpfs)
+        keep_on_failure: Keep the directory after a failed job
+            (default: keep on disk, always remove on tmpfs to free RAM)
+        path: Re-attach to an existing workspace directory (resume)
+    """
+
+    def __init__(
+        self,
+        job_id: str = "job",
+        use_tmpfs: bool = False,
+        root: str | None = None,
+        keep_on_failure: bool | None = None,
+        path: str | None = None
+    ):
+        if path is not None:
+            root = os.path.dirname(os.path.abspath(path))
+        elif root is None:
+            root = TMPFS_ROOT if (use_tmpfs and tmpfs_available()) else WORKSPACE_ROOT
+        os.makedirs(root, exist_ok=True)
+
+        self.job_id = job_id
+        self.on_tmpfs = os.path.abspath(root).startswith("/dev/shm")
+        self.keep_on_failure = (not self.on_tmpfs) if keep_on_failure is None else keep_on_failure
+        self.path = path if path is not None else tempfile.mkdtemp(prefix=f"{job_id}_", dir=root)
+
+    def file(self, name: str) -> str:
+        """Path of a file inside the workspace."""
+        return os.path.join(self.path, name)
+
+    def publish(self, name: str, dest: str) -> str:
+        """
+        Atomically moves a finished output out of the workspace.
+
+        Returns:
+            Destination path
+        """
+        return move_atomic(self.file(name), dest)
+
+    def cleanup(self, success: bool = True):
+        """
+        Removes the workspace (kept after failures if keep_on_failure).
+        """
+        if not success and self.keep_on_failure:
+            print(f"   Workspace kept for inspection: {self.path}")
+            return
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup(success=exc_type is None)
+        return False
+
+    def __repr__(self):
+        return f"JobWorkspace({self.path!r})"
+
+
+def prune_stale_workspaces(root: str = WORKSPACE_ROOT, max_age_hours: float = STALE_WORKSPACE_HOURS) -> int:
+    """
+    Removes workspaces older than `max_age_hours` (left by crashed runs).
+
+    Returns:
+        Number of removed directories
+    """
+    if not os.path.isdir(root):
+        return 0
+
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for entry in os.scandir(root):
+        if entry.is_dir() and entry.stat().st_mtime < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    return removed
@@ -9,24 +9,45 @@ Reddit → YouTube Shorts (Tam Otomatik)
 2. Reddit çerçevesi (PIL - şeffaf metin alanı)
 3. Karaoke altyazılar (edge-tts - cümle düzeyinde)
 4. Soru > Cevap akışı (başlık sonra yorumlar)
+5. Toplu mod (--count N) - aşamalar boru hattı şeklinde çakışır
+6. İş başına izole çalışma dizini (job_workspace)
+7. Kaldığı yerden devam (job_manifest - geçerli aşamalar atlanır, en fazla MAX_RESUME_ATTEMPTS deneme)
+8. Aşama DAG'ı (stage_dag) - bağımsız aşamalar tek döngüde eşzamanlı
+9. Spekülatif arka plan: süre tahminiyle TTS beklenmeden indirilir
+10. İzleme (--trace): aşama/alt süreç span'leri Chrome trace olarak
+11. Konu seçimi (--topic "haunted, ghost"): aday havuzunda tam metin arama
 """
 
+import argparse
+import asyncio
+import functools
 import os
 import sys
-from reddit_fetcher import authenticate_reddit, fetch_popular_post
-from reddit_frame_creator import create_frame_for_post
-from pexels_dynamic import get_background_for_duration
-from subtitle_generator_v2 import generate_audio_with_flow_sync, VOICE_PRESETS_V2
-from subtitle_generator_v3 import generate_audio_with_flow_gtts  # Fallback
-from ffmpeg_composer_v2 import compose_video_v2
-import youtube_uploader
+import threading
+from subtitle_generator_v2 import VOICE_PRESETS_V2  # edge_tts ilk kullanımda yüklenir
+from job_workspace import JobWorkspace, RENDERS_DIR, prune_stale_workspaces
+from job_manifest import JobManifest, MANIFEST_FILE, MAX_RESUME_ATTEMPTS, find_unfinished_workspace
+from stage_dag import run_dag_sync
+from tracing import span, enable_tracing
+from duration_predictor import (
+    predict_narration_duration, record_narration_duration, DURATION_TOLERANCE
+)
+
+# Ağır bağımlılıklar (praw, edge_tts, gtts, googleapiclient, PIL, requests)
+# modül yüklenirken değil, onları kullanan aşamada import edilir; böylece
+# Reddit girişinde biten bir çalıştırma Google istemcisini hiç yüklemez.
 
 # --- V4 Configuration ---
-SUBREDDIT = "AskReddit"
+# Birden fazla subreddit tek multireddit isteğiyle (r/a+b+c) taranır
+SUBREDDITS = ["AskReddit"]
+SUBREDDIT_WEIGHTS = {}  # Sıralama puanı çarpanı, ör. {"NoStupidQuestions": 0.8} (yoksa 1.0)
+SUBREDDIT_QUOTAS = {}  # Liste başına en fazla aday, ör. {"AskReddit": 10} (yoksa sınırsız)
 VIDEO_TITLE_PREFIX = "Reddit Asks: "
 VOICE = VOICE_PRESETS_V2["male_us"]  # Varsayılan ses
 AUDIO_RATE = "+10%"  # 1.1x hız
 MAX_COMMENTS = 5  # Maksimum yorum sayısı
+PAUSE_BETWEEN = 0.8  # Soru-cevap arası duraklama (edge-tts)
+GTTS_PAUSE_BETWEEN = 1.0  # gTTS segmentleri arası sessizlik
 
 # SEO-optimized tags and hashtags
 VIDEO_TAGS = [
@@ -38,197 +59,440 @@ VIDEO_TAGS = [
 
 VIDEO_HASHTAGS = [
     "#redditstories",
-    "#askreddit", 
+    "#askreddit",
     "#shorts",
     "#viral",
     "#trending",
     "#reddit"
 ]
+
+# Aşama çıktı dosyaları (her işin kendi çalışma dizininde)
+OUTPUT_FILES = {
+    'audio': "narration.mp3",
+    'subtitles': "subtitles.srt",
+    'background': "background.mp4",
+    'background_final': "background_final.mp4",  # Tahmin tutmazsa yeniden indirilen klip
+    'frame': "reddit_frame.png",
+    'final': "final_short.mp4",
+}
+
+SUBTITLE_STYLE = {
+    'font': 'Arial',
+    'font_size': 36,
+    'primary_color': '&H00FFFFFF',  # White
+    'outline_color': '&H00000000',  # Black outline
+    'outline': 3,
+    'shadow': 2,
+    'bold': 1,
+    'alignment': 2,  # Bottom center
+    'margin_v': 200  # 200px from bottom
+}
+
+USE_CANDIDATE_POOL = True  # Önce harvester havuzundan aday al (harvester.py)
+BATCH_QUEUE_SIZE = 1  # Aşamalar arası kuyruk kapasitesi (bellek/disk sınırı)
 # ---------------------
 
+# Süreç boyunca paylaşılan istemciler (toplu modda bir kez doğrulanır).
+# PRAW ve googleapiclient (httplib2) thread-safe değil: her istemci aynı anda
+# tek bir iş parçacığından, kilidi tutarak kullanılır (daemon renderer'ları).
+_reddit = None
+_youtube_service = None
+_reddit_lock = threading.RLock()
+_youtube_lock = threading.RLock()
+
+# Bu süreçte seçilmiş postlar (toplu modda aynı post iki kez seçilmesin)
+_claimed_post_ids = set()
+
+
+# Aşamaların tembel (lazy) import ettiği modüller
+STAGE_MODULES = [
+    "reddit_fetcher",
+    "reddit_frame_creator",
+    "pexels_dynamic",
+    "subtitle_generator_v2",
+    "subtitle_generator_v3",
+    "ffmpeg_composer_v2",
+    "youtube_uploader",
+]
+
+
+def preload_stage_modules():
+    """
+    Imports every stage dependency up front (daemon warm-up), so the first
+    job does not pay for them.
+    """
+    import importlib
+    for name in STAGE_MODULES:
+        importlib.import_module(name)
+
+
+def get_reddit_client():
+    """
+    Returns the shared PRAW instance, authenticating on first use.
+    Callers that may run in parallel threads must hold _reddit_lock while
+    using it.
+    """
+    global _reddit
+    with _reddit_lock:
+        if _reddit is None:
+            from reddit_fetcher import authenticate_reddit
+            _reddit = authenticate_reddit()
+        return _reddit
+
+
+def get_youtube_service():
+    """
+    Returns the shared YouTube API service, authenticating on first use.
+    Callers that may run in parallel threads must hold _youtube_lock while
+    using it.
+    """
+    global _youtube_service
+    with _youtube_lock:
+        if _youtube_service is None:
+            import youtube_uploader
+            _youtube_service = youtube_uploader.get_authenticated_service()
+        return _youtube_service
+
+
+def new_job(
+    index: int | None = None,
+    use_tmpfs: bool = False,
+    resume_path: str | None = None,
+    topic: str | None = None
+) -> dict:
+    """
+    Creates the state dictionary that is passed through every stage.
+
+    Args:
+        index: Batch job number (None = single run)
+        use_tmpfs: Put the job workspace on /dev/shm
+        resume_path: Existing workspace to continue (its manifest is reused)
+        topic: Pick a pool candidate about this topic (candidate_pool.topic_query)
+
+    Returns:
+        Job dictionary
+    """
+    workspace = JobWorkspace(
+        job_id="job" if index is None else f"job{index:03d}",
+        use_tmpfs=use_tmpfs,
+        path=resume_path
+    )
+    return {
+        'index': index,
+        'workspace': workspace,
+        'manifest': JobManifest(workspace.file(MANIFEST_FILE)),
+        'files': {key: workspace.file(name) for key, name in OUTPUT_FILES.items()},
+        'post_data': None,
+        'topic': topic,
+    }
+
+
+def job_label(job: dict) -> str:
+    """Short label for log lines."""
+    return "job" if job['index'] is None else f"job {job['index']}"
+
+
+# -----------------------------------------------------------------------------
+# STAGES
+# Her aşama job sözlüğünü günceller ve başarı durumunu (bool) döndürür.
+# -----------------------------------------------------------------------------
+
+def fetch_post_stage(job: dict) -> bool:
+    """
+    STEP 1: Reddit post fetching.
+    A harvested candidate is taken from the pool when available; Reddit is
+    only queried (and logged into) when the pool is empty. With a topic,
+    only matching pool candidates are considered (the live hot listing is
+    too small to search, so Reddit is used unfiltered as a fallback).
+    """
+    post_data = None
+    topic = job.get('topic')
+    if USE_CANDIDATE_POOL:
+        from candidate_pool import get_candidate_pool
+        with span("pool_pop", "io", topic=topic):
+            post_data = get_candidate_pool().pop(exclude_ids=_claimed_post_ids, subreddit=SUBREDDITS,
+                                                 topic=topic, weights=SUBREDDIT_WEIGHTS)
+        if post_data:
+            print(f"🌾 Candidate taken from pool: {post_data['id']} (r/{post_data['subreddit']})")
+        elif topic:
+            print(f"⚠️  No pool candidate matches topic {topic!r}, falling back to r/{'+'.join(SUBREDDITS)} hot")
+
+    if not post_data:
+        with _reddit_lock:
+            reddit = get_reddit_client()
+            if not reddit:
+                print("❌ Reddit authentication failed")
+                return False
+
+            from reddit_fetcher import fetch_popular_post
+            post_data = fetch_popular_post(reddit, SUBREDDITS, exclude_ids=_claimed_post_ids,
+                                           weights=SUBREDDIT_WEIGHTS, quotas=SUBREDDIT_QUOTAS)
+            if post_data:
+                _claimed_post_ids.add(post_data['id'])
+    if not post_data:
+        print("❌ No suitable Reddit post found")
+        return False
+
+    _claimed_post_ids.add(post_data['id'])
+    job['post_data'] = post_data
+    job['comments'] = post_data.get('comments', [])[:MAX_COMMENTS]
 
-def main():
-    print("=" * 70)
-    print("🤖 Reddit-to-YouTube Shorts Bot V4 (Advanced Architecture)")
-    print("=" * 70)
     print()
-    
-    try:
-        # -------------------------------------------------------------------------
-        # STEP 1: Reddit Post Fetching
-        # -------------------------------------------------------------------------
-        print("📋 Step 1/6: Fetching Reddit post...")
-        
-        reddit = authenticate_reddit()
-        if not reddit:
-            print("❌ Reddit authentication failed")
-            sys.exit(1)
-        
-        post_data = fetch_popular_post(reddit, SUBREDDIT)
-        if not post_data:
-            print("❌ No suitable Reddit post found")
-            sys.exit(1)
-        
-        title = post_data['title']
-        url = post_data['url']
-        post_id = post_data['id']
-        comments = post_data.get('comments', [])[:MAX_COMMENTS]
-        
-        print()
-        print("✅ Post selected:")
-        print(f"   Title: {title}")
-        print(f"   URL: {url}")
-        print(f"   Comments: {len(comments)}")
-        print()
-        
-        # -------------------------------------------------------------------------
-        # STEP 2: Generate Audio + Subtitles (Question > Answer Flow)
-        # -------------------------------------------------------------------------
-        print("📋 Step 2/6: Generating audio with flow-based subtitles...")
-        print("   Flow: Question first → Answers with pauses")
-        
-        # Try edge-tts first, fallback to gTTS if it fails
-        result = generate_audio_with_flow_sync(
+    print(f"✅ Post selected ({job_label(job)}):")
+    print(f"   Subreddit: r/{post_data['subreddit']}")
+    print(f"   Title: {post_data['title']}")
+    print(f"   URL: {post_data['url']}")
+    print(f"   Comments: {len(job['comments'])}")
+    print()
+    return True
+
+
+async def audio_stage(job: dict) -> bool:
+    """
+    STEP 2: Audio + subtitles (question > answer flow).
+    edge-tts runs on the caller's event loop; blocking steps use the executor.
+    """
+    loop = asyncio.get_running_loop()
+    title = job['post_data']['title']
+    comments = job['comments']
+    files = job['files']
+
+    # Try edge-tts first, fallback to gTTS if it fails
+    from subtitle_generator_v2 import generate_audio_with_flow
+    result = await generate_audio_with_flow(
+        title=title,
+        comments=comments,
+        audio_file=files['audio'],
+        subtitle_file=files['subtitles'],
+        voice=VOICE,
+        rate=AUDIO_RATE,
+        pause_between=PAUSE_BETWEEN
+    )
+    engine = "edge"
+
+    if not result:
+        print("⚠️  edge-tts failed, trying fallback gTTS...")
+        from subtitle_generator_v3 import generate_audio_with_flow_gtts
+        result = await loop.run_in_executor(None, functools.partial(
+            generate_audio_with_flow_gtts,
             title=title,
             comments=comments,
-            audio_file="narration.mp3",
-            subtitle_file="subtitles.srt",
+            audio_file=files['audio'],
+            subtitle_file=files['subtitles'],
+            lang="en",
+            pause_between=GTTS_PAUSE_BETWEEN
+        ))
+        engine = "gtts"
+
+    if not result:
+        print("❌ Failed to generate audio/subtitles with both methods")
+        return False
+
+    job['audio_file'], job['subtitle_file'] = result
+    print(f"✅ Audio ready: {job['audio_file']}")
+    print(f"✅ Subtitles ready: {job['subtitle_file']}")
+    print()
+
+    # Ses süresini al (arka plan için)
+    from ffmpeg_composer_v2 import get_video_duration
+    audio_duration = await loop.run_in_executor(None, get_video_duration, job['audio_file'])
+    if audio_duration:
+        print(f"   Audio duration: {audio_duration:.1f}s")
+        # Süre tahmincisini bu ölçümle kalibre et
+        await loop.run_in_executor(None, functools.partial(
+            record_narration_duration,
+            title, comments, audio_duration,
             voice=VOICE,
             rate=AUDIO_RATE,
-            pause_between=0.8  # Soru-cevap arası 0.8s duraklama
-        )
-        
-        if not result:
-            print("⚠️  edge-tts failed, trying fallback gTTS...")
-            result = generate_audio_with_flow_gtts(
-                title=title,
-                comments=comments,
-                audio_file="narration.mp3",
-                subtitle_file="subtitles.srt",
-                lang="en",
-                pause_between=1.0
-            )
-        
-        if not result:
-            print("❌ Failed to generate audio/subtitles with both methods")
-            sys.exit(1)
-        
-        audio_file, subtitle_file = result
-        print(f"✅ Audio ready: {audio_file}")
-        print(f"✅ Subtitles ready: {subtitle_file}")
-        print()
-        
-        # Ses süresini al (arka plan için)
-        from ffmpeg_composer_v2 import get_video_duration
-        audio_duration = get_video_duration(audio_file)
-        if audio_duration:
-            print(f"   Audio duration: {audio_duration:.1f}s")
-        else:
-            audio_duration = 60  # Varsayılan
-        
-        # -------------------------------------------------------------------------
-        # STEP 3: Dynamic Background Video (Different Every Time!)
-        # -------------------------------------------------------------------------
-        print()
-        print("📋 Step 3/6: Downloading dynamic background video...")
-        print("   🔄 Each run gets a DIFFERENT video!")
-        
-        background_video = get_background_for_duration(
-            target_duration=audio_duration,
-            output_file="background.mp4"
-        )
-        
-        if not background_video:
-            print("❌ Failed to download background video")
-            sys.exit(1)
-        
-        print(f"✅ Background ready: {background_video}")
-        print()
-        
-        # -------------------------------------------------------------------------
-        # STEP 4: Create Reddit Frame (With Transparent Text Area)
-        # -------------------------------------------------------------------------
-        print("📋 Step 4/6: Creating Reddit frame...")
-        print("   Frame has TRANSPARENT area for subtitles")
-        
-        reddit_frame = create_frame_for_post(
-            post_data=post_data,
-            output_file="reddit_frame.png"
-        )
-        
-        if not reddit_frame:
-            print("❌ Failed to create Reddit frame")
-            sys.exit(1)
-        
-        print(f"✅ Frame ready: {reddit_frame}")
-        print()
-        
-        # -------------------------------------------------------------------------
-        # STEP 5: Compose Final Video (4-Layer Architecture)
-        # -------------------------------------------------------------------------
-        print("📋 Step 5/6: Composing final video...")
-        print("   Architecture:")
-        print("   Layer 1: Background video (dynamic)")
-        print("   Layer 2: Reddit frame (transparent text area)")
-        print("   Layer 3: Burned subtitles (karaoke style)")
-        print("   Layer 4: Audio track (synced)")
-        print()
-        
-        final_video = compose_video_v2(
-            background_video=background_video,
-            reddit_frame=reddit_frame,
-            subtitle_file=subtitle_file,
-            audio_file=audio_file,
-            output_file="final_short.mp4",
-            subtitle_style={
-                'font': 'Arial',
-                'font_size': 36,
-                'primary_color': '&H00FFFFFF',  # White
-                'outline_color': '&H00000000',  # Black outline
-                'outline': 3,
-                'shadow': 2,
-                'bold': 1,
-                'alignment': 2,  # Bottom center
-                'margin_v': 200  # 200px from bottom
-            }
-        )
-        
-        if not final_video:
-            print("❌ Failed to compose final video")
-            sys.exit(1)
-        
-        print(f"✅ Final video ready: {final_video}")
-        print()
-        
-        # -------------------------------------------------------------------------
-        # STEP 6: Upload to YouTube
-        # -------------------------------------------------------------------------
-        print("📋 Step 6/6: Uploading to YouTube...")
-        
-        # Build metadata
-        video_title = f"{VIDEO_TITLE_PREFIX}{title[:80]}"  # 100 char limit
-        
-        # Description with hashtags
-        video_description = (
-            f"{title}\n\n"
-            f"From r/{SUBREDDIT}\n\n"
-            f"Top comments:\n"
-        )
-        
-        for i, comment in enumerate(comments[:3], 1):
-            author = comment.get('author', 'unknown')
-            body = comment.get('body', '')[:100]
-            video_description += f"{i}. u/{author}: {body}...\n"
-        
-        video_description += "\n" + " ".join(VIDEO_HASHTAGS)
-        
+            pause_between=PAUSE_BETWEEN if engine == "edge" else GTTS_PAUSE_BETWEEN,
+            engine=engine
+        ))
+    else:
+        audio_duration = 60  # Varsayılan
+    job['audio_duration'] = audio_duration
+    job['tts_engine'] = engine
+    return True
+
+
+def background_search_stage(job: dict) -> bool:
+    """
+    STEP 3a: Pexels search (independent of audio, starts immediately).
+    """
+    from background_library import get_background_library
+    from pexels_dynamic import search_background_videos
+    search_result = search_background_videos()
+    if not search_result:
+        # Yerel kütüphanede klip varsa arka plan yine de bulunabilir
+        if not len(get_background_library()):
+            print("❌ Background video search failed")
+            return False
+        print("⚠️  Background search failed, using the local library")
+
+    job['background_search'] = search_result
+    return True
+
+
+def background_stage(job: dict) -> bool:
+    """
+    STEP 3b: Dynamic background video, downloaded speculatively for the
+    predicted narration length (TTS does not need to finish first).
+    """
+    predicted = predict_narration_duration(
+        job['post_data']['title'],
+        job['comments'],
+        voice=VOICE,
+        rate=AUDIO_RATE,
+        pause_between=PAUSE_BETWEEN
+    )
+    print(f"🔮 Predicted narration duration: {predicted:.1f}s")
+
+    from pexels_dynamic import get_background_for_duration
+    background_video = get_background_for_duration(
+        target_duration=predicted,
+        output_file=job['files']['background'],
+        search_result=job.get('background_search')
+    )
+
+    if not background_video:
+        print("❌ Failed to download background video")
+        return False
+
+    job['background_video'] = background_video
+    job['predicted_duration'] = predicted
+    print(f"✅ Background ready: {background_video}")
+    print()
+    return True
+
+
+def background_verify_stage(job: dict) -> bool:
+    """
+    STEP 3c: Checks the speculative background against the real narration
+    and downloads a new one only if the prediction missed. The result goes to
+    job['background_final']; a replacement is written to its own file so the
+    background stage's recorded output stays valid on resume.
+    """
+    from ffmpeg_composer_v2 import get_video_duration
+    from pexels_dynamic import get_background_for_duration
+
+    actual = job['audio_duration']
+    error = actual - job['predicted_duration']
+    clip_duration = get_video_duration(job['background_video']) or 0
+
+    # Arka plan sesten kısaysa -shortest anlatımı keser
+    if abs(error) <= DURATION_TOLERANCE and clip_duration >= actual:
+        print(f"✅ Speculative background kept (prediction error {error:+.1f}s)")
+        job['background_final'] = job['background_video']
+        return True
+
+    print(f"🔁 Prediction missed by {error:+.1f}s (clip {clip_duration:.1f}s), re-downloading background...")
+    background_video = get_background_for_duration(
+        target_duration=actual,
+        output_file=job['files']['background_final'],
+        search_result=job.get('background_search')
+    )
+
+    if not background_video:
+        print("❌ Failed to download background video")
+        return False
+
+    job['background_final'] = background_video
+    print(f"✅ Background ready: {background_video}")
+    print()
+    return True
+
+
+def frame_stage(job: dict) -> bool:
+    """
+    STEP 4: Reddit frame (transparent text area).
+    """
+    from reddit_frame_creator import create_frame_for_post
+    reddit_frame = create_frame_for_post(
+        post_data=job['post_data'],
+        output_file=job['files']['frame']
+    )
+
+    if not reddit_frame:
+        print("❌ Failed to create Reddit frame")
+        return False
+
+    job['reddit_frame'] = reddit_frame
+    print(f"✅ Frame ready: {reddit_frame}")
+    print()
+    return True
+
+
+def compose_stage(job: dict) -> bool:
+    """
+    STEP 5: Compose final video (4-layer architecture).
+    """
+    from ffmpeg_composer_v2 import compose_video_v2
+    final_video = compose_video_v2(
+        background_video=job['background_final'],
+        reddit_frame=job['reddit_frame'],
+        subtitle_file=job['subtitle_file'],
+        audio_file=job['audio_file'],
+        output_file=job['files']['final'],
+        subtitle_style=SUBTITLE_STYLE
+    )
+
+    if not final_video:
+        print("❌ Failed to compose final video")
+        return False
+
+    # Bitmiş videoyu çalışma dizininden atomik olarak yayınla
+    final_video = job['workspace'].publish(
+        OUTPUT_FILES['final'],
+        os.path.join(RENDERS_DIR, f"{job['post_data']['id']}.mp4")
+    )
+    job['final_video'] = final_video
+    print(f"✅ Final video ready: {final_video}")
+    print()
+    return True
+
+
+def build_video_metadata(post_data: dict, comments: list[dict]) -> tuple[str, str]:
+    """
+    Builds the YouTube title and description for a post.
+
+    Returns:
+        (video_title, video_description)
+    """
+    title = post_data['title']
+    video_title = f"{VIDEO_TITLE_PREFIX}{title[:80]}"  # 100 char limit
+
+    # Description with hashtags
+    video_description = (
+        f"{title}\n\n"
+        f"From r/{post_data.get('subreddit', SUBREDDITS[0])}\n\n"
+        f"Top comments:\n"
+    )
+
+    for i, comment in enumerate(comments[:3], 1):
+        author = comment.get('author', 'unknown')
+        body = comment.get('body', '')[:100]
+        video_description += f"{i}. u/{author}: {body}...\n"
+
+    video_description += "\n" + " ".join(VIDEO_HASHTAGS)
+    return video_title, video_description
+
+
+def upload_stage(job: dict) -> bool:
+    """
+    STEP 6: Upload to YouTube (or save for manual upload on quota).
+    """
+    post_id = job['post_data']['id']
+    final_video = job['final_video']
+    video_title, video_description = build_video_metadata(job['post_data'], job['comments'])
+
+    import youtube_uploader
+    with _youtube_lock:
         # Authenticate YouTube
-        youtube_service = youtube_uploader.get_authenticated_service()
+        youtube_service = get_youtube_service()
         if not youtube_service:
             print("❌ YouTube authentication failed")
-            sys.exit(1)
-        
-        # Upload
+            return False
+
+        # Upload (paylaşılan httplib2 bağlantısı: aynı anda tek yükleme)
         upload_result = youtube_uploader.upload_video(
             youtube_service=youtube_service,
             file_path=final_video,
@@ -236,50 +500,387 @@ def main():
             description=video_description,
             tags=VIDEO_TAGS
         )
-        
-        if upload_result == "quota_exceeded":
-            print()
-            print("⚠️  YouTube quota exceeded!")
-            print("   Video saved for manual upload:")
-            print(f"   {final_video}")
-            
-            # Save for manual upload
-            youtube_uploader.save_video_for_manual_upload(
-                video_path=final_video,
-                title=video_title,
-                description=video_description,
-                tags=VIDEO_TAGS,
-                post_id=post_id
-            )
-            
-            # Mark post as used anyway
-            from reddit_scraper import mark_post_as_used
-            mark_post_as_used(post_id)
-            
-        elif upload_result:
-            print()
-            print("🎉 SUCCESS! Video uploaded to YouTube!")
-            print(f"   Title: {video_title}")
-            print(f"   Post ID: {post_id}")
-            
-            # Mark post as used
-            from reddit_fetcher import mark_post_as_used
-            mark_post_as_used(post_id)
-            
+
+    if upload_result == "quota_exceeded":
+        print()
+        print("⚠️  YouTube quota exceeded!")
+        print("   Video saved for manual upload:")
+        print(f"   {final_video}")
+
+        # Save for manual upload
+        youtube_uploader.save_video_for_manual_upload(
+            video_path=final_video,
+            title=video_title,
+            description=video_description,
+            tags=VIDEO_TAGS,
+            post_id=post_id
+        )
+
+        # Mark post as used anyway
+        from reddit_fetcher import mark_post_as_used
+        from used_post_store import OUTCOME_QUOTA_SAVED
+        mark_post_as_used(post_id, job['post_data'].get('subreddit'), outcome=OUTCOME_QUOTA_SAVED,
+                          post_data=job['post_data'])
+
+    elif upload_result:
+        print()
+        print("🎉 SUCCESS! Video uploaded to YouTube!")
+        print(f"   Title: {video_title}")
+        print(f"   Post ID: {post_id}")
+
+        # Mark post as used
+        from reddit_fetcher import mark_post_as_used
+        mark_post_as_used(post_id, job['post_data'].get('subreddit'), post_data=job['post_data'])
+
+    else:
+        print("❌ Upload failed")
+        return False
+
+    job['upload_result'] = upload_result
+    return True
+
+
+def finish_batch_job(job: dict):
+    """
+    Removes a finished batch job's workspace and rendered video.
+    (Kota durumunda video zaten pending_uploads/ altına kopyalandı.)
+    """
+    job['manifest'].mark_finished()
+    job['workspace'].cleanup(success=True)
+    final_video = job.get('final_video')
+    if final_video and os.path.exists(final_video):
+        os.remove(final_video)
+
+
+def return_candidate(job: dict, permanent: bool = False):
+    """
+    Gives a failed job's pool candidate back at once (retryable failure) or
+    drops it (permanent failure) instead of leaving it claimed until
+    candidate_pool.CLAIM_TIMEOUT. Posts fetched from Reddit are not in the
+    pool, so this is a no-op for them.
+    """
+    post_data = job.get('post_data')
+    if not USE_CANDIDATE_POOL or not post_data:
+        return
+    from candidate_pool import get_candidate_pool
+    pool = get_candidate_pool()
+    if permanent:
+        pool.remove(post_data['id'])
+    elif pool.release(post_data['id']):
+        _claimed_post_ids.discard(post_data['id'])
+
+
+def fail_batch_job(job: dict):
+    """
+    Applies the workspace cleanup rules to a failed or skipped batch job
+    and returns its pool candidate.
+    (Post seçilmeden düşen işlerin dizininde incelenecek bir şey yok.)
+    """
+    return_candidate(job)
+    job['workspace'].cleanup(success=job['post_data'] is None)
+
+
+# Aşama tanımları (manifest için):
+#   requires: sonucu etkileyen önceki aşamalar
+#   params:   aşamanın ayarları (değişirse aşama yeniden çalışır)
+#   outputs:  job içindeki dosya yolu alanları (içerik özeti tutulur)
+#   state:    devam ederken geri yüklenecek diğer job alanları
+STAGE_SPECS = {
+    'fetch': {
+        'func': fetch_post_stage,
+        'requires': [],
+        'params': lambda job: {'subreddits': SUBREDDITS, 'weights': SUBREDDIT_WEIGHTS,
+                               'quotas': SUBREDDIT_QUOTAS, 'max_comments': MAX_COMMENTS,
+                               'topic': job.get('topic')},
+        'outputs': [],
+        'state': ['post_data', 'comments'],
+    },
+    'audio': {
+        'func': audio_stage,
+        'requires': ['fetch'],
+        'params': lambda job: {'voice': VOICE, 'rate': AUDIO_RATE},
+        'outputs': ['audio_file', 'subtitle_file'],
+        'state': ['audio_duration'],
+    },
+    'background_search': {
+        'func': background_search_stage,
+        'requires': [],
+        'params': lambda job: {},
+        'outputs': [],
+        'state': ['background_search'],
+    },
+    'background': {
+        'func': background_stage,
+        'requires': ['fetch', 'background_search'],
+        'params': lambda job: {'voice': VOICE, 'rate': AUDIO_RATE},
+        'outputs': ['background_video'],
+        'state': ['predicted_duration'],
+    },
+    'background_verify': {
+        'func': background_verify_stage,
+        'requires': ['audio', 'background'],
+        'params': lambda job: {'tolerance': DURATION_TOLERANCE},
+        'outputs': ['background_final'],
+        'state': [],
+    },
+    'frame': {
+        'func': frame_stage,
+        'requires': ['fetch'],
+        'params': lambda job: {},
+        'outputs': ['reddit_frame'],
+        'state': [],
+    },
+    'compose': {
+        'func': compose_stage,
+        'requires': ['audio', 'background_verify', 'frame'],
+        'params': lambda job: {'style': SUBTITLE_STYLE},
+        'outputs': ['final_video'],
+        'state': [],
+    },
+    'upload': {
+        'func': upload_stage,
+        'requires': ['compose'],
+        'params': lambda job: {'title_prefix': VIDEO_TITLE_PREFIX, 'tags': VIDEO_TAGS},
+        'outputs': [],
+        'state': ['upload_result'],
+    },
+}
+
+
+def _stage_inputs(job: dict, name: str) -> dict:
+    spec = STAGE_SPECS[name]
+    return {
+        'params': spec['params'](job),
+        'upstream': {dep: job['manifest'].stage_digest(dep) for dep in spec['requires']},
+    }
+
+
+def _restore_stage(job: dict, name: str, inputs: dict) -> bool:
+    """Restores a stage from the manifest if it is still valid."""
+    manifest = job['manifest']
+    if not manifest.is_valid(name, inputs):
+        return False
+
+    manifest.restore(name, job)
+    if job.get('post_data'):
+        _claimed_post_ids.add(job['post_data']['id'])
+    print(f"⏭️  Stage '{name}' already done (manifest), skipping")
+    print()
+    return True
+
+
+def _record_stage(job: dict, name: str, inputs: dict):
+    spec = STAGE_SPECS[name]
+    job['manifest'].record(
+        name,
+        inputs,
+        outputs={key: job[key] for key in spec['outputs']},
+        state={key: job.get(key) for key in spec['state']}
+    )
+
+
+def run_stage(job: dict, name: str) -> bool:
+    """
+    Runs one stage through the job manifest: skipped if its recorded
+    outputs are still valid for the same inputs, recorded after success.
+    """
+    func = STAGE_SPECS[name]['func']
+    inputs = _stage_inputs(job, name)
+    if _restore_stage(job, name, inputs):
+        return True
+
+    with span(name, "stage", job=job_label(job)):
+        if asyncio.iscoroutinefunction(func):
+            ok = asyncio.run(func(job))
+        else:
+            ok = func(job)
+    if not ok:
+        return False
+
+    with span("manifest_record", "io", stage=name):
+        _record_stage(job, name, inputs)
+    return True
+
+
+async def run_stage_async(job: dict, name: str) -> bool:
+    """
+    Event-loop version of run_stage: coroutine stages are awaited,
+    blocking ones run in the default executor.
+    """
+    loop = asyncio.get_running_loop()
+    func = STAGE_SPECS[name]['func']
+    inputs = _stage_inputs(job, name)
+    if await loop.run_in_executor(None, _restore_stage, job, name, inputs):
+        return True
+
+    if asyncio.iscoroutinefunction(func):
+        with span(name, "stage", job=job_label(job)):
+            ok = await func(job)
+    else:
+        ok = await loop.run_in_executor(None, _traced_call, name, func, job)
+    if not ok:
+        return False
+
+    await loop.run_in_executor(None, _record_stage, job, name, inputs)
+    return True
+
+
+def _traced_call(name: str, func, job: dict) -> bool:
+    # Executor thread'inde çalışır: CPU süresi o thread'e ait olsun
+    with span(name, "stage", job=job_label(job)):
+        return func(job)
+
+
+def seed_post_stage(job: dict, post_data: dict) -> bool:
+    """
+    Completes the fetch stage with a post that was selected elsewhere
+    (e.g. by the job queue), so Reddit is not queried again.
+    """
+    inputs = _stage_inputs(job, 'fetch')
+    if _restore_stage(job, 'fetch', inputs):
+        return True
+
+    job['post_data'] = post_data
+    job['comments'] = post_data.get('comments', [])[:MAX_COMMENTS]
+    _claimed_post_ids.add(post_data['id'])
+    _record_stage(job, 'fetch', inputs)
+    return True
+
+
+def stage_runner(name: str):
+    """Returns a stage(job) -> bool callable that goes through run_stage."""
+    def runner(job: dict) -> bool:
+        return run_stage(job, name)
+    runner.__name__ = name
+    return runner
+
+
+# Toplu mod için aşama grupları: her grup kendi iş parçacığında çalışır,
+# böylece k. iş montajdayken k+1 seslendiriliyor, k+2 post ve arka planını çekiyor olur.
+BATCH_STAGE_GROUPS = [
+    ("fetch+background", [stage_runner('fetch'), stage_runner('background_search'),
+                          stage_runner('background')]),
+    ("audio+frame", [stage_runner('audio'), stage_runner('frame'),
+                     stage_runner('background_verify')]),
+    ("compose", [stage_runner('compose')]),
+    ("upload", [stage_runner('upload')]),
+]
+
+
+def abort_job(job: dict):
+    """Applies the workspace cleanup rules and exits with an error."""
+    job['workspace'].cleanup(success=False)
+    sys.exit(1)
+
+
+def run_single(use_tmpfs: bool = False, resume: bool = True, topic: str | None = None):
+    """
+    Runs the pipeline once as a stage DAG on a single event loop.
+    An unfinished job left by a failed or killed run is continued from its
+    last valid stage unless resume=False; a job that already ran
+    MAX_RESUME_ATTEMPTS times is given up instead.
+    """
+    resume_path = find_unfinished_workspace() if resume else None
+    job = new_job(use_tmpfs=use_tmpfs, resume_path=resume_path, topic=topic)
+    attempt = job['manifest'].start_attempt()
+    if resume_path:
+        done = ", ".join(job['manifest'].completed_stages())
+        print(f"♻️  Resuming unfinished job: {resume_path} (attempt {attempt}/{MAX_RESUME_ATTEMPTS})")
+        print(f"   Recorded stages: {done}")
+    else:
+        print(f"📁 Workspace: {job['workspace'].path}")
+    print()
+
+    print("📋 Running stage graph:")
+    print("   fetch → audio ─┐")
+    print("   fetch → background (predicted duration) → verify → compose → upload")
+    print("   fetch → frame ─┘   (background search starts immediately)")
+    print()
+
+    if not run_dag_sync(job, STAGE_SPECS, run_stage_async):
+        print(f"❌ Pipeline failed at stage: {job.get('failed_stage')}")
+        # Son denemede iş bırakılır (devam edilmez): aday da kalıcı olarak düşer
+        return_candidate(job, permanent=attempt >= MAX_RESUME_ATTEMPTS)
+        abort_job(job)
+
+    job['manifest'].mark_finished()
+    job['workspace'].cleanup(success=True)
+
+
+def run_batch(
+    count: int,
+    queue_size: int = BATCH_QUEUE_SIZE,
+    use_tmpfs: bool = False,
+    topic: str | None = None
+):
+    """
+    Renders `count` shorts with the stage-pipelined scheduler.
+    """
+    from batch_pipeline import run_pipeline
+
+    print(f"📦 Batch mode: {count} shorts, queue size {queue_size}")
+    print()
+
+    jobs = (new_job(i, use_tmpfs=use_tmpfs, topic=topic) for i in range(1, count + 1))
+    report = run_pipeline(
+        jobs,
+        BATCH_STAGE_GROUPS,
+        queue_size=queue_size,
+        on_complete=finish_batch_job,
+        on_failed=fail_batch_job
+    )
+
+    if report['completed'] == 0:
+        print("❌ No shorts were produced")
+        sys.exit(1)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Reddit-to-YouTube Shorts Bot V4")
+    parser.add_argument("--count", type=int, default=1,
+                        help="Number of shorts to render in this run (batch mode if > 1)")
+    parser.add_argument("--queue-size", type=int, default=BATCH_QUEUE_SIZE,
+                        help="Max jobs waiting between two pipeline stages")
+    parser.add_argument("--tmpfs", action="store_true",
+                        help="Create job workspaces on /dev/shm (RAM) when available")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Do not resume an unfinished job from a previous run")
+    parser.add_argument("--trace", metavar="PREFIX",
+                        help="Record spans to PREFIX.trace.json (Chrome trace) and PREFIX.jsonl")
+    parser.add_argument("--topic",
+                        help="Only pick pool candidates about this topic, e.g. \"haunted, ghost\" "
+                             "(comma = OR, words = AND)")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    args = parse_args(argv)
+    if args.trace:
+        enable_tracing(args.trace)
+
+    print("=" * 70)
+    print("🤖 Reddit-to-YouTube Shorts Bot V4 (Advanced Architecture)")
+    print("=" * 70)
+    print()
+
+    try:
+        prune_stale_workspaces()
+
+        if args.count > 1:
+            run_batch(args.count, queue_size=args.queue_size, use_tmpfs=args.tmpfs, topic=args.topic)
         else:
-            print("❌ Upload failed")
-            sys.exit(1)
-        
+            run_single(use_tmpfs=args.tmpfs, resume=not args.fresh, topic=args.topic)
+
         print()
         print("=" * 70)
         print("✅ Bot completed successfully!")
         print("=" * 70)
-        
+
     except KeyboardInterrupt:
         print()
         print("⚠️  Bot interrupted by user")
         sys.exit(1)
-        
+
     except Exception as e:
         print()
         print(f"❌ Unexpected error: {e}")
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+near_duplicate_index.py
+Kullanılmış postlar için yakın-kopya (repost) indeksi (SimHash + bantlı arama)
+
+AskReddit aynı soruyu farklı post ID'leriyle sürekli tekrar yayınlar;
+ID kontrolü (used_post_store) bunları yakalayamaz. Bu indeks kullanılan
+her postun başlığından ve en iyi yorumlarından 64 bit SimHash parmak izi
+çıkarır ve used_posts.db içinde (used_posts tablosunun yanında) saklar.
+
+- Normalleştirme: küçük harf, kısaltmalar açılır ("what's" → "what"),
+  dolgu kelimeleri atılır, basit ek kırpma ("received" → "receiv")
+- Özellikler: kelimeler + ardışık kelime çiftleri
+- 64 bit 4 banda (16 bit) bölünür: Hamming mesafesi ≤ 3 olan her parmak
+  izi en az bir bantta birebir eşleşir (güvercin yuvası), bu yüzden arama
+  tek bir indeksli IN (...) sorgusudur ve geçmiş büyüdükçe yavaşlamaz
+- Süresi dolan (TTL) kullanılmış postların parmak izleri dikkate alınmaz
+
+GitHub Actions yalnızca metin dosyalarını git'te tuttuğu için parmak
+izleri used_fingerprints.txt dosyasına dışa aktarılır ve yeni veritabanı
+bu dosyadan doldurulur.
+
+Kullanım:
+    python near_duplicate_index.py check "What's the best advice you've ever received?"
+    python near_duplicate_index.py export used_fingerprints.txt
+    python near_duplicate_index.py import used_fingerprints.txt
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import threading
+import time
+
+from job_workspace import atomic_output
+from used_post_store import UsedPostStore, get_used_store, USED_POSTS_DB
+
+FINGERPRINTS_TXT = "used_fingerprints.txt"
+SIMHASH_BITS = 64
+BANDS = 4
+BAND_BITS = SIMHASH_BITS // BANDS
+MAX_DISTANCE = BANDS - 1  # Bantlı aramanın kesin yakaladığı en büyük mesafe
+DUPLICATE_COMMENTS = 3  # Parmak izine giren en iyi yorum sayısı
+MIN_TOKENS = 2  # Daha kısa metinler parmak izi almaz (yanlış pozitif)
+
+KIND_TITLE = "title"
+KIND_COMMENTS = "comments"
+KIND_CODES = {KIND_TITLE: 0, KIND_COMMENTS: 1}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+CONTRACTIONS = (
+    ("n't", " not"), ("'re", " are"), ("'ve", " have"), ("'ll", " will"),
+    ("'d", " would"), ("'m", " am"), ("'s", ""),
+)
+STOP_WORDS = frozenset("""
+    a an the is are was were be been am not will would can could should
+    of to in on at by with from about for and or so if as than then just
+    i me my we our you your yours they their it its this that there here
+    what whats which who whom how when where why do does did have has had
+    get got gotten ever any some one all reddit
+""".split())
+SUFFIXES = ("ing", "ed", "es", "s")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprint_bands (
+    band_key INTEGER NOT NULL,           -- tür << 18 | bant << 16 | bant değeri
+    post_id TEXT NOT NULL,
+    simhash INTEGER NOT NULL,            -- işaretli 64 bit
+    PRIMARY KEY (band_key, post_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_fingerprint_bands_post ON fingerprint_bands (post_id);
+"""
+
+
+def normalize_tokens(text: str) -> list[str]:
+    """Lower-cased content words with contractions and suffixes removed."""
+    text = text.lower().replace("’", "'")
+    for contraction, expansion in CONTRACTIONS:
+        text = text.replace(contraction, expansion)
+
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text):
+        if token in STOP_WORDS:
+            continue
+        for suffix in SUFFIXES:
+            if len(token) > len(suffix) + 2 and token.endswith(suffix):
+                token = token[:-len(suffix)]
+                break
+        tokens.append(token)
+    return tokens
+
+
+def simhash(text: str) -> int | None:
+    """
+    64-bit SimHash of the normalized words and word pairs
+    (None if the text has fewer than MIN_TOKENS content words).
+    """
+    tokens = normalize_tokens(text)
+    if len(tokens) < MIN_TOKENS:
+        return None
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    import numpy as np
+
+    # Her özellik için 8 baytlık hash; bit başına oy tek NumPy geçişinde
+    digests = b"".join(hashlib.blake2b(f.encode(), digest_size=8).digest() for f in features)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    votes = bits.sum(axis=0, dtype=np.int32) * 2 > len(features)
+    return int.from_bytes(np.packbits(votes, bitorder='little').tobytes(), 'little')
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def band_keys(kind: str, fingerprint: int) -> list[int]:
+    code = KIND_CODES[kind]
+    mask = (1 << BAND_BITS) - 1
+    return [
+        (code << 18) | (band << 16) | ((fingerprint >> (band * BAND_BITS)) & mask)
+        for band in range(BANDS)
+    ]
+
+
+def _to_signed(value: int) -> int:
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def post_fingerprints(post: dict) -> dict:
+    """
+    Fingerprints of a post_data dictionary (or a listing snapshot without
+    comments): {kind: simhash}.
+    """
+    fingerprints = {}
+    title = simhash(post.get('title', ''))
+    if title is not None:
+        fingerprints[KIND_TITLE] = title
+    comments = post.get('comments') or []
+    if comments:
+        text = " ".join(c.get('body', '') for c in comments[:DUPLICATE_COMMENTS])
+        fingerprint = simhash(text)
+        if fingerprint is not None:
+            fingerprints[KIND_COMMENTS] = fingerprint
+    return fingerprints
+
+
+class NearDuplicateIndex:
+    """
+    SimHash index stored in the used-post store's database (shares its
+    per-thread connections).
+    """
+
+    def __init__(self, store: UsedPostStore, max_distance: int = MAX_DISTANCE):
+        if max_distance > MAX_DISTANCE:
+            raise ValueError(f"max_distance > {MAX_DISTANCE} is not covered by {BANDS} bands")
+        self.store = store
+        self.max_distance = max_distance
+        self.store.connection().executescript(SCHEMA)
+
+    def add(self, post: dict) -> int:
+        """
+        Records the fingerprints of a used post. Returns how many were stored.
+        """
+        fingerprints = post_fingerprints(post)
+        rows = [
+            (key, post['id'], _to_signed(fingerprint))
+            for kind, fingerprint in fingerprints.items()
+            for key in band_keys(kind, fingerprint)
+        ]
+        self.store.connection().executemany(
+            "INSERT OR REPLACE INTO fingerprint_bands (band_key, post_id, simhash) VALUES (?, ?, ?)",
+            rows
+        )
+        return len(fingerprints)
+
+    def find_duplicate(self, post: dict) -> dict | None:
+        """
+        Looks for a used post whose title or top comments are within
+        max_distance bits of this post's. The post itself never matches.
+
+        Returns:
+            {'post_id', 'kind', 'distance'} of the closest match, or None
+        """
+        best = None
+        conn = self.store.connection()
+        now = time.time()
+        for kind, fingerprint in post_fingerprints(post).items():
+            keys = band_keys(kind, fingerprint)
+            rows = conn.execute(
+                "SELECT b.post_id, b.simhash FROM fingerprint_bands b "
+                "JOIN used_posts u ON u.post_id = b.post_id "
+                f"WHERE b.band_key IN ({','.join('?' * len(keys))}) "
+                "AND (u.expires_at IS NULL OR u.expires_at > ?)",
+                (*keys, now)
+            )
+            for post_id, stored in rows:
+                if post_id == post.get('id'):
+                    continue
+                distance = hamming(fingerprint, _to_unsigned(stored))
+                if distance <= self.max_distance and (best is None or distance < best['distance']):
+                    best = {'post_id': post_id, 'kind': kind, 'distance': distance}
+        return best
+
+    def is_duplicate(self, post: dict) -> bool:
+        return self.find_duplicate(post) is not None
+
+    def purge(self) -> int:
+        """Deletes fingerprints whose post is no longer in used_posts."""
+        return self.store.connection().execute(
+            "DELETE FROM fingerprint_bands WHERE post_id NOT IN (SELECT post_id FROM used_posts)"
+        ).rowcount
+
+    def __len__(self) -> int:
+        return self.store.connection().execute(
+            "SELECT COUNT(DISTINCT post_id) FROM fingerprint_bands"
+        ).fetchone()[0]
+
+    def import_text(self, path: str = FINGERPRINTS_TXT) -> int:
+        """
+        Imports "post_id kind hex" lines. Returns the number of fingerprints.
+        """
+        if not os.path.exists(path):
+            return 0
+        rows = []
+        count = 0
+        with open(path, 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) != 3 or line.startswith('#') or parts[1] not in KIND_CODES:
+                    continue
+                post_id, kind, value = parts
+                fingerprint = int(value, 16)
+                rows.extend((key, post_id, _to_signed(fingerprint)) for key in band_keys(kind, fingerprint))
+                count += 1
+
+        conn = self.store.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO fingerprint_bands (band_key, post_id, simhash) VALUES (?, ?, ?)",
+                rows
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def export_text(self, path: str = FINGERPRINTS_TXT) -> int:
+        """
+        Writes one "post_id kind hex" line per fingerprint of an unexpired
+        used post (oldest first). Returns the number written.
+        """
+        rows = self.store.connection().execute(
+            "SELECT b.post_id, b.band_key >> 18, b.simhash FROM fingerprint_bands b "
+            "JOIN used_posts u ON u.post_id = b.post_id "
+            "WHERE (b.band_key >> 16) & 3 = 0 AND (u.expires_at IS NULL OR u.expires_at > ?) "
+            "ORDER BY u.used_at, b.post_id, b.band_key",
+            (time.time(),)
+        ).fetchall()
+        kinds = {code: kind for kind, code in KIND_CODES.items()}
+        with atomic_output(path) as tmp:
+            with open(tmp, 'w') as f:
+                f.write("# SimHash fingerprints of used posts (near_duplicate_index.py)\n")
+                for post_id, code, value in rows:
+                    f.write(f"{post_id} {kinds[code]} {_to_unsigned(value):016x}\n")
+        return len(rows)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_duplicate_index(path: str | None = None, legacy_text: str = FINGERPRINTS_TXT) -> NearDuplicateIndex:
+    """
+    Returns the shared index on the shared used-post store. An empty index
+    is seeded from used_fingerprints.txt (fresh CI runner).
+    """
+    global _index
+    store = get_used_store(path)
+    with _index_lock:
+        if _index is None or _index.store is not store:
+            _index = NearDuplicateIndex(store)
+            if len(_index) == 0 and os.path.exists(legacy_text):
+                imported = _index.import_text(legacy_text)
+                print(f"📥 Imported {imported} fingerprints from {legacy_text}")
+        return _index
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Near-duplicate index of used posts")
+    parser.add_argument("--db", default=USED_POSTS_DB)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_check = sub.add_parser("check", help="Look up the closest used post for a title")
+    p_check.add_argument("title")
+
+    p_import = sub.add_parser("import", help="Import fingerprints from a text file")
+    p_import.add_argument("path", nargs="?", default=FINGERPRINTS_TXT)
+
+    p_export = sub.add_parser("export", help="Write fingerprints to a text file")
+    p_export.add_argument("path", nargs="?", default=FINGERPRINTS_TXT)
+
+    sub.add_parser("purge", help="Delete fingerprints of posts no longer marked as used")
+
+    args = parser.parse_args(argv)
+    index = NearDuplicateIndex(UsedPostStore(args.db))
+
+    if args.command == "check":
+        match = index.find_duplicate({'id': None, 'title': args.title})
+        if match:
+            print(f"🔁 Near-duplicate of {match['post_id']} ({match['kind']}, distance {match['distance']})")
+        else:
+            print("✅ No near-duplicate found")
+    elif args.command == "import":
+        print(f"📥 Imported {index.import_text(args.path)} fingerprints from {args.path}")
+    elif args.command == "export":
+        print(f"📤 Exported {index.export_text(args.path)} fingerprints to {args.path}")
+    elif args.command == "purge":
+        print(f"🧹 Removed {index.purge()} orphaned fingerprint rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+offline_services.py
+Çevrimdışı yedek servisler (Reddit, Pexels, TTS, YouTube)
+
+Canlı kimlik bilgileri olmadan tüm boru hattını çalıştırmak ve ölçmek
+için yerel HTTP sunucuları. Veriler sabit bir tohumdan üretilir, böylece
+benchmark çalıştırmaları karşılaştırılabilir.
+
+- Reddit: OAuth token, /api/v1/me, /r/<sub>/hot ve /comments/<id> JSON'u
+- Pexels: /videos/search ve ffmpeg testsrc ile üretilmiş klip indirme
+  (Range istekleri desteklenir)
+- TTS: /tts?text=... → ton MP3'ü + edge-tts tarzı kelime sınırları
+- YouTube: kesintili (resumable) yükleme oturumu
+
+Uygulama modülleri bu sunuculara çevre değişkenleriyle yönlenir:
+REDDIT_OAUTH_URL, REDDIT_URL, PEXELS_API_URL, TTS_STANDIN_URL,
+YOUTUBE_API_ENDPOINT (bkz. standin_environment).
+"""
+
+import asyncio
+import base64
+import json
+import os
+import random
+import re
+import subprocess
+import threading
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "life advice friend work money school family story night house time "
+    "people thing city dog cat trip food weird secret job game movie book "
+    "car rain summer winter phone teacher boss neighbor stranger lesson"
+).split()
+
+# Sunulan klip varyantları (genişlik, yükseklik, süre) - açılışta bir kez üretilir
+CLIP_VARIANTS = [
+    (720, 1280, 45),
+    (1080, 1920, 45),
+    (1920, 1080, 45),
+    (720, 1280, 75),
+    (1080, 1920, 75),
+    (1920, 1080, 75),
+]
+
+TTS_WORDS_PER_SECOND = 2.6
+TICKS_PER_SECOND = 10_000_000  # edge-tts offset/duration birimi (100 ns)
+
+
+# -----------------------------------------------------------------------------
+# Synthetic media
+# -----------------------------------------------------------------------------
+
+def make_test_clip(path: str, width: int, height: int, duration: float, fps: int = 30) -> str:
+    """Encodes an ffmpeg testsrc clip (cached on disk)."""
+    if not os.path.exists(path):
+        subprocess.run([
+            "ffmpeg", "-f", "lavfi", "-i", f"testsrc=size={width}x{height}:rate={fps}",
+            "-t", str(duration), "-c:v", "libx264", "-preset", "ultrafast",
+            "-pix_fmt", "yuv420p", "-y", path
+        ], check=True, capture_output=True)
+    return path
+
+
+def make_tone(path: str, duration: float, frequency: int = 440) -> str:
+    """Encodes a sine tone MP3 (cached on disk)."""
+    if not os.path.exists(path):
+        subprocess.run([
+            "ffmpeg", "-f", "lavfi", "-i", f"sine=frequency={frequency}:duration={duration}",
+            "-c:a", "libmp3lame", "-b:a", "64k", "-y", path
+        ], check=True, capture_output=True)
+    return path
+
+
+# -----------------------------------------------------------------------------
+# Synthetic datasets
+# -----------------------------------------------------------------------------
+
+def make_reddit_dataset(seed: int, count: int = 50, subreddit: str = "AskReddit") -> list[dict]:
+    """
+    Deterministic hot listing: some posts are stickied, NSFW, short-titled
+    or have too few comments so the fetcher's filters are exercised.
+    """
+    rng = random.Random(seed)
+    posts = []
+    for i in range(count):
+        post_id = f"off{i:04d}"
+        title_words = rng.randint(3, 18)
+        title = " ".join(rng.choice(WORDS) for _ in range(title_words)).capitalize() + "?"
+        comments = []
+        for j in range(rng.choice([0, 1, 2, 4, 6, 8, 12])):
+            body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 60))).capitalize() + "."
+            comments.append({
+                'id': f"{post_id}c{j}",
+                'author': f"user{rng.randint(1, 9999)}",
+                'body': body,
+                'score': rng.randint(1, 20000),
+            })
+        comments.sort(key=lambda c: -c['score'])
+        posts.append({
+            'id': post_id,
+            'title': title,
+            'selftext': "",
+            'subreddit': subreddit,
+            'score': rng.randint(10, 80000),
+            'stickied': i < 2,
+            'over_18': rng.random() < 0.05,
+            'num_comments': len(comments),
+            'created_utc': 1_700_000_000 + i * 60,
+            'comments': comments,
+        })
+    return posts
+
+
+def make_pexels_dataset(seed: int, per_page: int = 15) -> list[dict]:
+    """Deterministic video search results that point at CLIP_VARIANTS."""
+    rng = random.Random(seed)
+    durations = sorted({d for _, _, d in CLIP_VARIANTS})
+    videos = []
+    for i in range(per_page):
+        duration = rng.choice(durations)
+        videos.append({
+            'id': 900000 + i,
+            'duration': duration,
+            'width': 1080,
+            'height': 1920,
+            'video_files': [
+                {'id': 900000 * 10 + k, 'quality': 'hd' if h >= 1080 or w >= 1080 else 'sd',
+                 'file_type': 'video/mp4', 'width': w, 'height': h, 'fps': 30,
+                 'link': f"/files/{w}x{h}_{d}.mp4"}
+                for k, (w, h, d) in enumerate(CLIP_VARIANTS) if d == duration
+            ],
+        })
+    return videos
+
+
+# -----------------------------------------------------------------------------
+# Reddit JSON shapes
+# -----------------------------------------------------------------------------
+
+def _t3(post: dict) -> dict:
+    data = {k: v for k, v in post.items() if k != 'comments'}
+    data.update({
+        'name': f"t3_{post['id']}",
+        'author': "offline_op",
+        'permalink': f"/r/{post['subreddit']}/comments/{post['id']}/offline/",
+        'url': f"https://reddit.com/r/{post['subreddit']}/comments/{post['id']}/",
+        'is_video': False,
+        'is_self': True,
+    })
+    return {'kind': 't3', 'data': data}
+
+
+def _t1(post: dict, comment: dict) -> dict:
+    return {'kind': 't1', 'data': {
+        'id': comment['id'],
+        'name': f"t1_{comment['id']}",
+        'author': comment['author'],
+        'body': comment['body'],
+        'score': comment['score'],
+        'stickied': False,
+        'replies': "",
+        'depth': 0,
+        'parent_id': f"t3_{post['id']}",
+        'link_id': f"t3_{post['id']}",
+        'subreddit': post['subreddit'],
+        'created_utc': post['created_utc'] + 30,
+    }}
+
+
+def _listing(children: list, after: str | None = None) -> dict:
+    return {'kind': 'Listing', 'data': {'children': children, 'after': after, 'before': None}}
+
+
+# -----------------------------------------------------------------------------
+# HTTP handlers
+# -----------------------------------------------------------------------------
+
+class _StandinHandler(BaseHTTPRequestHandler):
+    """Shared helpers; `self.server.state` holds the service data."""
+
+    def log_message(self, format, *args):
+        if self.server.state.get('verbose'):
+            super().log_message(format, *args)
+
+    @property
+    def state(self) -> dict:
+        return self.server.state
+
+    def _send_json(self, code: int, payload, headers: dict = None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send_file(self, path: str, content_type: str):
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        range_header = self.headers.get("Range")
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header or "")
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = int(match.group(2)) if match.group(2) else size - 1
+            else:
+                start = max(0, size - int(match.group(2)))
+            end = min(end, size - 1)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(1024 * 1024, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+
+class RedditHandler(_StandinHandler):
+
+    def do_POST(self):
+        self._read_body()
+        if self.path.startswith("/api/v1/access_token"):
+            self._send_json(200, {
+                'access_token': "offline-token",
+                'token_type': "bearer",
+                'expires_in': 86400,
+                'scope': "*",
+            })
+        else:
+            self._send_json(404, {'error': 404})
+
+    def do_GET(self):
+        path = urllib.parse.urlparse(self.path).path.rstrip('/')
+        posts = self.state['posts']
+
+        if path == "/api/v1/me":
+            self._send_json(200, {'name': "offline_bot", 'id': "offline", 'created_utc': 0})
+            return
+
+        match = re.fullmatch(r"/r/([^/]+)/(hot|top|new)", path)
+        if match:
+            query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+            limit = int(query.get('limit', ['25'])[0])
+            names = match.group(1).lower().split("+")  # multireddit: r/a+b+c
+            listed = [p for p in posts if p['subreddit'].lower() in names]
+            self._send_json(200, _listing([_t3(p) for p in listed[:limit]]))
+            return
+
+        match = re.fullmatch(r"/comments/([^/]+)(?:/.*)?", path)
+        if match:
+            post = next((p for p in posts if p['id'] == match.group(1)), None)
+            if not post:
+                self._send_json(404, {'error': 404})
+                return
+            self._send_json(200, [
+                _listing([_t3(post)]),
+                _listing([_t1(post, c) for c in post['comments']]),
+            ])
+            return
+
+        self._send_json(404, {'error': 404})
+
+
+class PexelsHandler(_StandinHandler):
+
+    def do_GET(self):
+        parsed = urllib.parse.urlparse(self.path)
+        if parsed.path == "/videos/search":
+            self.state['search_requests'] += 1
+            base = self.state['base_url']
+            videos = json.loads(json.dumps(self.state['videos']))
+            for video in videos:
+                for vf in video['video_files']:
+                    local = os.path.join(self.state['media_dir'], os.path.basename(vf['link']))
+                    vf['file_size'] = os.path.getsize(local)
+                    vf['link'] = base + vf['link']
+            self._send_json(200, {'page': 1, 'per_page': len(videos), 'videos': videos},
+                            headers={
+                                'X-Ratelimit-Limit': "20000",
+                                'X-Ratelimit-Remaining': str(20000 - self.state['search_requests']),
+                                'X-Ratelimit-Reset': "0",
+                            })
+        elif parsed.path.startswith("/files/"):
+            local = os.path.join(self.state['media_dir'], os.path.basename(parsed.path))
+            if os.path.exists(local):
+                self._send_file(local, "video/mp4")
+            else:
+                self._send_json(404, {'error': "not found"})
+        else:
+            self._send_json(404, {'error': "not found"})
+
+
+class TTSHandler(_StandinHandler):
+
+    def do_GET(self):
+        parsed = urllib.parse.urlparse(self.path)
+        if parsed.path != "/tts":
+            self._send_json(404, {'error': "not found"})
+            return
+
+        text = urllib.parse.parse_qs(parsed.query).get('text', [''])[0]
+        words = re.sub(r"<[^>]+>", " ", text).split()
+        duration = max(0.5, round(len(words) / TTS_WORDS_PER_SECOND, 1))
+
+        tone = os.path.join(self.state['media_dir'], f"tone_{duration:.1f}.mp3")
+        with self.state['lock']:
+            make_tone(tone, duration)
+        with open(tone, 'rb') as f:
+            audio = f.read()
+
+        per_word = duration / max(1, len(words))
+        boundaries = [
+            {'offset': int(i * per_word * TICKS_PER_SECOND),
+             'duration': int(per_word * TICKS_PER_SECOND),
+             'text': word}
+            for i, word in enumerate(words)
+        ]
+        self._send_json(200, {
+            'audio': base64.b64encode(audio).decode('ascii'),
+            'boundaries': boundaries,
+            'duration': duration,
+        })
+
+
+class YouTubeHandler(_StandinHandler):
+
+    def do_POST(self):
+        parsed = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(parsed.query)
+        self._read_body()
+
+        if parsed.path.endswith("/videos") and query.get('uploadType') == ['resumable']:
+            if self.state.get('quota_exceeded'):
+                self._send_json(400, {'error': {'errors': [{'reason': 'uploadLimitExceeded'}]}})
+                return
+            with self.state['lock']:
+                self.state['sessions'] += 1
+                session = self.state['sessions']
+            self.send_response(200)
+            self.send_header("Location", f"{self.state['base_url']}/upload/session/{session}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            self._send_json(404, {'error': "not found"})
+
+    def do_PUT(self):
+        match = re.fullmatch(r"/upload/session/(\d+)", urllib.parse.urlparse(self.path).path)
+        body = self._read_body()
+        if not match:
+            self._send_json(404, {'error': "not found"})
+            return
+        self.state['uploaded_bytes'] += len(body)
+        self._send_json(200, {'kind': "youtube#video", 'id': f"offline{match.group(1)}"})
+
+
+# -----------------------------------------------------------------------------
+# Server management
+# -----------------------------------------------------------------------------
+
+class StandinServer:
+    """One stand-in service on a random local port, served from a thread."""
+
+    def __init__(self, handler_class, state: dict):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        self.httpd.daemon_threads = True
+        self.httpd.state = state
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        state['base_url'] = self.base_url
+        state.setdefault('lock', threading.Lock())
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def start_standins(seed: int = 1234, media_dir: str = ".bench_media", verbose: bool = False) -> dict:
+    """
+    Generates the synthetic media and starts all four stand-in services.
+
+    Returns:
+        {'reddit': StandinServer, 'pexels': ..., 'tts': ..., 'youtube': ...}
+    """
+    os.makedirs(media_dir, exist_ok=True)
+    print(f"🧪 Preparing offline media in {media_dir} ...")
+    for width, height, duration in CLIP_VARIANTS:
+        make_test_clip(os.path.join(media_dir, f"{width}x{height}_{duration}.mp4"), width, height, duration)
+
+    servers = {
+        'reddit': StandinServer(RedditHandler, {
+            'posts': make_reddit_dataset(seed), 'verbose': verbose}),
+        'pexels': StandinServer(PexelsHandler, {
+            'videos': make_pexels_dataset(seed), 'media_dir': media_dir,
+            'search_requests': 0, 'verbose': verbose}),
+        'tts': StandinServer(TTSHandler, {'media_dir': media_dir, 'verbose': verbose}),
+        'youtube': StandinServer(YouTubeHandler, {
+            'sessions': 0, 'uploaded_bytes': 0, 'verbose': verbose}),
+    }
+    for name, server in servers.items():
+        server.start()
+        print(f"   {name:8s} {server.base_url}")
+    return servers
+
+
+def stop_standins(servers: dict):
+    for server in servers.values():
+        server.stop()
+
+
+def standin_environment(servers: dict) -> dict:
+    """
+    Environment variables that point the bot at the stand-ins.
+    """
+    return {
+        'REDDIT_CLIENT_ID': "offline",
+        'REDDIT_CLIENT_SECRET': "offline",
+        'REDDIT_USERNAME': "offline_bot",
+        'REDDIT_PASSWORD': "offline",
+        'REDDIT_OAUTH_URL': servers['reddit'].base_url,
+        'REDDIT_URL': servers['reddit'].base_url,
+        'PEXELS_API_KEY': "offline",
+        'PEXELS_API_URL': servers['pexels'].base_url,
+        'TTS_STANDIN_URL': servers['tts'].base_url,
+        'YOUTUBE_API_ENDPOINT': servers['youtube'].base_url + "/",
+        'YOUTUBE_TOKEN_CONTENT': json.dumps({'token': "offline", 'scopes': []}),
+        'CLIENT_SECRETS_CONTENT': json.dumps({'installed': {'client_id': "offline",
+                                                            'client_secret': "offline"}}),
+    }
+
+
+# -----------------------------------------------------------------------------
+# TTS client helpers (used by the subtitle generators when TTS_STANDIN_URL is set)
+# -----------------------------------------------------------------------------
+
+def _fetch_tts(base_url: str, text: str) -> dict:
+    url = f"{base_url}/tts?{urllib.parse.urlencode({'text': text})}"
+    with urllib.request.urlopen(url, timeout=60) as response:
+        return json.load(response)
+
+
+async def standin_tts_stream(base_url: str, text: str):
+    """
+    Async generator with the same chunk shape as edge_tts.Communicate.stream().
+    """
+    result = await asyncio.get_running_loop().run_in_executor(None, _fetch_tts, base_url, text)
+    yield {'type': "audio", 'data': base64.b64decode(result['audio'])}
+    for boundary in result['boundaries']:
+        yield {'type': "WordBoundary", **boundary}
+
+
+class StandinSubMaker:
+    """
+    edge_tts.SubMaker stand-in (create_sub / generate_subs as SRT), so the
+    offline benchmark runs without the edge-tts package.
+    """
+
+    def __init__(self):
+        self.cues = []
+
+    def create_sub(self, timestamp: tuple, text: str):
+        offset, duration = timestamp
+        self.cues.append((offset / TICKS_PER_SECOND, (offset + duration) / TICKS_PER_SECOND, text))
+
+    def generate_subs(self) -> str:
+        def srt_time(seconds: float) -> str:
+            ms = int(round(seconds * 1000))
+            return f"{ms // 3_600_000:02d}:{ms // 60_000 % 60:02d}:{ms // 1000 % 60:02d},{ms % 1000:03d}"
+        return "".join(f"{i}\n{srt_time(start)} --> {srt_time(end)}\n{text}\n\n"
+                       for i, (start, end, text) in enumerate(self.cues, 1))
+
+
+def standin_tts_save(base_url: str, text: str, path: str):
+    """gTTS-style save() against the stand-in."""
+    result = _fetch_tts(base_url, text)
+    with open(path, 'wb') as f:
+        f.write(base64.b64decode(result['audio']))
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+pexels_cache.py
+Pexels arama yanıtı önbelleği (TTL) + istek bütçesi takibi
+
+- videos/search yanıtları (sorgu, yön, boyut, sayfa başı, sayfa) anahtarıyla
+  saklanır; TTL içinde arama yerel bir SQLite okumasıdır (~1 ms yerine
+  300-800 ms API çağrısı). Stok video sonuçları yavaş değiştiği için
+  varsayılan TTL uzundur.
+- Bütçe: her yanıttaki X-Ratelimit-Limit / -Remaining / -Reset başlıkları
+  kaydedilir (aylık kota). Saatlik sınır başlıkta gelmediği için son bir
+  saatteki istekler yerel olarak sayılır.
+- Kota bitmeden (yedek payı kalınca) yeni arama reddedilir; çağıran süresi
+  dolmuş önbellek kaydını kullanır (erteleme) veya yerel kütüphaneye düşer.
+
+TTL çevre değişkeniyle ayarlanabilir: SHORTS_PEXELS_SEARCH_TTL (saniye)
+
+Kullanım:
+    python pexels_cache.py stats
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+PEXELS_CACHE_DB = os.environ.get('SHORTS_PEXELS_CACHE', "pexels_cache.db")
+SEARCH_TTL = float(os.environ.get('SHORTS_PEXELS_SEARCH_TTL', '604800'))  # 7 gün
+HOURLY_LIMIT = 200  # Pexels varsayılan saatlik sınırı
+HOURLY_RESERVE = 10  # Saatlik sınıra bu kadar kala aramayı ertele
+MONTHLY_RESERVE = 100  # Aylık kotadan bu kadar istek elde tutulur
+EXHAUSTED_BACKOFF = 3600  # Başlıksız 429 sonrası bu kadar saniye bekle
+PURGE_AFTER = 30 * 24 * 3600  # Bu kadar eski kayıtlar silinir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    key TEXT PRIMARY KEY,                 -- query:orientation:size:per_page:page
+    response_json TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS api_requests (
+    requested_at REAL NOT NULL,
+    status INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_api_requests_time ON api_requests (requested_at);
+CREATE TABLE IF NOT EXISTS rate_limit (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    quota INTEGER,
+    remaining INTEGER,
+    reset_at REAL,                        -- NULL = bilinmiyor
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def search_key(params: dict) -> str:
+    return ":".join(str(params.get(name, '')).lower()
+                    for name in ("query", "orientation", "size", "per_page", "page"))
+
+
+class PexelsCache:
+    """
+    Persistent search cache and request budget in front of the Pexels API
+    (thread-safe, one SQLite connection per thread).
+    """
+
+    def __init__(self, path: str = PEXELS_CACHE_DB, search_ttl: float = SEARCH_TTL):
+        self.path = path
+        self.search_ttl = search_ttl
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self.connection().executescript(SCHEMA)
+        self.purge()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Searches ---------------------------------------------------------
+
+    def get_search(self, params: dict, allow_stale: bool = False) -> dict | None:
+        """
+        Cached search response, or None if missing/expired.
+
+        Args:
+            allow_stale: Also return expired entries (budget exhausted)
+        """
+        row = self.connection().execute(
+            "SELECT response_json, fetched_at FROM searches WHERE key = ?",
+            (search_key(params),)
+        ).fetchone()
+        fresh = row is not None and (allow_stale or time.time() - row[1] < self.search_ttl)
+        if fresh:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return json.loads(row[0]) if fresh else None
+
+    def put_search(self, params: dict, response: dict):
+        self.connection().execute(
+            "INSERT OR REPLACE INTO searches (key, response_json, fetched_at) VALUES (?, ?, ?)",
+            (search_key(params), json.dumps(response), time.time())
+        )
+
+    # --- Budget -----------------------------------------------------------
+
+    def record_response(self, status: int, headers) -> None:
+        """
+        Logs one API request and stores the X-Ratelimit-* headers.
+        A 429 without headers is recorded as an exhausted quota. An exhausted
+        quota without X-Ratelimit-Reset resets after Retry-After (or
+        EXHAUSTED_BACKOFF) seconds so searches are not blocked forever.
+        """
+        now = time.time()
+        headers = {key.lower(): value for key, value in dict(headers or {}).items()}
+        conn = self.connection()
+        conn.execute("INSERT INTO api_requests (requested_at, status) VALUES (?, ?)", (now, status))
+
+        remaining = headers.get('x-ratelimit-remaining')
+        if remaining is None and status != 429:
+            return
+        quota = headers.get('x-ratelimit-limit')
+        reset = headers.get('x-ratelimit-reset')
+        remaining = int(remaining) if remaining is not None else 0
+        reset_at = float(reset) if reset and float(reset) > 0 else None
+        if reset_at is None and (status == 429 or remaining <= MONTHLY_RESERVE):
+            # Sıfırlama zamanı bilinmeyen tükenmiş bütçe aramaları sonsuza dek kilitlerdi
+            retry_after = headers.get('retry-after', '')
+            reset_at = now + (float(retry_after) if retry_after.isdigit() else EXHAUSTED_BACKOFF)
+        conn.execute(
+            "INSERT OR REPLACE INTO rate_limit (id, quota, remaining, reset_at, updated_at) VALUES (1, ?, ?, ?, ?)",
+            (int(quota) if quota else None, remaining, reset_at, now)
+        )
+
+    def requests_last_hour(self) -> int:
+        return self.connection().execute(
+            "SELECT COUNT(*) FROM api_requests WHERE requested_at > ?", (time.time() - 3600,)
+        ).fetchone()[0]
+
+    def budget(self) -> dict:
+        """Current view of both limits."""
+        row = self.connection().execute(
+            "SELECT quota, remaining, reset_at, updated_at FROM rate_limit WHERE id = 1"
+        ).fetchone()
+        quota, remaining, reset_at, updated_at = row or (None, None, None, None)
+        if reset_at is not None and time.time() >= reset_at:
+            remaining = quota  # Dönem yenilendi
+        return {
+            'quota': quota,
+            'remaining': remaining,
+            'reset_at': reset_at,
+            'updated_at': updated_at,
+            'hourly_used': self.requests_last_hour(),
+            'hourly_limit': HOURLY_LIMIT,
+        }
+
+    def deny_reason(self) -> str | None:
+        """
+        Why a new search must wait (None = allowed): the monthly quota is
+        down to MONTHLY_RESERVE, or the hour is within HOURLY_RESERVE of
+        HOURLY_LIMIT.
+        """
+        budget = self.budget()
+        if budget['remaining'] is not None and budget['remaining'] <= MONTHLY_RESERVE:
+            return f"monthly quota nearly used ({budget['remaining']} left)"
+        if budget['hourly_used'] >= HOURLY_LIMIT - HOURLY_RESERVE:
+            return f"hourly limit nearly reached ({budget['hourly_used']}/{HOURLY_LIMIT})"
+        return None
+
+    # --- Maintenance ------------------------------------------------------
+
+    def purge(self, older_than: float = PURGE_AFTER) -> int:
+        """Deletes search entries far past the TTL and request logs older than an hour."""
+        conn = self.connection()
+        removed = conn.execute("DELETE FROM searches WHERE fetched_at < ?",
+                               (time.time() - max(older_than, self.search_ttl),)).rowcount
+        removed += conn.execute("DELETE FROM api_requests WHERE requested_at < ?",
+                                (time.time() - 3600,)).rowcount
+        return removed
+
+    def stats(self) -> dict:
+        conn = self.connection()
+        cutoff = time.time() - self.search_ttl
+        total, fresh = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(fetched_at >= ?), 0) FROM searches", (cutoff,)
+        ).fetchone()
+        return {'searches': total, 'fresh': fresh, **self.budget()}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_pexels_cache(path: str | None = None) -> PexelsCache:
+    """Returns the shared cache for this process."""
+    global _cache
+    with _cache_lock:
+        if _cache is None or (path and _cache.path != path):
+            path = path or PEXELS_CACHE_DB
+            _cache = PexelsCache(path)
+        return _cache
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Pexels search cache and request budget")
+    parser.add_argument("--db", default=PEXELS_CACHE_DB)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Show cached searches and the remaining request budget")
+    args = parser.parse_args(argv)
+
+    stats = PexelsCache(args.db).stats()
+    print(f"📊 {stats['searches']} cached searches ({stats['fresh']} within TTL)")
+    if stats['remaining'] is not None:
+        print(f"   Monthly: {stats['remaining']} of {stats['quota']} requests left")
+    print(f"   Hourly:  {stats['hourly_used']} of {stats['hourly_limit']} used")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,28 @@
 #!/usr/bin/env python3
 """
 pexels_dynamic.py
-Her seferinde farklı arka plan videosu indirir (Pexels API)
+Her seferinde farklı arka plan videosu seçer (Pexels API)
 Çeşitlilik için 20+ farklı arama terimi
+
+İndirilen klipler background_library.py'de (video ID + rendition) saklanır;
+bir sorgu / süre aralığı için yerel envanter yeterliyse ağa gidilmez.
+İşe verilmeden önce her klip bir kez 1080x1920@30 mezzanine'e dönüştürülür.
 """
 
 import requests
 import random
 import os
+from background_library import (
+    MIN_INVENTORY, NORMALIZE_BACKGROUNDS, BackgroundLibrary, get_background_library, rendition_key
+)
+from pexels_cache import get_pexels_cache
+from ranged_download import download_file
+from rendition_selector import select_rendition
+from tracing import span
+
 
+# API adresi (çevrimdışı benchmark için yerel sunucuya yönlendirilebilir)
+PEXELS_API_URL = os.environ.get('PEXELS_API_URL', 'https://api.pexels.com')
 
 # 20+ farklı arka plan kategorisi (dinamik içerik için)
 BACKGROUND_QUERIES = [
@@ -44,23 +58,33 @@ BACKGROUND_QUERIES = [
 ]
 
 
-def get_random_background_video(
-    output_file: str = "background.mp4",
+def deliver_background(library: BackgroundLibrary, entry: dict, output_file: str) -> str:
+    """
+    Hands a library clip to a job, normalizing it to the mezzanine format
+    first (only the first use of a clip pays for the transcode).
+    """
+    if NORMALIZE_BACKGROUNDS:
+        entry = library.normalize(entry)
+    return library.materialize(entry, output_file)
+
+
+def search_background_videos(
     api_key: str = None,
-    min_duration: int = 30,
-    max_duration: int = 90
-) -> str | None:
+    query: str = None
+) -> dict | None:
     """
-    Pexels'tan rastgele bir arka plan videosu indirir.
+    Pexels'te arka plan videosu arar (indirme yapmaz).
+    
+    Arama ses süresinden bağımsız olduğu için TTS bitmeden başlatılabilir.
+    Yanıtlar pexels_cache'te TTL ile saklanır; istek bütçesi azaldığında
+    API'ye gidilmez, süresi dolmuş önbellek kaydı kullanılır.
     
     Args:
-        output_file: Çıktı dosyası
         api_key: Pexels API key (yoksa env'den alır)
-        min_duration: Minimum süre (saniye)
-        max_duration: Maximum süre (saniye)
+        query: Arama terimi (yoksa rastgele seçilir)
         
     Returns:
-        İndirilen dosya yolu veya None
+        {'query': str, 'videos': [...]} veya None
     """
     
     # API key al
@@ -73,26 +97,53 @@ def get_random_background_video(
         return None
     
     # Rastgele sorgu seç
-    query = random.choice(BACKGROUND_QUERIES)
+    if not query:
+        query = random.choice(BACKGROUND_QUERIES)
     print(f"🎬 Searching Pexels for: '{query}'")
     
     # Pexels Video API
-    search_url = "https://api.pexels.com/videos/search"
+    search_url = f"{PEXELS_API_URL}/videos/search"
     headers = {"Authorization": api_key}
     
     params = {
         "query": query,
         "orientation": "portrait",  # 9:16 için
         "size": "medium",
-        "per_page": 15  # Daha fazla seçenek
+        "per_page": 15,  # Daha fazla seçenek
+        "page": 1
     }
     
+    cache = get_pexels_cache()
+    
     try:
-        print("   Fetching videos from Pexels API...")
-        response = requests.get(search_url, headers=headers, params=params, timeout=10)
-        response.raise_for_status()
+        data = cache.get_search(params)
+        if data is not None:
+            print("   ⚡ Search served from local cache")
+        else:
+            deny_reason = cache.deny_reason()
+            if deny_reason:
+                # Kotayı koru: eski sonuç varsa onu kullan, yoksa aramayı ertele
+                print(f"⚠️  Pexels search deferred: {deny_reason}")
+                data = cache.get_search(params, allow_stale=True)
+                if data is None:
+                    return None
+            else:
+                print("   Fetching videos from Pexels API...")
+                try:
+                    with span("pexels_search", "network", query=query) as s:
+                        response = requests.get(search_url, headers=headers, params=params, timeout=10)
+                        cache.record_response(response.status_code, response.headers)
+                        response.raise_for_status()
+                        s.add_bytes(len(response.content))
+                    data = response.json()
+                    cache.put_search(params, data)
+                except requests.exceptions.RequestException as e:
+                    # 429 / ağ hatası: eski sonuç işi kurtarır
+                    data = cache.get_search(params, allow_stale=True)
+                    if data is None:
+                        raise
+                    print(f"⚠️  Pexels unavailable ({e}), using an expired cached search")
         
-        data = response.json()
         videos = data.get('videos', [])
         
         if not videos:
@@ -100,7 +151,38 @@ def get_random_background_video(
             return None
         
         print(f"✅ Found {len(videos)} videos")
+        return {'query': query, 'videos': videos}
+        
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Network error: {e}")
+        return None
+    except Exception as e:
+        print(f"❌ Error searching videos: {e}")
+        return None
+
+
+def download_background_video(
+    search_result: dict,
+    output_file: str = "background.mp4",
+    min_duration: int = 30,
+    max_duration: int = 90
+) -> str | None:
+    """
+    Arama sonucundan süreye uygun bir video seçip indirir.
+    
+    Args:
+        search_result: search_background_videos() çıktısı
+        output_file: Çıktı dosyası
+        min_duration: Minimum süre (saniye)
+        max_duration: Maximum süre (saniye)
         
+    Returns:
+        İndirilen dosya yolu veya None
+    """
+    query = search_result['query']
+    videos = search_result['videos']
+    
+    try:
         # Süre filtreleme
         suitable_videos = []
         for video in videos:
@@ -118,36 +200,49 @@ def get_random_background_video(
         
         print(f"   Selected video duration: {duration}s")
         
-        # En iyi kaliteli video dosyasını bul
-        video_files = selected_video.get('video_files', [])
-        
-        # Portrait ve HD kalite tercih et
-        best_file = None
-        for vf in video_files:
-            if vf.get('width', 0) == 1080 or vf.get('height', 0) == 1920:
-                best_file = vf
-                break
-        
-        # Bulamazsa en yüksek kaliteyi al
-        if not best_file and video_files:
-            best_file = max(video_files, key=lambda x: x.get('width', 0) * x.get('height', 0))
-        
-        if not best_file:
+        # 1080x1920 kırpmayı karşılayan en ucuz dosya (indirme + çözme + ölçekleme)
+        video_id = selected_video.get('id')
+        library = get_background_library()
+        selection = select_rendition(selected_video.get('video_files', []), duration,
+                                     local_renditions=library.renditions(video_id))
+        if not selection:
             print("❌ No suitable video file found")
             return None
         
+        best_file = selection['file']
+        cost = selection['cost']
+        print(f"   Rendition {rendition_key(best_file)}@{best_file.get('fps') or '?'}fps: "
+              f"~{cost['seconds']:.1f}s to fetch+decode, upscale x{cost['upscale']:.2f}, "
+              f"{cost['crop_waste']:.0%} cropped")
+        if selection['saved_bytes'] or selection['saved_seconds']:
+            print(f"   Saves ~{selection['saved_bytes'] / (1024 * 1024):.1f} MB and "
+                  f"~{selection['saved_seconds']:.1f}s vs. the largest/1080 file")
+        
+        # Bu rendition daha önce indirildiyse kütüphaneden ver
+        rendition = rendition_key(best_file)
+        entry = library.get(video_id, rendition)
+        if entry:
+            library.touch(entry)
+            deliver_background(library, entry, output_file)
+            print(f"♻️  Reusing library clip {video_id} ({rendition}), no download")
+            return output_file
+        
         download_url = best_file.get('link')
         file_size_mb = best_file.get('file_size', 0) / (1024 * 1024)
         
         print(f"   Downloading video ({file_size_mb:.1f} MB)...")
         
-        # Videoyu indir
-        video_response = requests.get(download_url, stream=True, timeout=30)
-        video_response.raise_for_status()
+        # Videoyu kütüphaneye indir
+        library_file = library.path_for(video_id, rendition)
+        # Paralel aralıklar; kopan indirme .part dosyasından devam eder ve
+        # boyutu doğrulanmadan kütüphanede görünmez
+        with span("pexels_download", "network", video_id=video_id) as s:
+            s.add_bytes(download_file(download_url, library_file,
+                                      expected_size=best_file.get('file_size')))
         
-        with open(output_file, 'wb') as f:
-            for chunk in video_response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        entry = library.add(video_id, rendition, library_file, query, duration,
+                            best_file.get('width'), best_file.get('height'))
+        deliver_background(library, entry, output_file)
         
         actual_size = os.path.getsize(output_file) / (1024 * 1024)
         print(f"✅ Background video downloaded: {output_file}")
@@ -165,18 +260,81 @@ def get_random_background_video(
         return None
 
 
+def pick_local_background(
+    min_duration: float,
+    max_duration: float,
+    output_file: str,
+    query: str | None = None,
+    min_inventory: int = MIN_INVENTORY
+) -> str | None:
+    """
+    Uses a clip from the local library if it holds at least `min_inventory`
+    clips for the query (None = any) and duration range.
+    
+    Returns:
+        output_file or None (inventory too thin → download a new clip)
+    """
+    library = get_background_library()
+    if library.inventory(min_duration, max_duration, query) < min_inventory:
+        return None
+    entry = library.pick(min_duration, max_duration, query)
+    if not entry:
+        return None
+    deliver_background(library, entry, output_file)
+    print(f"♻️  Background from local library: {entry['video_id']} ({entry['rendition']}, "
+          f"{entry['duration']:.0f}s, '{entry['query']}')")
+    return output_file
+
+
+def get_random_background_video(
+    output_file: str = "background.mp4",
+    api_key: str = None,
+    min_duration: int = 30,
+    max_duration: int = 90
+) -> str | None:
+    """
+    Rastgele bir arka plan videosu verir (önce yerel kütüphane, sonra Pexels).
+    
+    Args:
+        output_file: Çıktı dosyası
+        api_key: Pexels API key (yoksa env'den alır)
+        min_duration: Minimum süre (saniye)
+        max_duration: Maximum süre (saniye)
+        
+    Returns:
+        İndirilen dosya yolu veya None
+    """
+    query = random.choice(BACKGROUND_QUERIES)
+    local = pick_local_background(min_duration, max_duration, output_file, query=query)
+    if local:
+        return local
+    
+    search_result = search_background_videos(api_key=api_key, query=query)
+    result = search_result and download_background_video(
+        search_result,
+        output_file=output_file,
+        min_duration=min_duration,
+        max_duration=max_duration
+    )
+    # Ağ başarısızsa herhangi bir yerel klip
+    return result or pick_local_background(min_duration, max_duration, output_file, min_inventory=1)
+
+
 def get_background_for_duration(
     target_duration: float,
     output_file: str = "background.mp4",
-    api_key: str = None
+    api_key: str = None,
+    search_result: dict = None
 ) -> str | None:
     """
-    Belirli bir sürece uygun arka plan videosu indirir.
+    Belirli bir süreye uygun arka plan videosu verir; sorgunun yerel
+    envanteri yeterliyse indirme yapılmaz.
     
     Args:
         target_duration: Hedef süre (saniye)
         output_file: Çıktı dosyası
         api_key: Pexels API key
+        search_result: Önceden yapılmış arama (yoksa şimdi aranır)
         
     Returns:
         İndirilen dosya yolu veya None
@@ -187,12 +345,21 @@ def get_background_for_duration(
     
     print(f"📐 Looking for background video: {min_dur}s - {max_dur}s")
     
-    return get_random_background_video(
+    query = search_result['query'] if search_result else None
+    local = pick_local_background(min_dur, max_dur, output_file, query=query)
+    if local:
+        return local
+    
+    if search_result is None:
+        search_result = search_background_videos(api_key=api_key)
+    result = search_result and download_background_video(
+        search_result,
         output_file=output_file,
-        api_key=api_key,
         min_duration=min_dur,
         max_duration=max_dur
     )
+    # Ağ başarısızsa herhangi bir yerel klip
+    return result or pick_local_background(min_dur, max_dur, output_file, min_inventory=1)
 
 
 if __name__ == "__main__":
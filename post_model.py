@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+post_model.py
+Sıkı post modeli (__slots__) ve sütunlu aday deposu (NumPy, memmap)
+
+- Comment / Post: __slots__'lu dataclass'lar; salt okunur sözlük görünümü
+  (Mapping) sayesinde post['title'], post.get('comments', []) gibi mevcut
+  kod değişmeden çalışır. Kap yükü (metinler hariç) sözlüğe göre ~3-4 kat az.
+- PostBatch: büyük aday kümeleri için sütunlu kapsayıcı. Sayısal alanlar
+  NumPy dizileri, metinler tek UTF-8 blob + ofset dizisi (Arrow tarzı).
+  Dizine .npy dosyaları olarak yazılır ve np.load(mmap_mode='r') ile
+  bellek eşlemeli açılır: puanlama taraması yalnızca sayısal sütunlara
+  (post başına ~100 bayt) dokunur, metin sayfaları diskten hiç okunmaz.
+- PostBatch.features(): candidate_ranker özellikleri Python döngüsü
+  olmadan (bincount) hesaplanır.
+
+Aşamalar arasında taşınan post_data sözlük olarak kalır (manifest ve iş
+kuyruğu onu JSON olarak saklar); dönüşüm Post.from_dict / to_dict ile.
+Canlı aday havuzu da SQLite'ta kalır: claim durumu sürekli değişir ve
+pop() zaten yalnızca sayısal sütunları (rank_score, created_utc) tarar.
+PostBatch arşiv dökümleri içindir (dump_ingest.py --batch-out); Post ve
+Comment, dump_ingest'in bellekte tuttuğu on binlerce kaydı taşır.
+"""
+
+import json
+import os
+import sys
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from candidate_ranker import CandidateFeatures, SPOKEN_COMMENTS, SPOKEN_COMMENT_CHARS
+from job_workspace import atomic_output
+
+BATCH_FORMAT_VERSION = 1
+BATCH_META_FILE = "batch.json"
+
+
+class _MappingView(Mapping):
+    """Read-only dict view over the dataclass fields."""
+    __slots__ = ()
+    _keys: tuple = ()
+
+    def __getitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+@dataclass(slots=True, eq=True)
+class Comment(_MappingView):
+    author: str
+    body: str
+    score: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Comment":
+        return cls(
+            author=sys.intern(data.get('author') or 'deleted'),
+            body=data.get('body', ''),
+            score=int(data.get('score') or 0),
+        )
+
+    def to_dict(self) -> dict:
+        return {'author': self.author, 'body': self.body, 'score': self.score}
+
+
+@dataclass(slots=True, eq=True)
+class Post(_MappingView):
+    id: str
+    title: str
+    body: str = ''
+    subreddit: str = ''
+    url: str = ''
+    score: int = 0
+    created_utc: float | None = None
+    comments: tuple = ()
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "Post":
+        """post_data dictionary (or Post) → Post; unknown keys are dropped."""
+        if isinstance(data, cls):
+            return data
+        return cls(
+            id=data['id'],
+            title=data.get('title', ''),
+            body=data.get('body', '') or '',
+            subreddit=sys.intern(data.get('subreddit', '') or ''),
+            url=data.get('url', ''),
+            score=int(data.get('score') or 0),
+            created_utc=data.get('created_utc'),
+            comments=tuple(Comment.from_dict(c) for c in data.get('comments', [])),
+        )
+
+    def to_dict(self) -> dict:
+        """Plain post_data dictionary (JSON-serialisable)."""
+        data = {key: getattr(self, key) for key in self._keys}
+        data['comments'] = [c.to_dict() for c in self.comments]
+        return data
+
+
+Comment._keys = tuple(f.name for f in fields(Comment))
+Post._keys = tuple(f.name for f in fields(Post))
+
+
+# --- Columnar storage ---------------------------------------------------------
+
+class TextColumn:
+    """
+    Strings stored as one UTF-8 byte array plus n+1 offsets.
+    """
+    __slots__ = ('data', 'offsets')
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings: list[str]) -> "TextColumn":
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+
+class PostBatch:
+    """
+    Column-oriented collection of posts (row i = one post).
+
+    Post columns: id, title, body, subreddit, url (text), score,
+    created_utc, comment_start (offsets into the comment columns).
+    Comment columns: author, body (text), score, length (characters).
+    """
+
+    NUMERIC = {
+        'score': np.int32,
+        'created_utc': np.float64,
+        'comment_start': np.int64,
+        'comment_score': np.int32,
+        'comment_length': np.int32,
+        'title_length': np.int32,
+    }
+    TEXT = ('id', 'title', 'body', 'subreddit', 'url', 'comment_author', 'comment_body')
+
+    def __init__(self, columns: dict):
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns['score'])
+
+    @classmethod
+    def from_posts(cls, posts) -> "PostBatch":
+        """Builds the columns from post_data dictionaries or Post objects."""
+        posts = list(posts)
+        comments = [c for post in posts for c in post.get('comments', [])]
+        starts = np.zeros(len(posts) + 1, dtype=np.int64)
+        np.cumsum([len(post.get('comments', [])) for post in posts], out=starts[1:])
+
+        columns = {
+            'id': TextColumn.from_strings([post['id'] for post in posts]),
+            'title': TextColumn.from_strings([post.get('title', '') for post in posts]),
+            'body': TextColumn.from_strings([post.get('body', '') or '' for post in posts]),
+            'subreddit': TextColumn.from_strings([post.get('subreddit', '') or '' for post in posts]),
+            'url': TextColumn.from_strings([post.get('url', '') for post in posts]),
+            'score': np.array([post.get('score') or 0 for post in posts], dtype=cls.NUMERIC['score']),
+            'created_utc': np.array([post.get('created_utc') or np.nan for post in posts],
+                                    dtype=cls.NUMERIC['created_utc']),
+            'title_length': np.array([len(post.get('title', '')) for post in posts],
+                                     dtype=cls.NUMERIC['title_length']),
+            'comment_start': starts,
+            'comment_author': TextColumn.from_strings([c.get('author') or 'deleted' for c in comments]),
+            'comment_body': TextColumn.from_strings([c.get('body', '') for c in comments]),
+            'comment_score': np.array([c.get('score') or 0 for c in comments], dtype=cls.NUMERIC['comment_score']),
+            'comment_length': np.array([len(c.get('body', '')) for c in comments],
+                                       dtype=cls.NUMERIC['comment_length']),
+        }
+        return cls(columns)
+
+    def __getitem__(self, i: int) -> Post:
+        """Materialises row i as a Post (only this row's text is read)."""
+        c = self.columns
+        first, last = int(c['comment_start'][i]), int(c['comment_start'][i + 1])
+        created = float(c['created_utc'][i])
+        return Post(
+            id=c['id'][i],
+            title=c['title'][i],
+            body=c['body'][i],
+            subreddit=sys.intern(c['subreddit'][i]),
+            url=c['url'][i],
+            score=int(c['score'][i]),
+            created_utc=None if np.isnan(created) else created,
+            comments=tuple(
+                Comment(sys.intern(c['comment_author'][j]), c['comment_body'][j], int(c['comment_score'][j]))
+                for j in range(first, last)
+            ),
+        )
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def ids(self) -> list[str]:
+        return [self.columns['id'][i] for i in range(len(self))]
+
+    def features(self, default_created: float | None = None) -> CandidateFeatures:
+        """
+        candidate_ranker features straight from the columns: per-post sums
+        over the first SPOKEN_COMMENTS comments via bincount (no Python loop).
+        """
+        c = self.columns
+        n = len(self)
+        starts = np.asarray(c['comment_start'])
+        counts = np.diff(starts)
+        owner = np.repeat(np.arange(n), counts)
+        position = np.arange(len(owner)) - np.repeat(starts[:-1], counts)
+        spoken = position < SPOKEN_COMMENTS
+
+        lengths = np.minimum(np.asarray(c['comment_length']), SPOKEN_COMMENT_CHARS)[spoken].astype(np.float64)
+        scores = np.maximum(np.asarray(c['comment_score']), 0)[spoken].astype(np.float64)
+        owner = owner[spoken]
+        spoken_count = np.bincount(owner, minlength=n).astype(np.float64)
+        length_sum = np.bincount(owner, weights=lengths, minlength=n)
+        length_sq = np.bincount(owner, weights=lengths * lengths, minlength=n)
+
+        features = CandidateFeatures(n)
+        features.ids = c['id']  # TextColumn: satır satır çözülür
+        features.score[:] = c['score']
+        features.comment_score[:] = np.bincount(owner, weights=scores, minlength=n)
+        features.spoken_chars[:] = np.asarray(c['title_length']) + length_sum
+        features.segments[:] = 1 + spoken_count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(spoken_count > 0, length_sum / spoken_count, 0.0)
+            variance = np.where(spoken_count > 0, length_sq / spoken_count - mean * mean, 0.0)
+        features.comment_len_mean[:] = mean
+        features.comment_len_std[:] = np.sqrt(np.maximum(variance, 0.0))
+        created = np.asarray(c['created_utc'])
+        default_created = time.time() if default_created is None else default_created
+        features.created_utc[:] = np.where(np.isnan(created), default_created, created)
+        return features
+
+    # --- Disk format ------------------------------------------------------
+
+    def save(self, path: str):
+        """
+        Writes one .npy file per array into directory `path` (text columns
+        as <name>.data.npy + <name>.offsets.npy).
+        """
+        os.makedirs(path, exist_ok=True)
+        for name, column in self.columns.items():
+            if isinstance(column, TextColumn):
+                np.save(os.path.join(path, f"{name}.data.npy"), column.data)
+                np.save(os.path.join(path, f"{name}.offsets.npy"), column.offsets)
+            else:
+                np.save(os.path.join(path, f"{name}.npy"), column)
+        # Meta dosyası en son yazılır: yarım kalan kayıt yüklenmez
+        with atomic_output(os.path.join(path, BATCH_META_FILE)) as tmp:
+            with open(tmp, 'w') as f:
+                json.dump({'version': BATCH_FORMAT_VERSION, 'count': len(self)}, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "PostBatch":
+        """
+        Opens a saved batch; with mmap=True pages are read on first access.
+        """
+        with open(os.path.join(path, BATCH_META_FILE)) as f:
+            meta = json.load(f)
+        if meta.get('version') != BATCH_FORMAT_VERSION:
+            raise ValueError(f"Unsupported batch format: {meta.get('version')}")
+
+        def load_array(name: str) -> np.ndarray:
+            file = os.path.join(path, f"{name}.npy")
+            try:
+                return np.load(file, mmap_mode='r' if mmap else None)
+            except ValueError:
+                return np.load(file)  # Boş dizi eşlenemez
+
+        columns = {name: TextColumn(load_array(f"{name}.data"), load_array(f"{name}.offsets"))
+                   for name in cls.TEXT}
+        columns.update({name: load_array(name) for name in cls.NUMERIC})
+        return cls(columns)
+
+    def nbytes(self) -> int:
+        """Size of all arrays (what the batch costs when fully resident)."""
+        total = 0
+        for column in self.columns.values():
+            if isinstance(column, TextColumn):
+                total += column.data.nbytes + column.offsets.nbytes
+            else:
+                total += column.nbytes
+        return total
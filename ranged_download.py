@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+ranged_download.py
+Paralel, kaldığı yerden devam eden dosya indirici (HTTP Range)
+
+- Dosya SEGMENT_SIZE'lık bayt aralıklarına bölünür; PARALLEL_RANGES iş
+  parçacığı ortak bir bağlantı havuzu (requests.Session) üzerinden indirir
+- Yazma: 1 MB'lık parçalar os.pwrite ile doğrudan ofsetine; dosya
+  destekleniyorsa baştan ayrılır (posix_fallocate)
+- Devam: <hedef>.part + <hedef>.part.json (biten segmentler). Kopan
+  bağlantı yalnızca yarım kalan segmenti yeniden indirir
+- Doğrulama: boyut Pexels'in file_size değeri ve Content-Range ile
+  karşılaştırılır; tamamlanan dosya atomik olarak yerine taşınır
+- Sunucu Range desteklemiyorsa tek akışlı indirmeye düşülür
+
+Aynı hedefe eşzamanlı indirmeler .part dosyası üzerinde flock ile sıralanır.
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from job_workspace import atomic_output
+
+PARALLEL_RANGES = 4  # Aynı anda indirilen aralık sayısı
+SEGMENT_SIZE = 8 * 1024 * 1024  # Devam kaydının birimi
+WRITE_BUFFER = 1024 * 1024  # Diske tek seferde yazılan en az veri
+SEGMENT_RETRIES = 3
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 30
+
+
+class DownloadError(Exception):
+    """The server response does not match the expected file."""
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Shared session whose pool keeps one connection per parallel range."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=PARALLEL_RANGES * 2)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def preallocate(fd: int, size: int):
+    """Reserves `size` bytes (fewer fragments); plain truncate where unsupported."""
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except (AttributeError, OSError):
+        os.ftruncate(fd, size)
+
+
+def probe(url: str, session: requests.Session) -> tuple[str, int | None, bool]:
+    """
+    Asks for the first byte to learn the size and whether ranges work.
+
+    Returns:
+        (final URL after redirects, total size or None, ranges supported)
+    """
+    with session.get(url, headers={"Range": "bytes=0-0"}, stream=True,
+                     timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+        response.raise_for_status()
+        if response.status_code == 206:
+            total = response.headers.get("Content-Range", "").rpartition("/")[2]
+            return response.url, (int(total) if total.isdigit() else None), True
+        length = response.headers.get("Content-Length")
+        return response.url, (int(length) if length else None), False
+
+
+class _Progress:
+    """Completed segments of one .part file, persisted after each segment."""
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        self.done = set()
+        self.lock = threading.Lock()
+        try:
+            with open(path) as f:
+                state = json.load(f)
+            if state.get('size') == size:
+                self.done = set(state.get('done', []))
+        except (OSError, ValueError):
+            pass
+
+    def complete(self, index: int):
+        with self.lock:
+            self.done.add(index)
+            with atomic_output(self.path) as tmp:
+                with open(tmp, 'w') as f:
+                    json.dump({'size': self.size, 'done': sorted(self.done)}, f)
+
+
+def _fetch_segment(url: str, session: requests.Session, fd: int, start: int, end: int) -> int:
+    """Downloads bytes [start, end] into fd at their offset. Returns bytes written."""
+    with session.get(url, headers={"Range": f"bytes={start}-{end}"}, stream=True,
+                     timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise DownloadError(f"Range {start}-{end} answered with HTTP {response.status_code}")
+        offset = start
+        buffer = bytearray()
+        for chunk in response.iter_content(chunk_size=WRITE_BUFFER):
+            buffer += chunk
+            if len(buffer) >= WRITE_BUFFER:
+                os.pwrite(fd, buffer, offset)
+                offset += len(buffer)
+                buffer.clear()
+        if buffer:
+            os.pwrite(fd, buffer, offset)
+            offset += len(buffer)
+    if offset != end + 1:
+        raise DownloadError(f"Range {start}-{end} ended early at byte {offset}")
+    return offset - start
+
+
+def _fetch_segment_with_retry(url, session, fd, start, end) -> int:
+    for attempt in range(SEGMENT_RETRIES):
+        try:
+            return _fetch_segment(url, session, fd, start, end)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                requests.exceptions.ChunkedEncodingError, DownloadError):
+            if attempt == SEGMENT_RETRIES - 1:
+                raise
+            time.sleep(0.5 * 2 ** attempt)
+
+
+def _download_stream(url: str, session: requests.Session, fd: int) -> int:
+    """Single-stream fallback for servers without range support."""
+    os.ftruncate(fd, 0)
+    written = 0
+    with session.get(url, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=WRITE_BUFFER):
+            os.pwrite(fd, chunk, written)
+            written += len(chunk)
+    return written
+
+
+def download_file(
+    url: str,
+    dest: str,
+    expected_size: int | None = None,
+    parallel: int = PARALLEL_RANGES,
+    session: requests.Session | None = None
+) -> int:
+    """
+    Downloads `url` to `dest` with parallel byte ranges, resuming an earlier
+    partial download of the same size.
+
+    Args:
+        expected_size: Size announced by the API (e.g. Pexels file_size)
+
+    Returns:
+        Bytes transferred in this call (0 if dest already existed)
+
+    Raises:
+        DownloadError: Size mismatch or a range could not be completed
+        requests.exceptions.RequestException: HTTP / network failure
+    """
+    def complete() -> bool:
+        return os.path.exists(dest) and (not expected_size or os.path.getsize(dest) == expected_size)
+
+    if complete():
+        return 0
+    session = session or get_session()
+    part_path = dest + ".part"
+    state_path = part_path + ".json"
+    directory = os.path.dirname(dest)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Aynı dosyayı indiren başka işçiyi bekle; beklerken .part yerine
+    # taşındıysa elimizdeki tanıtıcı artık hedefe aittir → yeniden aç
+    while True:
+        fd = os.open(part_path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        if os.path.exists(part_path) and os.stat(part_path).st_ino == os.fstat(fd).st_ino:
+            break
+        os.close(fd)
+
+    try:
+        if complete():
+            if os.fstat(fd).st_size == 0:
+                os.remove(part_path)  # Diğer işçi bitirdi, boş .part kalmasın
+            return 0
+
+        url, size, ranged = probe(url, session)
+        if expected_size and size and size != expected_size:
+            raise DownloadError(f"Server reports {size} bytes, API announced {expected_size}")
+        size = size or expected_size
+
+        if ranged and size:
+            progress = _Progress(state_path, size)
+            if os.fstat(fd).st_size != size:
+                progress.done.clear()  # Farklı/bozuk kısmi dosya: baştan
+                os.ftruncate(fd, 0)
+                preallocate(fd, size)
+            segments = [(i, i * SEGMENT_SIZE, min(size, (i + 1) * SEGMENT_SIZE) - 1)
+                        for i in range((size + SEGMENT_SIZE - 1) // SEGMENT_SIZE)]
+            pending = [segment for segment in segments if segment[0] not in progress.done]
+
+            def fetch(segment) -> int:
+                index, start, end = segment
+                written = _fetch_segment_with_retry(url, session, fd, start, end)
+                progress.complete(index)
+                return written
+
+            with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(pending) or 1))) as pool:
+                transferred = sum(pool.map(fetch, pending))
+        else:
+            transferred = _download_stream(url, session, fd)
+
+        actual = os.fstat(fd).st_size
+        if (expected_size and actual != expected_size) or (size and actual != size):
+            raise DownloadError(f"Downloaded {actual} bytes, expected {expected_size or size}")
+        os.fsync(fd)
+        os.replace(part_path, dest)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return transferred
+    finally:
+        os.close(fd)
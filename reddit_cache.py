@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+reddit_cache.py
+Reddit listing ve yorum ağacı önbelleği (TTL + negatif önbellek)
+
+- Listeler (subreddit, sıralama, limit) anahtarıyla kısa süre saklanır
+- Yorum ağaçları post ID ile saklanır; TTL dolduğunda listedeki
+  num_comments değişmemişse yeniden indirilmeden tazelenir
+  (Reddit ETag desteklemediği için doğrulayıcı num_comments'tir)
+- "3'ten az yorum" gibi reddedilen postlar negatif önbelleğe girer ve
+  yeterince yorum kazanana veya süre dolana kadar tekrar indirilmez
+
+TTL'ler çevre değişkenleriyle ayarlanabilir:
+    SHORTS_LISTING_TTL, SHORTS_COMMENTS_TTL, SHORTS_REJECT_TTL (saniye)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+REDDIT_CACHE_DB = os.environ.get('SHORTS_REDDIT_CACHE', "reddit_cache.db")
+LISTING_TTL = float(os.environ.get('SHORTS_LISTING_TTL', '600'))  # 10 dk
+COMMENTS_TTL = float(os.environ.get('SHORTS_COMMENTS_TTL', '3600'))  # 1 saat
+REJECT_TTL = float(os.environ.get('SHORTS_REJECT_TTL', '21600'))  # 6 saat
+REJECT_RECHECK_GROWTH = 10  # Reddedilen post bu kadar yeni yorum alırsa tekrar dene
+PURGE_AFTER = 7 * 24 * 3600  # Bu kadar eski kayıtlar silinir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    key TEXT PRIMARY KEY,                 -- subreddit:sort:limit
+    posts_json TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS comment_trees (
+    post_id TEXT PRIMARY KEY,
+    num_comments INTEGER NOT NULL,
+    comments_json TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rejections (
+    post_id TEXT PRIMARY KEY,
+    reason TEXT NOT NULL,
+    num_comments INTEGER NOT NULL,
+    rejected_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def listing_key(subreddit: str, sort: str, limit: int) -> str:
+    return f"{subreddit.lower()}:{sort}:{limit}"
+
+
+class RedditCache:
+    """
+    Persistent response cache in front of the PRAW calls (thread-safe,
+    one SQLite connection per thread).
+    """
+
+    def __init__(
+        self,
+        path: str = REDDIT_CACHE_DB,
+        listing_ttl: float = LISTING_TTL,
+        comments_ttl: float = COMMENTS_TTL,
+        reject_ttl: float = REJECT_TTL
+    ):
+        self.path = path
+        self.listing_ttl = listing_ttl
+        self.comments_ttl = comments_ttl
+        self.reject_ttl = reject_ttl
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self.connection().executescript(SCHEMA)
+        self.purge()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    # --- Listings ---------------------------------------------------------
+
+    def get_listing(self, subreddit: str, sort: str, limit: int) -> list[dict] | None:
+        """Cached listing snapshots, or None if missing/expired."""
+        row = self.connection().execute(
+            "SELECT posts_json, fetched_at FROM listings WHERE key = ?",
+            (listing_key(subreddit, sort, limit),)
+        ).fetchone()
+        fresh = row is not None and time.time() - row[1] < self.listing_ttl
+        self._count(fresh)
+        return json.loads(row[0]) if fresh else None
+
+    def put_listing(self, subreddit: str, sort: str, limit: int, posts: list[dict]):
+        self.connection().execute(
+            "INSERT OR REPLACE INTO listings (key, posts_json, fetched_at) VALUES (?, ?, ?)",
+            (listing_key(subreddit, sort, limit), json.dumps(posts), time.time())
+        )
+
+    # --- Comment trees ----------------------------------------------------
+
+    def get_comments(self, post_id: str, num_comments: int) -> list[dict] | None:
+        """
+        Cached comments for a post. After the TTL the entry is revalidated
+        against the listing's num_comments: unchanged → reused and renewed.
+        """
+        conn = self.connection()
+        row = conn.execute(
+            "SELECT comments_json, num_comments, fetched_at FROM comment_trees WHERE post_id = ?",
+            (post_id,)
+        ).fetchone()
+        if row is None:
+            self._count(False)
+            return None
+
+        comments_json, cached_count, fetched_at = row
+        if time.time() - fetched_at >= self.comments_ttl:
+            if cached_count != num_comments:
+                self._count(False)
+                return None
+            conn.execute("UPDATE comment_trees SET fetched_at = ? WHERE post_id = ?", (time.time(), post_id))
+        self._count(True)
+        return json.loads(comments_json)
+
+    def put_comments(self, post_id: str, num_comments: int, comments: list[dict]):
+        self.connection().execute(
+            "INSERT OR REPLACE INTO comment_trees (post_id, num_comments, comments_json, fetched_at) "
+            "VALUES (?, ?, ?, ?)",
+            (post_id, num_comments, json.dumps(comments), time.time())
+        )
+
+    # --- Negative cache ---------------------------------------------------
+
+    def reject(self, post_id: str, reason: str, num_comments: int):
+        """Remembers that a post did not qualify (e.g. too few comments)."""
+        self.connection().execute(
+            "INSERT OR REPLACE INTO rejections (post_id, reason, num_comments, rejected_at) VALUES (?, ?, ?, ?)",
+            (post_id, reason, num_comments, time.time())
+        )
+
+    def rejected_among(self, posts: list[dict]) -> set:
+        """
+        IDs of listing posts that are still negatively cached: rejected less
+        than reject_ttl ago and without REJECT_RECHECK_GROWTH new comments.
+        """
+        if not posts:
+            return set()
+        by_id = {post['id']: post for post in posts}
+        placeholders = ",".join("?" * len(by_id))
+        rows = self.connection().execute(
+            f"SELECT post_id, num_comments, rejected_at FROM rejections WHERE post_id IN ({placeholders})",
+            tuple(by_id)
+        )
+        now = time.time()
+        rejected = set()
+        for post_id, count, rejected_at in rows:
+            grown = by_id[post_id].get('num_comments', 0) - count >= REJECT_RECHECK_GROWTH
+            if now - rejected_at < self.reject_ttl and not grown:
+                rejected.add(post_id)
+        return rejected
+
+    # --- Maintenance ------------------------------------------------------
+
+    def purge(self, older_than: float = PURGE_AFTER) -> int:
+        """Deletes entries that are far past every TTL."""
+        cutoff = time.time() - older_than
+        conn = self.connection()
+        removed = 0
+        removed += conn.execute("DELETE FROM listings WHERE fetched_at < ?", (cutoff,)).rowcount
+        removed += conn.execute("DELETE FROM comment_trees WHERE fetched_at < ?", (cutoff,)).rowcount
+        removed += conn.execute("DELETE FROM rejections WHERE rejected_at < ?", (cutoff,)).rowcount
+        return removed
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_reddit_cache(path: str | None = None) -> RedditCache:
+    """Returns the shared cache for this process."""
+    global _cache
+    with _cache_lock:
+        if _cache is None or (path and _cache.path != path):
+            path = path or REDDIT_CACHE_DB
+            _cache = RedditCache(path)
+        return _cache
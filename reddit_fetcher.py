@@ -4,11 +4,30 @@ reddit_fetcher.py
 Reddit API ile post çekme (PRAW wrapper)
 """
 
-import praw
 import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+from tracing import span
+from used_post_store import get_used_store, OUTCOME_UPLOADED
+from reddit_cache import RedditCache, get_reddit_cache
 
+# praw ilk girişte import edilir (başlangıç süresi)
+if TYPE_CHECKING:
+    import praw
 
-def authenticate_reddit() -> praw.Reddit | None:
+LISTING_LIMIT = 50  # Subreddit başına
+MULTIREDDIT_LIMIT = 100  # Reddit'in tek istekte döndürdüğü en fazla post (r/a+b+c)
+MIN_TITLE_LENGTH = 20
+MIN_COMMENTS = 3  # En az bu kadar kullanılabilir yorum
+MIN_COMMENT_LENGTH = 20
+TOP_COMMENTS_SCANNED = 10
+COMMENT_FETCH_WORKERS = 4  # Aynı anda indirilen yorum ağacı
+RANK_SAMPLE = 4  # Bu kadar uygun post toplanıp en iyisi seçilir (1 = ilk uygun post)
+
+
+def authenticate_reddit() -> "praw.Reddit | None":
     """
     Reddit API authentication.
     
@@ -25,17 +44,26 @@ def authenticate_reddit() -> praw.Reddit | None:
             print("❌ Reddit credentials not found in environment")
             return None
         
+        # İsteğe bağlı API adresleri (çevrimdışı benchmark sunucusu için)
+        endpoints = {}
+        if os.environ.get('REDDIT_OAUTH_URL'):
+            endpoints['oauth_url'] = os.environ['REDDIT_OAUTH_URL']
+        if os.environ.get('REDDIT_URL'):
+            endpoints['reddit_url'] = os.environ['REDDIT_URL']
+        
+        import praw
         reddit = praw.Reddit(
             client_id=client_id,
             client_secret=client_secret,
             user_agent=f'python:reddit-shorts-bot:v4.0 (by /u/{username})',
             username=username,
-            password=password
+            password=password,
+            **endpoints
         )
         
-        # Test authentication
-        reddit.user.me()
-        print(f"✅ Authenticated as u/{reddit.user.me().name}")
+        # Test authentication (tek istek)
+        user = reddit.user.me()
+        print(f"✅ Authenticated as u/{user.name}")
         
         return reddit
         
@@ -44,82 +72,357 @@ def authenticate_reddit() -> praw.Reddit | None:
         return None
 
 
-def fetch_popular_post(reddit: praw.Reddit, subreddit_name: str) -> dict | None:
+# PRAW thread-safe değil (oturum, hız sınırlayıcı, tembel Submission'lar).
+# Yorum ağaçları kalıcı bir iş parçacığı havuzunda indirilir; her iş
+# parçacığı aynı hesapla kendi Reddit örneğini kullanır ve onu çağrılar
+# arasında saklar (token her iş parçacığında bir kez alınır).
+_comment_pool = None
+_comment_pool_size = 0
+_comment_pool_lock = threading.Lock()
+_thread_clients = threading.local()
+
+
+def get_comment_pool(workers: int = COMMENT_FETCH_WORKERS) -> ThreadPoolExecutor:
+    """Shared pool for comment fetches (grown if more workers are asked for)."""
+    global _comment_pool, _comment_pool_size
+    workers = max(1, workers)
+    with _comment_pool_lock:
+        if _comment_pool is None or _comment_pool_size < workers:
+            if _comment_pool is not None:
+                _comment_pool.shutdown(wait=False)
+            _comment_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="comments")
+            _comment_pool_size = workers
+        return _comment_pool
+
+
+def thread_reddit(reddit: "praw.Reddit") -> "praw.Reddit":
+    """
+    This thread's own PRAW instance with the same credentials and endpoints
+    as `reddit` (created on first use in the thread).
+    """
+    clients = getattr(_thread_clients, 'clients', None)
+    if clients is None:
+        clients = _thread_clients.clients = {}
+    config = reddit.config
+    key = (config.client_id, config.username, config.oauth_url)
+    client = clients.get(key)
+    if client is None:
+        import praw
+        client = praw.Reddit(
+            client_id=config.client_id,
+            client_secret=config.client_secret,
+            user_agent=config.user_agent,
+            username=config.username,
+            password=config.password,
+            oauth_url=config.oauth_url,
+            reddit_url=config.reddit_url
+        )
+        clients[key] = client
+    return client
+
+
+def subreddit_list(subreddits: "str | list[str]") -> list[str]:
+    """"AskReddit", "a+b" or ["a", "b"] → ["a", "b"]."""
+    if isinstance(subreddits, str):
+        subreddits = subreddits.split("+")
+    return [name.strip() for name in subreddits if name.strip()]
+
+
+def subreddit_weight(weights: dict | None, subreddit: str) -> float:
+    """Case-insensitive weight lookup (missing = 1.0)."""
+    if not weights:
+        return 1.0
+    return {name.lower(): w for name, w in weights.items()}.get(subreddit.lower(), 1.0)
+
+
+def apply_quotas(posts: list[dict], quotas: dict | None) -> list[dict]:
+    """
+    Keeps at most quotas[subreddit] posts per subreddit, in listing order
+    (subreddits without a quota are not limited).
+    """
+    if not quotas:
+        return posts
+    remaining = {name.lower(): quota for name, quota in quotas.items()}
+    kept = []
+    for post in posts:
+        name = post.get('subreddit', '').lower()
+        if name in remaining:
+            if remaining[name] <= 0:
+                continue
+            remaining[name] -= 1
+        kept.append(post)
+    return kept
+
+
+def snapshot_submission(post) -> dict:
+    """
+    Plain-dict copy of the listing fields we use (cacheable, no PRAW object).
+    The source subreddit is part of the listing data (no extra request).
+    """
+    return {
+        'id': post.id,
+        'subreddit': post.subreddit.display_name,
+        'title': post.title,
+        'selftext': getattr(post, 'selftext', '') or '',
+        'permalink': post.permalink,
+        'score': post.score,
+        'stickied': post.stickied,
+        'over_18': post.over_18,
+        'num_comments': getattr(post, 'num_comments', MIN_COMMENTS),
+        'created_utc': getattr(post, 'created_utc', None),
+    }
+
+
+def fetch_listing(
+    reddit: "praw.Reddit",
+    subreddit_name: "str | list[str]",
+    cache: RedditCache | None = None,
+    sort: str = "hot"
+) -> list[dict]:
+    """
+    Listing snapshots ("hot", "top" of the day or "new"), served from the
+    cache while it is fresh. Several subreddits are fetched as one
+    multireddit listing (r/a+b+c): one request instead of one per subreddit.
+    """
+    names = subreddit_list(subreddit_name)
+    multireddit = "+".join(names)
+    limit = min(LISTING_LIMIT * len(names), MULTIREDDIT_LIMIT)
+    if cache:
+        cached = cache.get_listing(multireddit, sort, limit)
+        if cached is not None:
+            return cached
+
+    subreddit = reddit.subreddit(multireddit)
+    with span("reddit_listing", "network", subreddit=multireddit, sort=sort):
+        if sort == "top":
+            submissions = subreddit.top(time_filter="day", limit=limit)
+        else:
+            submissions = getattr(subreddit, sort)(limit=limit)
+        listing = [snapshot_submission(post) for post in submissions]
+    if cache:
+        cache.put_listing(multireddit, sort, limit, listing)
+    return listing
+
+
+def is_listing_candidate(post: dict, used_posts: set) -> bool:
+    """
+    Phase 1: cheap checks on listing fields only (no extra request).
+    """
+    if post['id'] in used_posts:
+        return False
+    if post['stickied'] or post['over_18']:
+        return False
+    if len(post['title']) < MIN_TITLE_LENGTH:
+        return False
+    # Yorum sayısı yetersizse yorum ağacını hiç indirme
+    if post['num_comments'] < MIN_COMMENTS:
+        return False
+    return True
+
+
+def extract_comments(reddit: "praw.Reddit", post: dict, cache: RedditCache | None = None) -> list[dict]:
+    """
+    Phase 2: fetches the comment tree (one request, or none if cached) and
+    returns the usable top-level comments. Runs in a comment pool thread,
+    so the request goes through that thread's own PRAW instance.
+    """
+    if cache:
+        cached = cache.get_comments(post['id'], post['num_comments'])
+        if cached is not None:
+            return cached
+
+    with span("reddit_comments", "network", post_id=post['id']):
+        submission = thread_reddit(reddit).submission(id=post['id'])
+        submission.comments.replace_more(limit=0)
+        top_level = submission.comments[:TOP_COMMENTS_SCANNED]
+
+    comments = []
+    for comment in top_level:
+        if hasattr(comment, 'body') and len(comment.body) > MIN_COMMENT_LENGTH:
+            comments.append({
+                'author': str(comment.author) if comment.author else 'deleted',
+                'body': comment.body,
+                'score': comment.score
+            })
+
+    if cache:
+        cache.put_comments(post['id'], post['num_comments'], comments)
+    return comments
+
+
+def build_post_data(post: dict, subreddit_name: str, comments: list[dict]) -> dict:
+    return {
+        'id': post['id'],
+        'title': post['title'],
+        'body': post['selftext'],
+        'subreddit': post.get('subreddit') or subreddit_name,
+        'url': f"https://reddit.com{post['permalink']}",
+        'score': post['score'],
+        'created_utc': post.get('created_utc'),
+        'comments': comments
+    }
+
+
+def iter_qualifying_posts(
+    reddit: "praw.Reddit",
+    subreddit_name: "str | list[str]",
+    exclude_ids: set | None = None,
+    workers: int = COMMENT_FETCH_WORKERS,
+    cache: RedditCache | None = None,
+    sort: str = "hot",
+    quotas: dict | None = None
+):
+    """
+    Yields every post of a listing that passes the eligibility rules, in
+    listing order, as post_data dictionaries.
+
+    Two phases: the listing (one request, also for several subreddits) is
+    filtered on its own fields and cut to the per-subreddit `quotas`, then
+    comment trees of the survivors are fetched concurrently (at most
+    `workers` in flight). Closing the generator cancels pending fetches.
+    """
+    multireddit = "+".join(subreddit_list(subreddit_name))
+    # Phase 1: listing, filtered without extra requests
+    listing = fetch_listing(reddit, subreddit_name, cache, sort)
+
+    # Used posts: one indexed lookup for the whole listing
+    used_posts = get_used_store().used_among(post['id'] for post in listing)
+    if exclude_ids:
+        used_posts |= set(exclude_ids)
+    candidates = [post for post in listing if is_listing_candidate(post, used_posts)]
+
+    # Reposts of used questions under a new ID: title check before any comment fetch
+    from near_duplicate_index import get_duplicate_index
+    duplicates = get_duplicate_index()
+    reposts = {post['id'] for post in candidates if duplicates.is_duplicate(post)}
+    if reposts:
+        print(f"   Skipped {len(reposts)} near-duplicate titles")
+        candidates = [post for post in candidates if post['id'] not in reposts]
+
+    # Recently rejected posts are not fetched again until they gain comments
+    rejected = cache.rejected_among(candidates) if cache else set()
+    candidates = apply_quotas([post for post in candidates if post['id'] not in rejected], quotas)
+    print(f"   r/{multireddit} {sort}: {len(listing)} posts, {len(candidates)} pass listing filters"
+          f" ({len(rejected)} recently rejected)")
+
+    # Phase 2: comment trees, a sliding window in listing order
+    pool = get_comment_pool(workers)
+    remaining = iter(candidates)
+    in_flight = deque()
+
+    def fill_window():
+        while len(in_flight) < max(1, workers):
+            post = next(remaining, None)
+            if post is None:
+                return
+            in_flight.append((post, pool.submit(extract_comments, reddit, post, cache)))
+
+    try:
+        fill_window()
+        while in_flight:
+            post, future = in_flight.popleft()
+            try:
+                comments = future.result()
+            except Exception as e:
+                print(f"⚠️  Could not load comments for {post['id']}: {e}")
+                fill_window()
+                continue
+            fill_window()
+
+            # Need at least 3 good comments
+            if len(comments) < MIN_COMMENTS:
+                if cache:
+                    cache.reject(post['id'], "few_comments", post['num_comments'])
+                continue
+
+            post_data = build_post_data(post, multireddit, comments)
+            if duplicates.is_duplicate(post_data):
+                # Aynı yorumlar: başka bir ID altında aynı konu
+                if cache:
+                    cache.reject(post['id'], "near_duplicate", post['num_comments'])
+                continue
+            yield post_data
+    finally:
+        # Kazanan bulunduysa kalan istekleri bekleme (havuz paylaşılıyor, kapatılmaz)
+        for _, future in in_flight:
+            future.cancel()
+
+
+def fetch_popular_post(
+    reddit: "praw.Reddit",
+    subreddit_name: "str | list[str]",
+    exclude_ids: set | None = None,
+    workers: int = COMMENT_FETCH_WORKERS,
+    use_cache: bool = True,
+    rank_sample: int = RANK_SAMPLE,
+    weights: dict | None = None,
+    quotas: dict | None = None
+) -> dict | None:
     """
-    Fetch a popular post from subreddit.
+    Fetch a popular post from subreddit: the first `rank_sample` hot posts
+    that pass the eligibility rules (see iter_qualifying_posts) are scored
+    by candidate_ranker and the best one is returned. With the default
+    sample equal to `workers`, the comment trees arrive in one window.
+    Listings, comment trees and rejections are cached (reddit_cache.py).
     
     Args:
         reddit: Authenticated PRAW instance
-        subreddit_name: Subreddit name (e.g., "AskReddit")
+        subreddit_name: Subreddit name (e.g., "AskReddit") or a list of
+            names, fetched as one multireddit listing
+        exclude_ids: Extra post IDs to skip (e.g. already claimed in this batch)
+        workers: Concurrent comment-tree fetches
+        use_cache: Use the local Reddit response cache
+        rank_sample: Qualifying posts to compare (1 = first one wins)
+        weights: {subreddit: factor} applied to the rank score (missing = 1.0)
+        quotas: {subreddit: max candidates per listing} (missing = no limit)
         
     Returns:
-        Post data dictionary or None
+        Post data dictionary (with its source 'subreddit') or None
     """
     try:
-        subreddit = reddit.subreddit(subreddit_name)
-        
-        # Load used posts
-        used_posts = set()
-        if os.path.exists('used_posts.txt'):
-            with open('used_posts.txt', 'r') as f:
-                used_posts = set(line.strip() for line in f if line.strip())
+        cache = get_reddit_cache() if use_cache else None
+        posts = iter_qualifying_posts(reddit, subreddit_name, exclude_ids, workers, cache, quotas=quotas)
+        try:
+            sample = [post for _, post in zip(range(max(1, rank_sample)), posts)]
+        finally:
+            posts.close()
         
-        # Fetch hot posts
-        for post in subreddit.hot(limit=50):
-            # Skip if already used
-            if post.id in used_posts:
-                continue
-            
-            # Skip if stickied or not suitable
-            if post.stickied or post.over_18:
-                continue
-            
-            # Must have good title
-            if len(post.title) < 20:
-                continue
-            
-            # Get top comments
-            post.comments.replace_more(limit=0)
-            comments = []
-            
-            for comment in post.comments[:10]:
-                if hasattr(comment, 'body') and len(comment.body) > 20:
-                    comments.append({
-                        'author': str(comment.author) if comment.author else 'deleted',
-                        'body': comment.body,
-                        'score': comment.score
-                    })
-            
-            # Need at least 3 good comments
-            if len(comments) < 3:
-                continue
-            
-            # Return post data
-            return {
-                'id': post.id,
-                'title': post.title,
-                'body': post.selftext if hasattr(post, 'selftext') else '',
-                'subreddit': subreddit_name,
-                'url': f"https://reddit.com{post.permalink}",
-                'score': post.score,
-                'comments': comments
-            }
+        if not sample:
+            print("❌ No suitable post found")
+            return None
+        if len(sample) == 1:
+            return sample[0]
         
-        print("❌ No suitable post found")
-        return None
+        from candidate_ranker import rank_posts
+        ranked = [(post, score * subreddit_weight(weights, post['subreddit'])) for post, score in rank_posts(sample)]
+        best, score = max(ranked, key=lambda item: item[1])
+        print(f"   Ranked {len(sample)} qualifying posts, best {best['id']} "
+              f"from r/{best['subreddit']} (score {score:.2f})")
+        return best
         
     except Exception as e:
         print(f"❌ Error fetching post: {e}")
         return None
 
 
-def mark_post_as_used(post_id: str):
+def mark_post_as_used(
+    post_id: str,
+    subreddit: str | None = None,
+    outcome: str = OUTCOME_UPLOADED,
+    post_data: dict | None = None
+):
     """
     Mark a post as used to avoid duplicates.
+
+    Args:
+        outcome: "uploaded" or "quota_saved" (saved for manual upload)
+        post_data: Title and comments are added to the near-duplicate index
     """
     try:
-        with open('used_posts.txt', 'a') as f:
-            f.write(f"{post_id}\n")
+        get_used_store().mark(post_id, subreddit=subreddit, outcome=outcome)
+        if post_data:
+            from near_duplicate_index import get_duplicate_index
+            get_duplicate_index().add(post_data)
         print(f"✅ Post {post_id} marked as used")
     except Exception as e:
         print(f"⚠️  Could not mark post as used: {e}")
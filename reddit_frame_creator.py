@@ -6,7 +6,9 @@ Metin daha sonra FFmpeg tarafından altyazı olarak eklenecek
 """
 
 from PIL import Image, ImageDraw, ImageFont
+import functools
 import os
+from job_workspace import atomic_output
 
 # Import configuration
 try:
@@ -23,6 +25,18 @@ except ImportError:
     SHOW_UPVOTE_ARROW = True
 
 
+@functools.lru_cache(maxsize=16)
+def load_font(path: str, size: int):
+    """
+    Loads a TrueType font once per process (kept warm in daemon mode).
+    """
+    try:
+        return ImageFont.truetype(path, size)
+    except Exception as e:
+        print(f"   Warning: Could not load font ({e}), using default")
+        return ImageFont.load_default()
+
+
 def create_reddit_frame(
     subreddit: str = "AskReddit",
     output_file: str = "reddit_frame.png",
@@ -52,12 +66,8 @@ def create_reddit_frame(
         img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
         draw = ImageDraw.Draw(img)
         
-        # Font yükle
-        try:
-            meta_font = ImageFont.truetype(FONT_PATH_REGULAR, FONT_SIZE_META)
-        except Exception as e:
-            print(f"   Warning: Could not load font ({e}), using default")
-            meta_font = ImageFont.load_default()
+        # Font yükle (önbellekten)
+        meta_font = load_font(FONT_PATH_REGULAR, FONT_SIZE_META)
         
         # Renkleri RGB tuple'a çevir
         bg_rgb = tuple(int(BACKGROUND_COLOR.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
@@ -120,7 +130,8 @@ def create_reddit_frame(
             ], fill=meta_rgb + (255,))
         
         # PNG olarak kaydet (Alpha kanalını korur)
-        img.save(output_file, 'PNG')
+        with atomic_output(output_file) as tmp_file:
+            img.save(tmp_file, 'PNG')
         
         file_size = os.path.getsize(output_file) / 1024
         print(f"✅ Reddit frame created: {output_file}")
@@ -3,8 +3,7 @@
 
 import os
 import praw
-
-USED_POSTS_FILE = "used_posts.txt"
+from used_post_store import get_used_store, OUTCOME_UPLOADED
 
 def get_top_reddit_post(subreddit: str) -> dict | None:
     """
@@ -48,12 +47,8 @@ def get_top_reddit_post(subreddit: str) -> dict | None:
             print(f"❌ Reddit authentication failed: {auth_err}")
             return None
         
-        # Load the set of used post IDs
-        if not os.path.exists(USED_POSTS_FILE):
-            open(USED_POSTS_FILE, 'w').close()
-            
-        with open(USED_POSTS_FILE, 'r') as f:
-            used_post_ids = set(line.strip() for line in f if line.strip() and not line.startswith('#'))
+        # Used post IDs (indexed store, see used_post_store.py)
+        used_store = get_used_store()
 
         
         # Fetch top posts from the subreddit
@@ -64,7 +59,7 @@ def get_top_reddit_post(subreddit: str) -> dict | None:
             posts_checked += 1
             
             # Skip if already used, is a video, or is NSFW
-            if submission.id in used_post_ids:
+            if submission.id in used_store:
                 print(f"  ⏭️  Post {submission.id}: already used")
                 continue
                 
@@ -108,8 +103,7 @@ def get_top_reddit_post(subreddit: str) -> dict | None:
             print(f"   ✅ Successfully fetched post with {comment_count} comments")
             
             # Add this post ID to our used list
-            with open(USED_POSTS_FILE, 'a') as f:
-                f.write(f"{submission.id}\n")
+            mark_post_as_used(submission.id, subreddit)
             
             return {
                 "id": submission.id,
@@ -129,3 +123,10 @@ def get_top_reddit_post(subreddit: str) -> dict | None:
         import traceback
         traceback.print_exc()
         return None
+
+
+def mark_post_as_used(post_id: str, subreddit: str | None = None, outcome: str = OUTCOME_UPLOADED):
+    """
+    Records a post in the used-post store so it is never picked again.
+    """
+    get_used_store().mark(post_id, subreddit=subreddit, outcome=outcome)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+rendition_selector.py
+Pexels video_files arasından maliyet modeliyle rendition seçimi
+
+Arka plan her zaman 1080x1920'ye ölçeklenip kırpılır (compose_video_v2).
+Bu yüzden en büyük dosya değil, bu kırpmayı kabul edilebilir kalitede
+karşılayan en ucuz dosya seçilir. Maliyet (tahmini saniye):
+
+- indirme: bayt / DOWNLOAD_BYTES_PER_SECOND (yerel kütüphanede varsa 0)
+- çözme:   genişlik x yükseklik x fps x süre / DECODE_PIXELS_PER_SECOND
+- ölçekleme: aynı piksel akışı / SCALE_PIXELS_PER_SECOND
+
+Kalite: kırpma penceresinin ne kadar büyütüldüğü (upscale). MAX_UPSCALE
+üstündeki dosyalar yalnızca başka seçenek yoksa seçilir. Kırpma israfı
+(çözülüp atılan piksel oranı) rapora eklenir.
+
+Rapor, eski kurala (1080 genişlik / 1920 yükseklik, yoksa en büyük dosya)
+göre tahmini bayt ve süre tasarrufunu da içerir.
+"""
+
+import os
+
+from background_library import rendition_key
+
+TARGET_WIDTH = 1080
+TARGET_HEIGHT = 1920
+MAX_UPSCALE = 1.25  # Kırpma penceresi en fazla bu kadar büyütülebilir
+DOWNLOAD_BYTES_PER_SECOND = float(os.environ.get('SHORTS_DOWNLOAD_MBPS', '20')) * 1e6
+DECODE_PIXELS_PER_SECOND = 400e6  # Yazılım H.264 çözme (tek iş)
+SCALE_PIXELS_PER_SECOND = 600e6  # swscale bicubic
+ESTIMATED_BITS_PER_PIXEL = 0.1  # file_size yoksa boyut tahmini
+DEFAULT_FPS = 30
+
+
+def upscale_factor(width: int, height: int) -> float:
+    """Scale needed so the frame covers TARGET_WIDTH x TARGET_HEIGHT (>1 = upscale)."""
+    return max(TARGET_WIDTH / width, TARGET_HEIGHT / height)
+
+
+def rendition_cost(video_file: dict, duration: float, local: bool = False) -> dict:
+    """
+    Cost estimate of using one video_files entry for a `duration`-second clip.
+
+    Args:
+        local: The rendition is already in the background library
+
+    Returns:
+        {'bytes', 'download_s', 'decode_s', 'scale_s', 'seconds', 'upscale', 'crop_waste'}
+    """
+    width, height = video_file['width'], video_file['height']
+    fps = video_file.get('fps') or DEFAULT_FPS
+    pixels = width * height * fps * duration
+    size = video_file.get('file_size') or pixels * ESTIMATED_BITS_PER_PIXEL / 8
+
+    scale = upscale_factor(width, height)
+    crop_pixels = (TARGET_WIDTH / scale) * (TARGET_HEIGHT / scale)
+    download_s = 0.0 if local else size / DOWNLOAD_BYTES_PER_SECOND
+    decode_s = pixels / DECODE_PIXELS_PER_SECOND
+    scale_s = pixels / SCALE_PIXELS_PER_SECOND
+    return {
+        'bytes': int(size),
+        'download_s': round(download_s, 3),
+        'decode_s': round(decode_s, 3),
+        'scale_s': round(scale_s, 3),
+        'seconds': round(download_s + decode_s + scale_s, 3),
+        'upscale': round(scale, 3),
+        'crop_waste': round(1 - crop_pixels / (width * height), 3),
+    }
+
+
+def usable_files(video_files: list[dict]) -> list[dict]:
+    """Progressive MP4 entries with known dimensions (HLS playlists are skipped)."""
+    return [vf for vf in video_files
+            if vf.get('width') and vf.get('height') and vf.get('link')
+            and vf.get('file_type', 'video/mp4') == 'video/mp4']
+
+
+def legacy_choice(video_files: list[dict]) -> dict | None:
+    """The previous rule: first 1080-wide or 1920-tall file, else the largest."""
+    for vf in video_files:
+        if vf.get('width', 0) == 1080 or vf.get('height', 0) == 1920:
+            return vf
+    if video_files:
+        return max(video_files, key=lambda x: (x.get('width') or 0) * (x.get('height') or 0))
+    return None
+
+
+def select_rendition(
+    video_files: list[dict],
+    duration: float,
+    local_renditions: set | None = None,
+    max_upscale: float = MAX_UPSCALE
+) -> dict | None:
+    """
+    Picks the cheapest rendition that covers the 1080x1920 crop within
+    `max_upscale`; if none does, the sharpest one.
+
+    Args:
+        local_renditions: Rendition keys ('WxH') already downloaded (no download cost)
+
+    Returns:
+        {'file': video_file, 'cost': {...}, 'baseline_cost': {...} | None,
+         'saved_bytes': int, 'saved_seconds': float} or None
+    """
+    local_renditions = local_renditions or set()
+    files = usable_files(video_files)
+    if not files:
+        return None
+
+    costs = [(vf, rendition_cost(vf, duration, local=rendition_key(vf) in local_renditions))
+             for vf in files]
+    acceptable = [(vf, cost) for vf, cost in costs if cost['upscale'] <= max_upscale]
+    if acceptable:
+        chosen, cost = min(acceptable, key=lambda item: item[1]['seconds'])
+    else:
+        chosen, cost = min(costs, key=lambda item: (item[1]['upscale'], item[1]['seconds']))
+
+    baseline = legacy_choice(files)
+    baseline_cost = next(c for vf, c in costs if vf is baseline) if baseline is not None else None
+    return {
+        'file': chosen,
+        'cost': cost,
+        'baseline_cost': baseline_cost,
+        'saved_bytes': max(0, baseline_cost['bytes'] - cost['bytes']) if baseline_cost else 0,
+        'saved_seconds': round(max(0.0, baseline_cost['seconds'] - cost['seconds']), 3) if baseline_cost else 0.0,
+    }
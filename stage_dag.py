@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+stage_dag.py
+İş içi aşama bağımlılık grafiği (tek asyncio döngüsü)
+
+Her aşama bağımlı olduğu aşamaları bekler; bağımsız aşamalar (ör. çerçeve
+oluşturma ile seslendirme) kendiliğinden aynı anda çalışır. Böylece bir
+shorts'un süresi yaklaşık olarak kritik yolun uzunluğuna iner.
+"""
+
+import asyncio
+import time
+
+
+def topological_order(specs: dict) -> list[str]:
+    """
+    Orders stages so that every stage comes after its requirements.
+
+    Raises:
+        ValueError: Unknown requirement or dependency cycle
+    """
+    order = []
+    state = {}  # name -> "visiting" | "done"
+
+    def visit(name: str, path: tuple):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Dependency cycle: {' → '.join(path + (name,))}")
+        if name not in specs:
+            raise ValueError(f"Unknown stage: {name}")
+        state[name] = "visiting"
+        for dep in specs[name]['requires']:
+            visit(dep, path + (name,))
+        state[name] = "done"
+        order.append(name)
+
+    for name in specs:
+        visit(name, ())
+    return order
+
+
+def critical_path(specs: dict, timings: dict) -> tuple[list[str], float]:
+    """
+    Longest chain of stage durations through the graph.
+
+    Args:
+        specs: Stage specs with 'requires'
+        timings: {name: (start, end)} of stages that ran
+
+    Returns:
+        ([stage, ...], total_seconds)
+    """
+    best = {}  # name -> (total, path)
+    for name in topological_order(specs):
+        if name not in timings:
+            continue
+        start, end = timings[name]
+        prev = max(
+            (best[dep] for dep in specs[name]['requires'] if dep in best),
+            default=(0.0, [])
+        )
+        best[name] = (prev[0] + (end - start), prev[1] + [name])
+
+    if not best:
+        return [], 0.0
+    total, path = max(best.values())
+    return path, total
+
+
+async def run_dag(job: dict, specs: dict, runner) -> bool:
+    """
+    Runs all stages of one job on the current event loop.
+
+    Args:
+        job: Job dictionary shared by all stages
+        specs: {name: {'requires': [...], ...}}
+        runner: async runner(job, name) -> bool
+
+    Returns:
+        True if every stage succeeded
+    """
+    topological_order(specs)  # Döngü/eksik bağımlılık kontrolü
+
+    loop = asyncio.get_running_loop()
+    failed = asyncio.Event()
+    tasks = {}
+    timings = {}
+    started = loop.time()
+
+    async def run_node(name: str) -> bool:
+        deps = specs[name]['requires']
+        if deps:
+            results = await asyncio.gather(*(tasks[dep] for dep in deps))
+            if not all(results):
+                return False
+        if failed.is_set():
+            return False
+
+        print(f"▶️  [{name}] started")
+        stage_start = loop.time()
+        try:
+            ok = await runner(job, name)
+        except Exception as e:
+            print(f"❌ Stage '{name}' crashed: {e}")
+            ok = False
+        timings[name] = (stage_start - started, loop.time() - started)
+
+        if ok:
+            print(f"✅ [{name}] done in {timings[name][1] - timings[name][0]:.1f}s")
+        else:
+            job['failed_stage'] = name
+            failed.set()
+        return ok
+
+    for name in specs:
+        tasks[name] = asyncio.ensure_future(run_node(name))
+
+    results = await asyncio.gather(*tasks.values())
+    job['stage_timings'] = timings
+
+    print_dag_report(specs, timings, loop.time() - started)
+    return all(results)
+
+
+def print_dag_report(specs: dict, timings: dict, wall: float):
+    """
+    Prints per-stage timeline, serial sum and critical path.
+    """
+    serial = sum(end - start for start, end in timings.values())
+    path, path_time = critical_path(specs, timings)
+
+    print()
+    print("📊 Stage timeline:")
+    for name, (start, end) in sorted(timings.items(), key=lambda kv: kv[1][0]):
+        print(f"   {name:18s} {start:6.1f}s → {end:6.1f}s  ({end - start:5.1f}s)")
+    print(f"   Wall time: {wall:.1f}s (serial sum {serial:.1f}s)")
+    print(f"   Critical path: {' → '.join(path)} ({path_time:.1f}s)")
+    print()
+
+
+def run_dag_sync(job: dict, specs: dict, runner) -> bool:
+    """
+    Synchronous entry point: one event loop for the whole job.
+    """
+    started = time.perf_counter()
+    ok = asyncio.run(run_dag(job, specs, runner))
+    job['wall_time'] = time.perf_counter() - started
+    return ok
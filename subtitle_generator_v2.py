@@ -5,10 +5,12 @@ Gelişmiş altyazı üreteci: Soru > Cevap akışı
 Cümle düzeyinde karaoke efekti (edge-tts ile)
 """
 
-import edge_tts
 import asyncio
+import os
 import re
 from datetime import timedelta
+from job_workspace import atomic_output
+from tracing import span
 
 
 def format_srt_time(seconds: float) -> str:
@@ -92,23 +94,34 @@ async def generate_audio_with_flow(
         
         print(f"   Total text length: {len(full_text)} characters")
         
-        # edge-tts ile ses ve zamanlama üret
-        communicate = edge_tts.Communicate(full_text, voice, rate=rate)
-        
-        submaker = edge_tts.SubMaker()
+        # edge-tts ile ses ve zamanlama üret (ilk kullanımda import edilir)
+        # (TTS_STANDIN_URL: çevrimdışı benchmark için yerel ton sunucusu, edge-tts gerekmez)
+        standin_url = os.environ.get('TTS_STANDIN_URL')
+        if standin_url:
+            from offline_services import StandinSubMaker, standin_tts_stream
+            stream = standin_tts_stream(standin_url, full_text)
+            submaker = StandinSubMaker()
+        else:
+            import edge_tts
+            communicate = edge_tts.Communicate(full_text, voice, rate=rate)
+            stream = communicate.stream()
+            submaker = edge_tts.SubMaker()
         
         # Ses üret ve zamanlama bilgisini topla
         print("   Generating audio with edge-tts...")
-        with open(audio_file, "wb") as audio_out:
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    audio_out.write(chunk["data"])
-                elif chunk["type"] == "WordBoundary":
-                    # Kelime zamanlama bilgisi
-                    submaker.create_sub(
-                        (chunk["offset"], chunk["duration"]),
-                        chunk["text"]
-                    )
+        # Geçici dosyaya yaz, akış tamamlanınca atomik olarak yerine taşı
+        with atomic_output(audio_file) as tmp_audio, span("edge_tts", "network", chars=len(full_text)) as s:
+            with open(tmp_audio, "wb") as audio_out:
+                async for chunk in stream:
+                    if chunk["type"] == "audio":
+                        audio_out.write(chunk["data"])
+                        s.add_bytes(len(chunk["data"]))
+                    elif chunk["type"] == "WordBoundary":
+                        # Kelime zamanlama bilgisi
+                        submaker.create_sub(
+                            (chunk["offset"], chunk["duration"]),
+                            chunk["text"]
+                        )
         
         print(f"✅ Audio generated: {audio_file}")
         
@@ -122,11 +135,12 @@ async def generate_audio_with_flow(
         grouped_subs = group_subtitles(raw_subs, words_per_chunk=4)
         
         # SRT formatında kaydet
-        with open(subtitle_file, 'w', encoding='utf-8') as f:
-            for i, sub in enumerate(grouped_subs, 1):
-                f.write(f"{i}\n")
-                f.write(f"{sub['start']} --> {sub['end']}\n")
-                f.write(f"{sub['text']}\n\n")
+        with atomic_output(subtitle_file) as tmp_subs:
+            with open(tmp_subs, 'w', encoding='utf-8') as f:
+                for i, sub in enumerate(grouped_subs, 1):
+                    f.write(f"{i}\n")
+                    f.write(f"{sub['start']} --> {sub['end']}\n")
+                    f.write(f"{sub['text']}\n\n")
         
         print(f"✅ Subtitles generated: {subtitle_file}")
         print(f"   Total subtitle chunks: {len(grouped_subs)}")
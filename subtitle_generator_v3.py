@@ -5,9 +5,9 @@ Fallback audio generator using gTTS (Google Text-to-Speech)
 More reliable than edge-tts for production use
 """
 
-from gtts import gTTS
 import os
 from datetime import timedelta
+from job_workspace import atomic_output
 
 
 def format_srt_time(seconds: float) -> str:
@@ -45,7 +45,8 @@ def generate_audio_with_flow_gtts(
     subtitle_file: str = "subtitles.srt",
     lang: str = "en",
     slow: bool = False,
-    pause_between: float = 1.0
+    pause_between: float = 1.0,
+    work_dir: str | None = None
 ) -> tuple[str, str] | None:
     """
     Generates audio and subtitles with question > answer flow using gTTS.
@@ -58,6 +59,8 @@ def generate_audio_with_flow_gtts(
         lang: Language code (en, tr, etc.)
         slow: Whether to use slow speech
         pause_between: Pause between question/answers (seconds)
+        work_dir: Directory for temporary segment files
+            (default: the directory of audio_file, i.e. the job workspace)
         
     Returns:
         (audio_file, subtitle_file) or None
@@ -66,6 +69,9 @@ def generate_audio_with_flow_gtts(
     print(f"   Language: {lang}")
     print(f"   Title + {len(comments)} comments")
     
+    if work_dir is None:
+        work_dir = os.path.dirname(os.path.abspath(audio_file))
+    
     try:
         # Prepare segments
         segments = []
@@ -93,11 +99,18 @@ def generate_audio_with_flow_gtts(
         
         for seg_idx, segment in enumerate(segments):
             # Generate audio for this segment
-            temp_file = f"temp_segment_{seg_idx}.mp3"
+            temp_file = os.path.join(work_dir, f"temp_segment_{seg_idx}.mp3")
             temp_files.append(temp_file)
             
-            tts = gTTS(text=segment['text'], lang=lang, slow=slow)
-            tts.save(temp_file)
+            standin_url = os.environ.get('TTS_STANDIN_URL')
+            if standin_url:
+                # Offline benchmark: generated tone from the local stand-in
+                from offline_services import standin_tts_save
+                standin_tts_save(standin_url, segment['text'], temp_file)
+            else:
+                from gtts import gTTS
+                tts = gTTS(text=segment['text'], lang=lang, slow=slow)
+                tts.save(temp_file)
             
             # Estimate duration
             duration = estimate_speech_duration(segment['text'])
@@ -120,10 +133,12 @@ def generate_audio_with_flow_gtts(
         print("   Combining audio segments...")
         
         # Create concat file for ffmpeg
-        concat_file = "temp_concat.txt"
+        # (concat resolves relative entries against the list file's directory)
+        concat_file = os.path.join(work_dir, "temp_concat.txt")
+        silence_file = os.path.join(work_dir, "silence.mp3")
         with open(concat_file, 'w') as f:
             for temp_file in temp_files:
-                f.write(f"file '{temp_file}'\n")
+                f.write(f"file '{os.path.basename(temp_file)}'\n")
                 # Add silence between segments
                 if temp_file != temp_files[-1]:
                     f.write(f"file 'silence.mp3'\n")
@@ -134,16 +149,17 @@ def generate_audio_with_flow_gtts(
         subprocess.run([
             'ffmpeg', '-f', 'lavfi', '-i', 
             f'anullsrc=r=44100:cl=mono:d={silence_duration}',
-            '-y', 'silence.mp3'
+            '-y', silence_file
         ], check=True, capture_output=True)
         
         # Combine all segments
-        subprocess.run([
-            'ffmpeg', '-f', 'concat', '-safe', '0',
-            '-i', concat_file,
-            '-c', 'copy',
-            '-y', audio_file
-        ], check=True, capture_output=True)
+        with atomic_output(audio_file) as tmp_audio:
+            subprocess.run([
+                'ffmpeg', '-f', 'concat', '-safe', '0',
+                '-i', concat_file,
+                '-c', 'copy',
+                '-y', tmp_audio
+            ], check=True, capture_output=True)
         
         # Clean up temp files
         for temp_file in temp_files:
@@ -151,17 +167,18 @@ def generate_audio_with_flow_gtts(
                 os.remove(temp_file)
         if os.path.exists(concat_file):
             os.remove(concat_file)
-        if os.path.exists('silence.mp3'):
-            os.remove('silence.mp3')
+        if os.path.exists(silence_file):
+            os.remove(silence_file)
         
         # Write subtitle file
         print("   Writing subtitle file...")
-        with open(subtitle_file, 'w', encoding='utf-8') as f:
-            for entry in subtitle_entries:
-                f.write(f"{entry['index']}\n")
-                f.write(f"{format_srt_time(entry['start'])} --> {format_srt_time(entry['end'])}\n")
-                f.write(f"{entry['text']}\n")
-                f.write("\n")
+        with atomic_output(subtitle_file) as tmp_subs:
+            with open(tmp_subs, 'w', encoding='utf-8') as f:
+                for entry in subtitle_entries:
+                    f.write(f"{entry['index']}\n")
+                    f.write(f"{format_srt_time(entry['start'])} --> {format_srt_time(entry['end'])}\n")
+                    f.write(f"{entry['text']}\n")
+                    f.write("\n")
         
         print(f"✅ Audio saved: {audio_file}")
         print(f"✅ Subtitles saved: {subtitle_file}")
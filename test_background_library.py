@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+test_background_library.py
+Tests for the local background video library
+
+Tests:
+1. Inventory / pick: local clips are used in least-recently-used order
+2. Disk budget: least recently used clips are evicted, the new one stays
+3. Materialize + prune: hard-linked job copies survive eviction, in-flight temp files stay
+4. Normalize: clips become 1080x1920@30 mezzanines once, even with concurrent workers (needs FFmpeg)
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from background_library import (
+    BackgroundLibrary, MIN_INVENTORY, MEZZANINE_FPS, MEZZANINE_HEIGHT, MEZZANINE_WIDTH,
+    NORMALIZE_DONE, NORMALIZE_FAILED, STALE_PART_HOURS, rendition_key
+)
+
+
+def add_clip(library: BackgroundLibrary, video_id: int, query: str, duration: float,
+             size: int = 1000) -> dict:
+    """Writes a fake downloaded rendition and records it."""
+    rendition = rendition_key({'width': 1080, 'height': 1920})
+    path = library.path_for(video_id, rendition)
+    with open(path, 'wb') as f:
+        f.write(b"\0" * size)
+    return library.add(video_id, rendition, path, query, duration, 1080, 1920)
+
+
+def test_inventory():
+    """
+    Test 1: Local inventory answers before the network
+    """
+    print("=" * 70)
+    print("TEST 1: Inventory and Pick")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        library = BackgroundLibrary(root)
+        for i in range(MIN_INVENTORY):
+            add_clip(library, 100 + i, "ocean waves relaxing", 40 + i)
+        add_clip(library, 200, "ocean waves relaxing", 120)
+        add_clip(library, 300, "rain forest nature", 45)
+
+        ocean = library.inventory(30, 70, "ocean waves relaxing")
+        if ocean != MIN_INVENTORY or library.inventory(30, 70) != MIN_INVENTORY + 1:
+            print(f"❌ FAILED: Inventory {ocean}")
+            return False
+        print(f"✅ {ocean} ocean clips in 30-70s (the 120s clip is outside the range)")
+
+        if library.get(100, "1080x1920") is None or library.get(100, "720x1280") is not None:
+            print("❌ FAILED: Lookup by (video ID, rendition)")
+            return False
+        print("✅ Lookup by (video ID, rendition)")
+
+        random.seed(5)
+        picked = [library.pick(30, 70, "ocean waves relaxing")['video_id'] for _ in range(20)]
+        if any(a == b for a, b in zip(picked, picked[1:])) or len(set(picked)) != MIN_INVENTORY:
+            print(f"❌ FAILED: Picks {picked}")
+            return False
+        print(f"✅ 20 picks rotated through all {MIN_INVENTORY} clips, never the same one twice in a row")
+
+        if library.pick(200, 300, "rain forest nature") is not None:
+            print("❌ FAILED: Picked a clip outside the range")
+            return False
+        print("✅ Empty range → None (caller downloads)")
+
+    print()
+    print("✅ TEST 1 PASSED")
+    print()
+    return True
+
+
+def test_budget():
+    """
+    Test 2: Eviction keeps the library within its disk budget
+    """
+    print("=" * 70)
+    print("TEST 2: Disk Budget")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        library = BackgroundLibrary(root, budget_mb=1)
+        clip = 300 * 1024
+        for i in range(3):
+            add_clip(library, i, "q", 45, size=clip)
+        library.touch(library.get(0, "1080x1920"))  # 0 artık en yeni kullanılan
+        add_clip(library, 3, "q", 45, size=clip)
+
+        ids = sorted(entry['video_id'] for entry in library.candidates(0, 100))
+        if library.total_bytes() > library.budget_bytes or ids != [0, 2, 3]:
+            print(f"❌ FAILED: Kept {ids}, {library.total_bytes()} bytes")
+            return False
+        if os.path.exists(library.path_for(1, "1080x1920")):
+            print("❌ FAILED: Evicted file still on disk")
+            return False
+        print(f"✅ Least recently used clip evicted, kept {ids} "
+              f"({library.total_bytes() / 1024:.0f} KB of {library.budget_bytes / 1024:.0f} KB)")
+
+        add_clip(library, 4, "q", 45, size=2 * 1024 * 1024)
+        if library.get(4, "1080x1920") is None:
+            print("❌ FAILED: Clip larger than the budget was evicted right away")
+            return False
+        print("✅ Just-added clip is never evicted")
+
+    print()
+    print("✅ TEST 2 PASSED")
+    print()
+    return True
+
+
+def test_materialize():
+    """
+    Test 3: Job copies are hard links and the index heals itself
+    """
+    print("=" * 70)
+    print("TEST 3: Materialize and Prune")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        library = BackgroundLibrary(os.path.join(root, "library"))
+        entry = add_clip(library, 7, "q", 45)
+        job_file = library.materialize(entry, os.path.join(root, "job", "background.mp4"))
+        if os.stat(job_file).st_ino != os.stat(entry['path']).st_ino:
+            print("⚠️  Copied instead of hard-linked (different filesystem?)")
+        else:
+            print("✅ Job file is a hard link (no copy)")
+
+        library.evict(budget_bytes=0)
+        if not os.path.exists(job_file) or len(library):
+            print("❌ FAILED: Eviction broke the job file or left the entry")
+            return False
+        print("✅ Job file survives eviction of the library copy")
+
+        add_clip(library, 8, "q", 45)
+        os.remove(library.path_for(8, "1080x1920"))
+        with open(os.path.join(library.root, "orphan.mp4"), 'wb') as f:
+            f.write(b"x")
+        if library.prune() != (1, 1) or len(library):
+            print("❌ FAILED: Prune")
+            return False
+        print("✅ Prune dropped the missing entry and the unindexed file")
+
+        # Süren bir dönüşümün geçici dosyası silinmemeli, eskimiş olanı silinmeli
+        active = os.path.join(library.root, ".9_1080x1920.mezz.1a2b3c4d.part.mp4")
+        stale = os.path.join(library.root, ".9_1080x1920.mezz.5e6f7a8b.part.mp4")
+        for path in (active, stale):
+            with open(path, 'wb') as f:
+                f.write(b"x")
+        old = time.time() - STALE_PART_HOURS * 3600 - 60
+        os.utime(stale, (old, old))
+        if library.prune() != (0, 1) or not os.path.exists(active) or os.path.exists(stale):
+            print("❌ FAILED: Prune touched an in-flight transcode or kept a stale one")
+            return False
+        print("✅ In-flight *.part.mp4 kept, stale one deleted")
+
+    print()
+    print("✅ TEST 3 PASSED")
+    print()
+    return True
+
+
+def test_normalize():
+    """
+    Test 4: One-time mezzanine transcode replaces the source
+    """
+    print("=" * 70)
+    print("TEST 4: Mezzanine Normalization")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        library = BackgroundLibrary(root)
+        entry = add_clip(library, 1, "q", 45)
+        results = []
+        workers = [threading.Thread(target=lambda: results.append(library.normalize(entry)))
+                   for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        if any(r['normalized'] != NORMALIZE_FAILED or not os.path.exists(r['path']) for r in results):
+            print("❌ FAILED: Unreadable clip should keep its source")
+            return False
+        broken = library.get(1, "1080x1920")
+        if broken['normalized'] != NORMALIZE_FAILED:
+            print("❌ FAILED: Concurrent normalizations left the wrong state")
+            return False
+        if library.normalize(library.get(1, "1080x1920")) != library.get(1, "1080x1920"):
+            print("❌ FAILED: Failed clip was retried")
+            return False
+        print("✅ Failed transcode (3 concurrent workers) keeps the source and is not retried")
+
+        if not shutil.which("ffmpeg"):
+            print("⚠️  SKIPPED: FFmpeg not installed, no real transcode")
+            print()
+            print("✅ TEST 4 PASSED")
+            print()
+            return True
+
+        from ffmpeg_composer_v2 import get_video_stream_info
+        from offline_services import make_test_clip
+
+        source = library.path_for(2, "1920x1080")
+        make_test_clip(source, 1920, 1080, 3, fps=60)
+        entry = library.add(2, "1920x1080", source, "q", 3, 1920, 1080)
+        results = []
+        workers = [threading.Thread(target=lambda: results.append(library.normalize(entry)))
+                   for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        if len({r['path'] for r in results}) != 1 or not all(os.path.exists(r['path']) for r in results):
+            print(f"❌ FAILED: Concurrent workers got different or missing files {results}")
+            return False
+        print("✅ 3 concurrent workers share one transcode")
+        normalized = results[0]
+        stream = get_video_stream_info(normalized['path'])
+        expected = (MEZZANINE_WIDTH, MEZZANINE_HEIGHT, MEZZANINE_FPS)
+        if normalized['normalized'] != NORMALIZE_DONE or (stream['width'], stream['height'],
+                                                           round(stream['fps'])) != expected:
+            print(f"❌ FAILED: Mezzanine {stream}")
+            return False
+        if os.path.exists(source) or library.get(2, "1920x1080")['path'] != normalized['path']:
+            print("❌ FAILED: Source not replaced under the same rendition key")
+            return False
+        print(f"✅ 1920x1080@60 source → {MEZZANINE_WIDTH}x{MEZZANINE_HEIGHT}@{MEZZANINE_FPS} mezzanine, "
+              f"still found as rendition 1920x1080")
+
+    print()
+    print("✅ TEST 4 PASSED")
+    print()
+    return True
+
+
+def main():
+    results = {
+        'inventory': test_inventory(),
+        'budget': test_budget(),
+        'materialize': test_materialize(),
+        'normalize': test_normalize(),
+    }
+
+    print("=" * 70)
+    print("TEST SUMMARY")
+    print("=" * 70)
+    for test_name, result in results.items():
+        status = "✅ PASSED" if result else "❌ FAILED"
+        print(f"  {test_name.upper():15s} {status}")
+
+    sys.exit(0 if all(results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
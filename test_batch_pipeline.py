@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+test_batch_pipeline.py
+Tests for the stage-pipelined batch scheduler (stub stages, no network)
+
+Tests:
+1. Overlap: stage groups run concurrently, callbacks see every job
+2. Back-pressure: bounded queues limit the jobs in flight
+3. Source failure: no new jobs start, skipped jobs are reported as failed
+4. Crashes and failing callbacks never hang the pipeline
+"""
+
+import sys
+import threading
+import time
+
+from batch_pipeline import SKIPPED, run_pipeline
+
+STAGE_SECONDS = 0.05
+
+
+def sleeper(name: str, seconds: float = STAGE_SECONDS):
+    def stage(job: dict) -> bool:
+        time.sleep(seconds)
+        job.setdefault('ran', []).append(name)
+        return True
+    stage.__name__ = name
+    return stage
+
+
+def make_jobs(count: int, log: list | None = None):
+    for i in range(count):
+        if log is not None:
+            log.append(i)
+        yield {'index': i}
+
+
+def run_with_timeout(seconds: float = 10, **kwargs) -> dict | None:
+    """run_pipeline in a thread; None if it did not finish (hang)."""
+    report = {}
+    thread = threading.Thread(target=lambda: report.update(run_pipeline(**kwargs)), daemon=True)
+    thread.start()
+    thread.join(seconds)
+    return None if thread.is_alive() else report
+
+
+def test_overlap():
+    """
+    Test 1: Groups overlap; wall time is far below the serial sum
+    """
+    print("=" * 70)
+    print("TEST 1: Stage Overlap")
+    print("=" * 70)
+
+    jobs = 6
+    completed, failed = [], []
+    report = run_with_timeout(
+        jobs=make_jobs(jobs),
+        stage_groups=[("fetch", [sleeper("fetch")]), ("render", [sleeper("render")]),
+                      ("upload", [sleeper("upload")])],
+        queue_size=2,
+        on_complete=completed.append,
+        on_failed=failed.append
+    )
+    if report is None:
+        print("❌ FAILED: Pipeline hung")
+        return False
+
+    serial = jobs * 3 * STAGE_SECONDS
+    pipelined = (jobs + 2) * STAGE_SECONDS
+    if report['completed'] != jobs or report['failed'] or failed:
+        print(f"❌ FAILED: Report {report}")
+        return False
+    if [job['index'] for job in completed] != list(range(jobs)) or \
+            any(job['ran'] != ["fetch", "render", "upload"] for job in completed):
+        print("❌ FAILED: Jobs completed out of order or skipped a stage")
+        return False
+    print(f"✅ {jobs} jobs completed in order, on_complete called for each")
+
+    if report['elapsed'] > (serial + pipelined) / 2:
+        print(f"❌ FAILED: {report['elapsed']:.2f}s, serial would be {serial:.2f}s")
+        return False
+    print(f"✅ Wall time {report['elapsed']:.2f}s (pipelined ≈ {pipelined:.2f}s, serial {serial:.2f}s)")
+
+    print()
+    print("✅ TEST 1 PASSED")
+    print()
+    return True
+
+
+def test_back_pressure():
+    """
+    Test 2: The feeder waits when the first queue is full
+    """
+    print("=" * 70)
+    print("TEST 2: Back-pressure")
+    print("=" * 70)
+
+    generated, done = [], []
+    in_flight = []
+
+    def finish(job):
+        done.append(job)
+
+    def track(job):
+        in_flight.append(len(generated) - len(done))
+        return True
+
+    queue_size = 1
+    groups = [("fetch", [sleeper("fetch", 0.005), track]), ("render", [sleeper("render", 0.05)])]
+    report = run_with_timeout(jobs=make_jobs(10, generated), stage_groups=groups,
+                              queue_size=queue_size, on_complete=finish)
+    if report is None or report['completed'] != 10:
+        print(f"❌ FAILED: Report {report}")
+        return False
+
+    # Her grup bir iş işler, her kuyruk queue_size tutar, besleyici bir tane bekletir
+    bound = len(groups) * (queue_size + 1) + 1
+    if max(in_flight) > bound:
+        print(f"❌ FAILED: {max(in_flight)} jobs in flight, bound {bound}")
+        return False
+    print(f"✅ At most {max(in_flight)} jobs in flight with a slow last stage (bound {bound})")
+
+    print()
+    print("✅ TEST 2 PASSED")
+    print()
+    return True
+
+
+def test_source_failure():
+    """
+    Test 3: A failing source stops new jobs; skipped ones are counted
+    """
+    print("=" * 70)
+    print("TEST 3: Source Failure")
+    print("=" * 70)
+
+    def fetch(job):
+        time.sleep(0.01)
+        return job['index'] < 2  # 3. işten sonra uygun post kalmadı
+
+    generated, failed = [], []
+    report = run_with_timeout(
+        jobs=make_jobs(20, generated),
+        stage_groups=[("fetch", [fetch]), ("render", [sleeper("render")])],
+        queue_size=3,
+        on_failed=failed.append
+    )
+    if report is None:
+        print("❌ FAILED: Pipeline hung")
+        return False
+    if report['completed'] != 2 or len(generated) >= 20:
+        print(f"❌ FAILED: completed {report['completed']}, generated {len(generated)}")
+        return False
+    print(f"✅ 2 jobs completed, feeder stopped after {len(generated)} of 20")
+
+    skipped = [job for job in failed if job['failed_stage'] == SKIPPED]
+    started = len(generated) - 2
+    if report['failed'] != started or len(failed) != started or not skipped:
+        print(f"❌ FAILED: {report['failed']} failed reported, {len(failed)} callbacks, "
+              f"{started} jobs started")
+        return False
+    print(f"✅ {report['failed']} failed in the report ({len(skipped)} skipped after the stop), "
+          f"on_failed called for each")
+
+    print()
+    print("✅ TEST 3 PASSED")
+    print()
+    return True
+
+
+def test_crashes():
+    """
+    Test 4: Crashing stages and callbacks are contained
+    """
+    print("=" * 70)
+    print("TEST 4: Crashes")
+    print("=" * 70)
+
+    def render(job):
+        if job['index'] == 1:
+            raise RuntimeError("ffmpeg exploded")
+        return True
+
+    def failing_cleanup(job):
+        raise OSError("workspace already gone")
+
+    report = run_with_timeout(
+        jobs=make_jobs(4),
+        stage_groups=[("fetch", [sleeper("fetch", 0.01)]), ("render", [render])],
+        on_complete=failing_cleanup,
+        on_failed=failing_cleanup
+    )
+    if report is None or (report['completed'], report['failed']) != (3, 1):
+        print(f"❌ FAILED: Report {report}")
+        return False
+    print("✅ Crashing stage counted as failed, later jobs still complete")
+
+    # Kaynak durduktan sonra on_failed hata verse de besleyici takılmamalı
+    def fetch(job):
+        return job['index'] == 0
+
+    report = run_with_timeout(
+        jobs=make_jobs(50),
+        stage_groups=[("fetch", [fetch]), ("render", [sleeper("render")])],
+        queue_size=1,
+        on_failed=failing_cleanup
+    )
+    if report is None:
+        print("❌ FAILED: Pipeline hung when on_failed raised for a skipped job")
+        return False
+    print(f"✅ Failing cleanup on skipped jobs does not hang the feeder ({report['failed']} failed)")
+
+    print()
+    print("✅ TEST 4 PASSED")
+    print()
+    return True
+
+
+def main():
+    results = {
+        'overlap': test_overlap(),
+        'back_pressure': test_back_pressure(),
+        'source_failure': test_source_failure(),
+        'crashes': test_crashes(),
+    }
+
+    print("=" * 70)
+    print("TEST SUMMARY")
+    print("=" * 70)
+    for test_name, result in results.items():
+        status = "✅ PASSED" if result else "❌ FAILED"
+        print(f"  {test_name.upper():15s} {status}")
+
+    sys.exit(0 if all(results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
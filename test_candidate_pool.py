@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+test_candidate_pool.py
+Tests for the ready-to-render candidate pool
+
+Tests:
+1. Candidates are popped best-first and only once
+2. Used or excluded posts are never handed out
+3. Expired or released claims return to the pool, permanent failures are removed
+4. Topic selection through the full-text index
+5. Several subreddits with weights; quotas on a combined listing
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import candidate_pool
+from candidate_pool import MAX_RELEASES, POP_BATCH, CandidatePool
+from reddit_fetcher import apply_quotas
+from used_post_store import get_used_store
+
+
+def make_post(post_id: str, score: int, title: str | None = None, body: str = 'x' * 30,
+              subreddit: str = "AskReddit") -> dict:
+    return {
+        'id': post_id,
+        'title': title or f"Question {post_id} that is long enough?",
+        'subreddit': subreddit,
+        'url': f"https://reddit.com/r/{subreddit}/comments/{post_id}/",
+        'score': score,
+        'comments': [{'author': 'a', 'body': body, 'score': 1}] * 3,
+    }
+
+
+def test_pop_order():
+    """
+    Test 1: Highest rank first, each candidate handed out once
+    """
+    print("=" * 70)
+    print("TEST 1: Pop Order")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        get_used_store(os.path.join(root, "used.db"))
+        pool = CandidatePool(os.path.join(root, "pool.db"))
+        pool.add(make_post("low", 10))
+        pool.add(make_post("high", 500))
+        if pool.add(make_post("high", 500)):
+            print("❌ FAILED: Duplicate candidate added")
+            return False
+
+        popped = [pool.pop(), pool.pop(), pool.pop()]
+        ids = [p['id'] if p else None for p in popped]
+        if ids != ["high", "low", None]:
+            print(f"❌ FAILED: Popped {ids}")
+            return False
+        print("✅ Popped best-first, each once, then empty")
+
+    print()
+    print("✅ TEST 1 PASSED")
+    print()
+    return True
+
+
+def test_used_and_excluded():
+    """
+    Test 2: Used and excluded posts are skipped
+    """
+    print("=" * 70)
+    print("TEST 2: Used / Excluded Posts")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = get_used_store(os.path.join(root, "used.db"))
+        pool = CandidatePool(os.path.join(root, "pool.db"))
+        for i, post_id in enumerate(["a", "b", "c"]):
+            pool.add(make_post(post_id, 100 - i))
+
+        store.mark("a")
+        post = pool.pop(exclude_ids={"b"})
+        if not post or post['id'] != "c":
+            print(f"❌ FAILED: Expected 'c', got {post}")
+            return False
+        print("✅ Used and excluded candidates skipped")
+
+        if "a" in pool.known_ids():
+            print("❌ FAILED: Used candidate still in pool")
+            return False
+        print("✅ Used candidate removed from pool")
+
+        # En iyi POP_BATCH adayın hepsi dışlanmışsa sonraki tura geçilmeli
+        for i in range(POP_BATCH + 5):
+            pool.add(make_post(f"top{i}", 10_000 - i))
+        excluded = {f"top{i}" for i in range(POP_BATCH + 2)}
+        post = pool.pop(exclude_ids=excluded)
+        if not post or post['id'] != f"top{POP_BATCH + 2}":
+            print(f"❌ FAILED: Expected top{POP_BATCH + 2} after {len(excluded)} exclusions, got {post}")
+            return False
+        print(f"✅ {len(excluded)} excluded best candidates (> POP_BATCH={POP_BATCH}) → next best one claimed")
+
+    print()
+    print("✅ TEST 2 PASSED")
+    print()
+    return True
+
+
+def test_claim_timeout():
+    """
+    Test 3: A claim that is never completed expires
+    """
+    print("=" * 70)
+    print("TEST 3: Claim Timeout")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        get_used_store(os.path.join(root, "used.db"))
+        pool = CandidatePool(os.path.join(root, "pool.db"))
+        pool.add(make_post("x", 1))
+        pool.pop()
+
+        original = candidate_pool.CLAIM_TIMEOUT
+        candidate_pool.CLAIM_TIMEOUT = -1
+        try:
+            post = pool.pop()
+        finally:
+            candidate_pool.CLAIM_TIMEOUT = original
+
+        if not post or post['id'] != "x":
+            print("❌ FAILED: Expired claim not returned")
+            return False
+        print("✅ Expired claim handed out again")
+
+        # Başarısız render: adayı hemen geri ver, tekrar tekrar başarısızsa sil
+        for failure in range(1, MAX_RELEASES + 1):
+            back = pool.release("x")
+            if back != (failure < MAX_RELEASES) or (back and (pool.pop() or {}).get('id') != "x"):
+                print(f"❌ FAILED: Release {failure} returned {back}")
+                return False
+        if "x" in pool.known_ids():
+            print("❌ FAILED: Candidate kept after MAX_RELEASES failures")
+            return False
+        print(f"✅ Released candidates are ready at once, dropped after {MAX_RELEASES} failed renders")
+
+        pool.add(make_post("y", 1))
+        pool.pop()
+        pool.remove("y")
+        if pool.pop() is not None:
+            print("❌ FAILED: Removed candidate handed out")
+            return False
+        print("✅ Permanently failed candidate removed")
+
+    print()
+    print("✅ TEST 3 PASSED")
+    print()
+    return True
+
+
+def test_topic():
+    """
+    Test 4: Topic-constrained pop matches titles and comments
+    """
+    print("=" * 70)
+    print("TEST 4: Topic Selection")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        get_used_store(os.path.join(root, "used.db"))
+        pool = CandidatePool(os.path.join(root, "pool.db"))
+        for i in range(20000):
+            pool.add(make_post(f"filler{i}", 1000, title=f"What is your favourite food number {i}?"))
+        pool.add(make_post("house", 10, title="Have you ever lived in a haunted house?"))
+        pool.add(make_post("camp", 5, body="We heard a ghost walking around our tent at night"))
+
+        started = time.perf_counter()
+        post = pool.pop(topic="hauntings")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if not post or post['id'] != "house":
+            print(f"❌ FAILED: Expected 'house', got {post and post['id']}")
+            return False
+        print(f"✅ Title match found despite stemming ({elapsed_ms:.1f} ms over 20k candidates)")
+        if elapsed_ms > 100:
+            print("❌ FAILED: Topic pop too slow")
+            return False
+
+        post = pool.pop(topic="haunted house, ghost")
+        if not post or post['id'] != "camp":
+            print(f"❌ FAILED: Comment match not found, got {post and post['id']}")
+            return False
+        print("✅ Comment match found through an OR alternative")
+
+        pool.remove("camp")
+        if pool.pop(topic="ghost") is not None or pool.size(topic="favourite food") != 20000:
+            print("❌ FAILED: Index out of sync after remove")
+            return False
+        print("✅ Index follows removals")
+
+    print()
+    print("✅ TEST 4 PASSED")
+    print()
+    return True
+
+
+def test_subreddit_mix():
+    """
+    Test 5: Subreddit filter, weights and per-subreddit quotas
+    """
+    print("=" * 70)
+    print("TEST 5: Subreddit Mix")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        get_used_store(os.path.join(root, "used.db"))
+        pool = CandidatePool(os.path.join(root, "pool.db"))
+        pool.add(make_post("ask", 500))
+        pool.add(make_post("nsq", 400, subreddit="NoStupidQuestions"))
+        pool.add(make_post("pics", 900, subreddit="pics"))
+
+        post = pool.pop(subreddit=["askreddit", "NoStupidQuestions"], weights={"NoStupidQuestions": 3.0})
+        if not post or post['id'] != "nsq" or post['subreddit'] != "NoStupidQuestions":
+            print(f"❌ FAILED: Expected weighted 'nsq', got {post}")
+            return False
+        print("✅ Weight moved the smaller subreddit ahead; source subreddit kept")
+
+        post = pool.pop(subreddit="AskReddit+NoStupidQuestions")
+        if not post or post['id'] != "ask" or pool.size(subreddit="pics") != 1:
+            print(f"❌ FAILED: Subreddit filter wrong, got {post}")
+            return False
+        print("✅ Other subreddits filtered out")
+
+    listing = [{'id': f"a{i}", 'subreddit': "AskReddit"} for i in range(5)]
+    listing.insert(2, {'id': "n0", 'subreddit': "NoStupidQuestions"})
+    kept = [p['id'] for p in apply_quotas(listing, {"askreddit": 2})]
+    if kept != ["a0", "a1", "n0"]:
+        print(f"❌ FAILED: Quota kept {kept}")
+        return False
+    print("✅ Quota caps one subreddit of a combined listing")
+
+    print()
+    print("✅ TEST 5 PASSED")
+    print()
+    return True
+
+
+def main():
+    results = {
+        'order': test_pop_order(),
+        'used': test_used_and_excluded(),
+        'timeout': test_claim_timeout(),
+        'topic': test_topic(),
+        'mix': test_subreddit_mix(),
+    }
+
+    print("=" * 70)
+    print("TEST SUMMARY")
+    print("=" * 70)
+    for test_name, result in results.items():
+        status = "✅ PASSED" if result else "❌ FAILED"
+        print(f"  {test_name.upper():15s} {status}")
+
+    sys.exit(0 if all(results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+test_candidate_ranker.py
+Tests for the vectorised candidate ranking
+
+Tests:
+1. Ranked order: a fixed batch always ranks the same way, best first
+2. Incomplete posts: missing created_utc and posts without comments
+"""
+
+import math
+import sys
+
+from candidate_ranker import FRESHNESS_HALF_LIFE_HOURS, predicted_seconds, extract_features, rank_posts
+
+NOW = 1_700_000_000.0
+
+
+def make_post(post_id: str, score: int = 5000, age_hours: float | None = 1.0,
+              comments: int = 5, body_length: int = 130) -> dict:
+    post = {
+        'id': post_id,
+        'title': "What is the one thing you wish you had known earlier?",
+        'score': score,
+        'comments': [{'author': 'a', 'body': 'x' * body_length, 'score': 200}] * comments,
+    }
+    if age_hours is not None:
+        post['created_utc'] = NOW - age_hours * 3600
+    return post
+
+
+def ranked_ids(posts: list[dict], top_k: int | None = None) -> list[str]:
+    return [post['id'] for post, _ in rank_posts(posts, top_k=top_k, now=NOW)]
+
+
+def test_ranked_order():
+    """
+    Test 1: Deterministic best-first order
+    """
+    print("=" * 70)
+    print("TEST 1: Ranked Order")
+    print("=" * 70)
+
+    posts = [
+        make_post("stale", age_hours=6 * FRESHNESS_HALF_LIFE_HOURS),
+        make_post("too_long", body_length=400),
+        make_post("best"),
+        make_post("unpopular", score=3),
+        make_post("uneven", comments=0),
+    ]
+    # Tek uzun yorum + kısa cevaplar: dengesiz ve kısa anlatım
+    posts[-1]['comments'] = [{'author': 'a', 'body': 'x' * (200 if i == 0 else 5), 'score': 200}
+                             for i in range(5)]
+    seconds = predicted_seconds(extract_features(posts, NOW))
+    print("   Predicted narration: " + ", ".join(f"{post['id']} {s:.0f}s" for post, s in zip(posts, seconds)))
+
+    # 6 yarı ömür yaşlı post, düşük skorlu taze posttan geride kalır
+    expected = ["best", "unpopular", "stale", "too_long", "uneven"]
+    order = ranked_ids(posts)
+    if order != expected:
+        print(f"❌ FAILED: Order {order}, expected {expected}")
+        return False
+    print(f"✅ Ranked {order}")
+
+    if ranked_ids(list(reversed(posts))) != expected:
+        print("❌ FAILED: Order depends on the input order")
+        return False
+    if ranked_ids(posts, top_k=2) != expected[:2]:
+        print(f"❌ FAILED: top_k=2 gave {ranked_ids(posts, top_k=2)}")
+        return False
+    print("✅ Same order for reversed input; top_k=2 returns the first two")
+
+    twins = [make_post("first"), make_post("second")]
+    if ranked_ids(twins) != ["first", "second"]:
+        print("❌ FAILED: Equal scores not kept in input order")
+        return False
+    print("✅ Equal scores keep the input order (stable)")
+
+    if rank_posts([], now=NOW) != []:
+        print("❌ FAILED: Empty batch")
+        return False
+    print("✅ Empty batch → []")
+
+    print()
+    print("✅ TEST 1 PASSED")
+    print()
+    return True
+
+
+def test_incomplete_posts():
+    """
+    Test 2: Missing created_utc and comment-less posts still rank
+    """
+    print("=" * 70)
+    print("TEST 2: Incomplete Posts")
+    print("=" * 70)
+
+    undated = make_post("undated", age_hours=None)
+    dated = make_post("dated", age_hours=0)
+    scores = dict((post['id'], score) for post, score in rank_posts([undated, dated], now=NOW))
+    if abs(scores['undated'] - scores['dated']) > 1e-6:
+        print(f"❌ FAILED: Missing created_utc not treated as just posted {scores}")
+        return False
+    print("✅ Missing created_utc scored as posted at `now`")
+
+    bare = make_post("bare", comments=0)
+    del bare['score']
+    ranked = rank_posts([bare, make_post("full")], now=NOW)
+    if [post['id'] for post, _ in ranked] != ["full", "bare"]:
+        print(f"❌ FAILED: Comment-less post ranked {ranked}")
+        return False
+    bare_score = ranked[1][1]
+    if not math.isfinite(bare_score) or bare_score < 0:
+        print(f"❌ FAILED: Comment-less post scored {bare_score}")
+        return False
+    print(f"✅ Post without comments or score ranks last with a finite score ({bare_score:.3f})")
+
+    print()
+    print("✅ TEST 2 PASSED")
+    print()
+    return True
+
+
+def main():
+    results = {
+        'order': test_ranked_order(),
+        'incomplete': test_incomplete_posts(),
+    }
+
+    print("=" * 70)
+    print("TEST SUMMARY")
+    print("=" * 70)
+    for test_name, result in results.items():
+        status = "✅ PASSED" if result else "❌ FAILED"
+        print(f"  {test_name.upper():15s} {status}")
+
+    sys.exit(0 if all(results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
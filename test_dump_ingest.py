@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+test_dump_ingest.py
+Tests for offline Reddit dump ingestion
+
+Tests:
+1. Comments are joined to submissions and the eligibility rules apply
+2. Only the highest-scored submissions are tracked (bounded memory, duplicates once)
+3. Archive candidates outlive the live pool age limit
+4. zstd-compressed dumps are streamed (skipped without zstandard)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from candidate_pool import CandidatePool, MAX_CANDIDATE_AGE
+from dump_ingest import DUMP_CANDIDATE_AGE, ingest_dumps, open_lines
+from used_post_store import get_used_store
+
+
+def submission(post_id: str, score: int, **fields) -> dict:
+    record = {
+        'id': post_id,
+        'subreddit': "AskReddit",
+        'title': f"What is the story behind question number {post_id}?",
+        'selftext': "",
+        'permalink': f"/r/AskReddit/comments/{post_id}/q/",
+        'score': score,
+        'stickied': False,
+        'over_18': False,
+        'num_comments': 50,
+        'created_utc': 1700000000,
+    }
+    record.update(fields)
+    return record
+
+
+def comment(post_id: str, n: int, score: int, top_level: bool = True, body: str | None = None) -> dict:
+    return {
+        'link_id': f"t3_{post_id}",
+        'parent_id': f"t3_{post_id}" if top_level else f"t1_x{n}",
+        'author': f"user{n}",
+        'body': body or f"This is comment number {n} with enough text to be read aloud.",
+        'score': score,
+    }
+
+
+def write_ndjson(path: str, records: list[dict]):
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def test_join_and_rules():
+    """
+    Test 1: Eligible posts get their best top-level comments
+    """
+    print("=" * 70)
+    print("TEST 1: Join and Eligibility")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        get_used_store(os.path.join(root, "used.db"))
+        pool = CandidatePool(os.path.join(root, "pool.db"))
+
+        subs = [
+            submission("good", 900),
+            submission("nsfw", 800, over_18=True),
+            submission("other", 700, subreddit="pics"),
+            submission("short", 600, title="Too short?"),
+            submission("few", 500),
+        ]
+        comments = [comment("good", i, score=i * 10) for i in range(12)]
+        comments += [comment("good", 99, 5000, top_level=False)]
+        comments += [comment("good", 98, 4000, body="[removed]")]
+        comments += [comment("nsfw", i, 10) for i in range(5)]
+        comments += [comment("few", i, 10) for i in range(2)]
+        write_ndjson(os.path.join(root, "RS.ndjson"), subs)
+        write_ndjson(os.path.join(root, "RC.ndjson"), comments)
+
+        report = ingest_dumps(os.path.join(root, "RS.ndjson"), os.path.join(root, "RC.ndjson"),
+                              subreddits=["askreddit"], pool=pool)
+        if report['added'] != 1 or report['few_comments'] != 1:
+            print(f"❌ FAILED: Unexpected report {report}")
+            return False
+        print("✅ Only the eligible post was added")
+
+        post = pool.pop()
+        scores = [c['score'] for c in post['comments']]
+        if post['id'] != "good" or scores != sorted(scores, reverse=True) or len(scores) != 10 or 5000 in scores:
+            print(f"❌ FAILED: Wrong comments {scores}")
+            return False
+        print("✅ Best 10 top-level comments joined, replies and removed comments skipped")
+
+        if report['submissions']['records'] != 5 or report['comments']['records_per_second'] <= 0:
+            print("❌ FAILED: Throughput not reported")
+            return False
+        print(f"✅ Throughput reported ({report['records_per_second']:,.0f} records/s)")
+
+    print()
+    print("✅ TEST 1 PASSED")
+    print()
+    return True
+
+
+def test_bounded_tracking():
+    """
+    Test 2: max_posts keeps the highest-scored submissions only
+    """
+    print("=" * 70)
+    print("TEST 2: Bounded Tracking")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        get_used_store(os.path.join(root, "used.db"))
+        pool = CandidatePool(os.path.join(root, "pool.db"))
+
+        subs = [submission(f"p{i}", score=i) for i in range(100)]
+        # Pushshift dökümlerinde yinelenen kayıtlar olur (aynı ID ve skor)
+        subs += [submission("p91", score=91), submission("p99", score=99), submission("p3", score=3)]
+        comments = [comment(f"p{i}", n, 1) for i in range(100) for n in range(3)]
+        write_ndjson(os.path.join(root, "RS.ndjson"), subs)
+        write_ndjson(os.path.join(root, "RC.ndjson"), comments)
+
+        report = ingest_dumps(os.path.join(root, "RS.ndjson"), os.path.join(root, "RC.ndjson"),
+                              max_posts=10, pool=pool)
+        expected = {f"p{i}" for i in range(90, 100)}
+        if report['added'] != 10 or pool.known_ids() != expected:
+            print(f"❌ FAILED: Pool has {sorted(pool.known_ids())}")
+            return False
+        print("✅ Only the 10 highest-scored submissions were kept (repeated records ignored)")
+
+        if report['comments']['parsed'] != 30:
+            print(f"❌ FAILED: Parsed {report['comments']['parsed']} comments, expected 30")
+            return False
+        print("✅ Comments of untracked posts skipped before JSON parsing")
+
+    print()
+    print("✅ TEST 2 PASSED")
+    print()
+    return True
+
+
+def test_dump_age():
+    """
+    Test 3: Dump candidates are not dropped with the 2-day live age limit
+    """
+    print("=" * 70)
+    print("TEST 3: Dump Candidate Age")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        get_used_store(os.path.join(root, "used.db"))
+        pool = CandidatePool(os.path.join(root, "pool.db"))
+
+        write_ndjson(os.path.join(root, "RS.ndjson"), [submission("archived", 900)])
+        write_ndjson(os.path.join(root, "RC.ndjson"), [comment("archived", i, 10) for i in range(3)])
+        ingest_dumps(os.path.join(root, "RS.ndjson"), os.path.join(root, "RC.ndjson"), pool=pool)
+        live = submission("live", 100)
+        pool.add({'id': "live", 'title': live['title'], 'subreddit': "AskReddit", 'url': "u",
+                  'score': 100, 'created_utc': time.time(), 'comments': []})
+
+        # Üç gün sonrasını taklit et: tüm zamanları geri al
+        shift = MAX_CANDIDATE_AGE + 24 * 3600
+        pool.connection().execute("UPDATE candidates SET harvested_at = harvested_at - ?, "
+                                  "expires_at = expires_at - ?", (shift, shift))
+        pool.prune()
+        if pool.known_ids() != {"archived"}:
+            print(f"❌ FAILED: Pool after {shift / 86400:.0f} days: {sorted(pool.known_ids())}")
+            return False
+        print(f"✅ After {shift / 86400:.0f} days the live candidate expired, the archived one did not")
+
+        pool.connection().execute("UPDATE candidates SET expires_at = expires_at - ?", (DUMP_CANDIDATE_AGE,))
+        if pool.size() != 0:
+            print("❌ FAILED: Archived candidate never expires")
+            return False
+        print(f"✅ Archived candidate expires after {DUMP_CANDIDATE_AGE / 86400:.0f} days")
+
+    print()
+    print("✅ TEST 3 PASSED")
+    print()
+    return True
+
+
+def test_zstd():
+    """
+    Test 4: .zst dumps are decompressed as a stream
+    """
+    print("=" * 70)
+    print("TEST 4: zstd Dumps")
+    print("=" * 70)
+
+    try:
+        import zstandard
+    except ImportError:
+        print("⚠️  SKIPPED: zstandard not installed")
+        print()
+        print("✅ TEST 4 PASSED")
+        print()
+        return True
+
+    with tempfile.TemporaryDirectory() as root:
+        get_used_store(os.path.join(root, "used.db"))
+        pool = CandidatePool(os.path.join(root, "pool.db"))
+
+        for name, records in (("RS", [submission("zst", 900), submission("other", 10, subreddit="pics")]),
+                              ("RC", [comment("zst", i, 10) for i in range(4)])):
+            plain = os.path.join(root, f"{name}.ndjson")
+            write_ndjson(plain, records)
+            with open(plain, 'rb') as src, open(os.path.join(root, f"{name}.zst"), 'wb') as dst:
+                # Pushshift gibi uzun pencere ile sıkıştır
+                params = zstandard.ZstdCompressionParameters.from_level(3, window_log=27)
+                zstandard.ZstdCompressor(compression_params=params).copy_stream(src, dst)
+
+        lines = list(open_lines(os.path.join(root, "RS.zst")))
+        if len(lines) != 2 or json.loads(lines[0])['id'] != "zst":
+            print(f"❌ FAILED: Decompressed lines {lines}")
+            return False
+        print("✅ open_lines streams the decompressed NDJSON lines")
+
+        report = ingest_dumps(os.path.join(root, "RS.zst"), os.path.join(root, "RC.zst"),
+                              subreddits=["AskReddit"], pool=pool)
+        if report['added'] != 1 or pool.known_ids() != {"zst"}:
+            print(f"❌ FAILED: {report}")
+            return False
+        print("✅ Candidate ingested from .zst dumps")
+
+    print()
+    print("✅ TEST 4 PASSED")
+    print()
+    return True
+
+
+def main():
+    results = {
+        'join': test_join_and_rules(),
+        'bounded': test_bounded_tracking(),
+        'dump_age': test_dump_age(),
+        'zstd': test_zstd(),
+    }
+
+    print("=" * 70)
+    print("TEST SUMMARY")
+    print("=" * 70)
+    for test_name, result in results.items():
+        status = "✅ PASSED" if result else "❌ FAILED"
+        print(f"  {test_name.upper():15s} {status}")
+
+    sys.exit(0 if all(results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+test_job_manifest.py
+Tests for job workspaces and the resumable stage manifest
+
+Tests:
+1. Outputs are renamed into place only when the writer succeeds
+2. A recorded stage is valid until its inputs or output files change
+3. An unfinished workspace is found again for resume, up to MAX_RESUME_ATTEMPTS runs
+"""
+
+import os
+import sys
+import tempfile
+
+from job_workspace import JobWorkspace, atomic_output
+from job_manifest import JobManifest, MANIFEST_FILE, MAX_RESUME_ATTEMPTS, find_unfinished_workspace
+
+
+def test_atomic_output():
+    """
+    Test 1: Failed writers never leave a partial output behind
+    """
+    print("=" * 70)
+    print("TEST 1: Atomic Output")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        workspace = JobWorkspace("test", root=root)
+        target = workspace.file("narration.mp3")
+
+        try:
+            with atomic_output(target) as tmp:
+                with open(tmp, 'w') as f:
+                    f.write("partial")
+                raise RuntimeError("simulated crash")
+        except RuntimeError:
+            pass
+
+        if os.listdir(workspace.path):
+            print(f"❌ FAILED: Leftover files after crash: {os.listdir(workspace.path)}")
+            return False
+        print("✅ Crashed writer left no files")
+
+        with atomic_output(target) as tmp:
+            with open(tmp, 'w') as f:
+                f.write("complete")
+
+        if not os.path.exists(target):
+            print("❌ FAILED: Output not renamed into place")
+            return False
+        print("✅ Successful writer renamed into place")
+
+        published = workspace.publish("narration.mp3", os.path.join(root, "renders", "a.mp3"))
+        if not os.path.exists(published) or os.path.exists(target):
+            print("❌ FAILED: publish() did not move the file")
+            return False
+        print(f"✅ Published: {published}")
+
+        workspace.cleanup(success=True)
+        if os.path.exists(workspace.path):
+            print("❌ FAILED: Workspace not removed after success")
+            return False
+
+    print()
+    print("✅ TEST 1 PASSED")
+    print()
+    return True
+
+
+def test_manifest_validity():
+    """
+    Test 2: Stage validity follows inputs and output content
+    """
+    print("=" * 70)
+    print("TEST 2: Manifest Validity")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        workspace = JobWorkspace("test", root=root)
+        manifest = JobManifest(workspace.file(MANIFEST_FILE))
+
+        audio = workspace.file("narration.mp3")
+        with open(audio, 'wb') as f:
+            f.write(b"audio-bytes")
+
+        inputs = {'params': {'voice': 'en-US-GuyNeural'}, 'upstream': {}}
+        manifest.record('audio', inputs, outputs={'audio_file': audio}, state={'audio_duration': 12.5})
+
+        # Diskten yeniden yükle (yeni süreç gibi)
+        manifest = JobManifest(workspace.file(MANIFEST_FILE))
+        if not manifest.is_valid('audio', inputs):
+            print("❌ FAILED: Recorded stage not valid")
+            return False
+        print("✅ Recorded stage is valid")
+
+        job = {}
+        manifest.restore('audio', job)
+        if job.get('audio_file') != audio or job.get('audio_duration') != 12.5:
+            print(f"❌ FAILED: Restore gave {job}")
+            return False
+        print("✅ Outputs and state restored")
+
+        if manifest.is_valid('audio', {'params': {'voice': 'other'}, 'upstream': {}}):
+            print("❌ FAILED: Changed inputs still valid")
+            return False
+        print("✅ Changed inputs invalidate the stage")
+
+        with open(audio, 'wb') as f:
+            f.write(b"AUDIO-BYTES")
+        if manifest.is_valid('audio', inputs):
+            print("❌ FAILED: Modified output still valid")
+            return False
+        print("✅ Modified output invalidates the stage")
+
+    print()
+    print("✅ TEST 2 PASSED")
+    print()
+    return True
+
+
+def test_find_unfinished():
+    """
+    Test 3: Unfinished jobs are found, finished ones are not
+    """
+    print("=" * 70)
+    print("TEST 3: Find Unfinished Workspace")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        workspace = JobWorkspace("test", root=root)
+        manifest = JobManifest(workspace.file(MANIFEST_FILE))
+        manifest.start_attempt()
+        manifest.record('fetch', {}, outputs={}, state={'post_data': {'id': 'abc'}})
+
+        found = find_unfinished_workspace(root)
+        if found != workspace.path:
+            print(f"❌ FAILED: Expected {workspace.path}, got {found}")
+            return False
+        print(f"✅ Unfinished workspace found: {found}")
+
+        manifest.mark_finished()
+        if find_unfinished_workspace(root) is not None:
+            print("❌ FAILED: Finished workspace returned for resume")
+            return False
+        print("✅ Finished workspace ignored")
+
+        # Her devam bir deneme; sürekli çöken iş sonunda bırakılır
+        crashing = JobWorkspace("crash", root=root)
+        crashing_manifest = JobManifest(crashing.file(MANIFEST_FILE))
+        crashing_manifest.start_attempt()
+        crashing_manifest.record('fetch', {}, outputs={}, state={'post_data': {'id': 'def'}})
+        for attempt in range(2, MAX_RESUME_ATTEMPTS + 1):
+            found = find_unfinished_workspace(root)
+            if found != crashing.path:
+                print(f"❌ FAILED: Attempt {attempt} not resumed ({found})")
+                return False
+            JobManifest(crashing.file(MANIFEST_FILE)).start_attempt()
+        if find_unfinished_workspace(root) is not None or find_unfinished_workspace(root) is not None:
+            print("❌ FAILED: Job resumed after MAX_RESUME_ATTEMPTS attempts")
+            return False
+        reloaded = JobManifest(crashing.file(MANIFEST_FILE))
+        if reloaded.attempts != MAX_RESUME_ATTEMPTS or not reloaded.data.get('abandoned'):
+            print(f"❌ FAILED: Manifest {reloaded.data}")
+            return False
+        print(f"✅ Job given up after {MAX_RESUME_ATTEMPTS} attempts (attempt count stored in the manifest)")
+
+    print()
+    print("✅ TEST 3 PASSED")
+    print()
+    return True
+
+
+def main():
+    results = {
+        'atomic_output': test_atomic_output(),
+        'manifest': test_manifest_validity(),
+        'unfinished': test_find_unfinished(),
+    }
+
+    print("=" * 70)
+    print("TEST SUMMARY")
+    print("=" * 70)
+    for test_name, result in results.items():
+        status = "✅ PASSED" if result else "❌ FAILED"
+        print(f"  {test_name.upper():15s} {status}")
+
+    sys.exit(0 if all(results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+test_job_queue.py
+Tests for the durable job queue leases
+
+Tests:
+1. Lease expiry: an abandoned job is reclaimed with one more attempt
+2. Retry limit: jobs that keep failing or losing workers end up failed
+3. Lost lease: the keeper notices a takeover and kills the stage process
+4. Failed workspaces are removed after STALE_WORKSPACE_HOURS
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import job_queue
+from job_queue import (
+    MAX_ATTEMPTS, claim_job, complete_stage, connect, enqueue_post, fail_stage,
+    purge_failed_workspaces, renew_lease, run_leased_stage
+)
+from job_workspace import STALE_WORKSPACE_HOURS
+
+POST = {'id': "abc123", 'title': "What is the strangest thing you have ever found?", 'url': "u"}
+
+
+def expire_leases(conn):
+    """Simulates LEASE_SECONDS passing without renewal (worker crashed)."""
+    conn.execute("UPDATE jobs SET lease_expires = ?", (time.time() - 1,))
+
+
+def test_lease_expiry():
+    """
+    Test 1: Expired leases are reclaimed and counted as an attempt
+    """
+    print("=" * 70)
+    print("TEST 1: Lease Expiry")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        conn = connect(os.path.join(root, "queue.db"))
+        enqueue_post(conn, POST)
+
+        first = claim_job(conn, "worker-1")
+        if first is None or claim_job(conn, "worker-2") is not None:
+            print("❌ FAILED: A leased job was handed out twice")
+            return False
+        print("✅ Leased job is not claimed by a second worker")
+
+        expire_leases(conn)
+        second = claim_job(conn, "worker-2")
+        if second is None or second['id'] != first['id'] or second['attempts'] != 1:
+            print(f"❌ FAILED: Reclaim {second}")
+            return False
+        print("✅ Expired lease reclaimed by worker-2, attempts 0 → 1")
+
+        if renew_lease(conn, first['id'], "worker-1"):
+            print("❌ FAILED: Old owner renewed a lease it lost")
+            return False
+        complete_stage(conn, first['id'], "worker-1", "audio", None)
+        row = conn.execute("SELECT stage, lease_owner FROM jobs").fetchone()
+        if row['stage'] != 'fetch' or row['lease_owner'] != "worker-2":
+            print(f"❌ FAILED: Old owner completed the stage ({dict(row)})")
+            return False
+        print("✅ Old owner can neither renew nor complete the stage")
+        conn.close()
+
+    print()
+    print("✅ TEST 1 PASSED")
+    print()
+    return True
+
+
+def test_retry_limit():
+    """
+    Test 2: MAX_ATTEMPTS applies to failures and to crashed workers
+    """
+    print("=" * 70)
+    print("TEST 2: Retry Limit")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        conn = connect(os.path.join(root, "queue.db"))
+        enqueue_post(conn, POST)
+        enqueue_post(conn, {**POST, 'id': "def456"})
+
+        # İlk iş her seferinde hata verir
+        for attempt in range(MAX_ATTEMPTS):
+            job = claim_job(conn, "worker-1")
+            if job is None or job['post_id'] != POST['id']:
+                print(f"❌ FAILED: Attempt {attempt + 1} not claimable ({job})")
+                return False
+            fail_stage(conn, job, "worker-1", "stage fetch failed", None)
+            if attempt == 0 and claim_job(conn, "worker-1")['post_id'] == POST['id']:
+                print("❌ FAILED: Retry ignored RETRY_DELAY")
+                return False
+            conn.execute("UPDATE jobs SET not_before = 0, lease_expires = NULL, lease_owner = NULL "
+                         "WHERE post_id = ?", (POST['id'],))
+            conn.execute("UPDATE jobs SET lease_expires = NULL, lease_owner = NULL WHERE post_id = 'def456'")
+        row = conn.execute("SELECT state, attempts FROM jobs WHERE post_id = ?", (POST['id'],)).fetchone()
+        if (row['state'], row['attempts']) != ('failed', MAX_ATTEMPTS):
+            print(f"❌ FAILED: {dict(row)}")
+            return False
+        print(f"✅ Failing job marked failed after {MAX_ATTEMPTS} attempts")
+
+        # İkinci iş işçisini her seferinde öldürür (kira hiç bırakılmaz)
+        for _ in range(MAX_ATTEMPTS):
+            claim_job(conn, "worker-1")
+            expire_leases(conn)
+        if claim_job(conn, "worker-2") is not None:
+            print("❌ FAILED: Job that keeps losing its worker is still handed out")
+            return False
+        row = conn.execute("SELECT state, attempts, error FROM jobs WHERE post_id = 'def456'").fetchone()
+        if row['state'] != 'failed' or row['attempts'] != MAX_ATTEMPTS:
+            print(f"❌ FAILED: {dict(row)}")
+            return False
+        print(f"✅ Job whose lease expired {MAX_ATTEMPTS} times marked failed: {row['error']}")
+        conn.close()
+
+    print()
+    print("✅ TEST 2 PASSED")
+    print()
+    return True
+
+
+def slow_stage(row, order, sender):
+    """Stage that starts a long subprocess and swallows every exception."""
+    os.setsid()
+    try:
+        child = subprocess.Popen(["sleep", "30"])
+        with open(os.path.join(row['workspace'], "child.pid"), 'w') as f:
+            f.write(str(child.pid))
+        child.wait()
+    except Exception:
+        pass
+    sender.send((True, row['workspace'], None))
+
+
+def quick_stage(row, order, sender):
+    sender.send((True, row['workspace'], None))
+
+
+def is_running(pid: int) -> bool:
+    """False once the process is gone or a zombie."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+
+def test_lost_lease():
+    """
+    Test 3: A failed renewal kills the running stage and its subprocesses
+    """
+    print("=" * 70)
+    print("TEST 3: Lost Lease")
+    print("=" * 70)
+
+    renew_seconds = job_queue.LEASE_RENEW_SECONDS
+    job_queue.LEASE_RENEW_SECONDS = 0.05
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            db_path = os.path.join(root, "queue.db")
+            conn = connect(db_path)
+            enqueue_post(conn, POST)
+            conn.execute("UPDATE jobs SET workspace = ?", (root,))
+            job = claim_job(conn, "worker-1")
+
+            result = run_leased_stage(db_path, job, "worker-1", [], target=quick_stage)
+            if result != (True, root, None, False):
+                print(f"❌ FAILED: Owned lease reported {result}")
+                return False
+            print("✅ Stage result returned while the lease is owned")
+
+            # Başka bir işçi işi devralır; aşama ve alt süreci öldürülmeli
+            def take_over():
+                time.sleep(0.3)
+                other = connect(db_path)
+                other.execute("UPDATE jobs SET lease_owner = 'worker-2'")
+                other.close()
+
+            thief = threading.Thread(target=take_over)
+            thief.start()
+            started = time.time()
+            ok, _, _, lost = run_leased_stage(db_path, job, "worker-1", [], target=slow_stage)
+            thief.join()
+            elapsed = time.time() - started
+            if ok or not lost or elapsed > 10:
+                print(f"❌ FAILED: Stage kept running after the lease was lost (ok={ok}, lost={lost})")
+                return False
+            with open(os.path.join(root, "child.pid")) as f:
+                child_pid = int(f.read())
+            deadline = time.time() + 5
+            while is_running(child_pid) and time.time() < deadline:
+                time.sleep(0.05)
+            if is_running(child_pid):
+                print("❌ FAILED: Subprocess of the stage survived")
+                return False
+            print(f"✅ Takeover detected, stage and its subprocess killed after {elapsed:.1f}s "
+                  f"(despite `except Exception` in the stage)")
+            conn.close()
+    finally:
+        job_queue.LEASE_RENEW_SECONDS = renew_seconds
+
+    print()
+    print("✅ TEST 3 PASSED")
+    print()
+    return True
+
+
+def test_failed_workspaces():
+    """
+    Test 4: Workspaces of failed jobs do not stay forever
+    """
+    print("=" * 70)
+    print("TEST 4: Failed Workspaces")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        conn = connect(os.path.join(root, "queue.db"))
+        workspaces = {}
+        for post_id, age_hours in (("old", STALE_WORKSPACE_HOURS + 1), ("new", 1)):
+            workspaces[post_id] = os.path.join(root, f"job_{post_id}")
+            os.makedirs(workspaces[post_id])
+            enqueue_post(conn, {**POST, 'id': post_id})
+            conn.execute("UPDATE jobs SET state = 'failed', workspace = ?, updated_at = ? WHERE post_id = ?",
+                         (workspaces[post_id], time.time() - age_hours * 3600, post_id))
+
+        if purge_failed_workspaces(conn) != 1:
+            print("❌ FAILED: Wrong number of workspaces removed")
+            return False
+        if os.path.exists(workspaces['old']) or not os.path.exists(workspaces['new']):
+            print("❌ FAILED: Wrong workspace removed")
+            return False
+        print(f"✅ Workspace of a job failed {STALE_WORKSPACE_HOURS + 1}h ago removed, recent one kept")
+        conn.close()
+
+    print()
+    print("✅ TEST 4 PASSED")
+    print()
+    return True
+
+
+def main():
+    results = {
+        'expiry': test_lease_expiry(),
+        'retry_limit': test_retry_limit(),
+        'lost_lease': test_lost_lease(),
+        'failed_ws': test_failed_workspaces(),
+    }
+
+    print("=" * 70)
+    print("TEST SUMMARY")
+    print("=" * 70)
+    for test_name, result in results.items():
+        status = "✅ PASSED" if result else "❌ FAILED"
+        print(f"  {test_name.upper():15s} {status}")
+
+    sys.exit(0 if all(results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
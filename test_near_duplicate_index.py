@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+test_near_duplicate_index.py
+Tests for the SimHash near-duplicate index
+
+Tests:
+1. Reworded reposts are detected, unrelated questions are not
+2. Expired used posts no longer block reposts; text export round trip
+3. Lookup stays under a millisecond with a large history
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from near_duplicate_index import NearDuplicateIndex, hamming, simhash
+from used_post_store import UsedPostStore
+
+REPOSTS = [
+    ("What's the best advice you've ever received?", "What is the best advice you have ever received?"),
+    ("What's a movie that you can watch over and over again?", "What movie can you watch over and over again?"),
+    ("What's the scariest thing that ever happened to you?", "What's the scariest thing that's ever happened to you?"),
+]
+UNRELATED = [
+    "What food do you hate that everyone else loves?",
+    "Teachers of Reddit, what is the funniest excuse a student gave?",
+    "What smell brings back memories?",
+    "What is the worst advice you have ever received?",
+]
+
+
+def make_post(post_id: str, title: str) -> dict:
+    return {'id': post_id, 'title': title, 'comments': []}
+
+
+def test_reposts():
+    """
+    Test 1: Same question under a new ID is a near-duplicate
+    """
+    print("=" * 70)
+    print("TEST 1: Repost Detection")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = UsedPostStore(os.path.join(root, "used.db"))
+        index = NearDuplicateIndex(store)
+        for i, (original, _) in enumerate(REPOSTS):
+            store.mark(f"old{i}")
+            index.add(make_post(f"old{i}", original))
+
+        for i, (_, repost) in enumerate(REPOSTS):
+            match = index.find_duplicate(make_post(f"new{i}", repost))
+            if not match or match['post_id'] != f"old{i}":
+                print(f"❌ FAILED: Repost not detected: {repost}")
+                return False
+        print(f"✅ {len(REPOSTS)} reworded reposts detected")
+
+        for title in UNRELATED:
+            match = index.find_duplicate(make_post("other", title))
+            if match:
+                print(f"❌ FAILED: False positive {title!r} → {match}")
+                return False
+        print(f"✅ {len(UNRELATED)} unrelated questions accepted")
+
+        distance = hamming(simhash(REPOSTS[0][0]), simhash(UNRELATED[3]))
+        print(f"   best advice ↔ worst advice: distance {distance}")
+
+    print()
+    print("✅ TEST 1 PASSED")
+    print()
+    return True
+
+
+def test_expiry_and_text():
+    """
+    Test 2: Fingerprints follow the used-post TTL and survive a text round trip
+    """
+    print("=" * 70)
+    print("TEST 2: Expiry and Text Export")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = UsedPostStore(os.path.join(root, "used.db"))
+        index = NearDuplicateIndex(store)
+        store.mark("keep")
+        index.add({'id': "keep", 'title': REPOSTS[0][0],
+                   'comments': [{'body': "Never go grocery shopping when you are hungry, trust me."}]})
+        store.mark("gone", ttl=0.05)
+        index.add(make_post("gone", REPOSTS[1][0]))
+
+        time.sleep(0.1)
+        if index.is_duplicate(make_post("x", REPOSTS[1][1])):
+            print("❌ FAILED: Expired post still blocks its repost")
+            return False
+        print("✅ Expired used post no longer blocks reposts")
+
+        path = os.path.join(root, "fingerprints.txt")
+        written = index.export_text(path)
+        if written != 2:
+            print(f"❌ FAILED: Expected 2 fingerprints (title + comments), wrote {written}")
+            return False
+
+        fresh_store = UsedPostStore(os.path.join(root, "fresh.db"))
+        fresh_store.mark("keep")
+        fresh = NearDuplicateIndex(fresh_store)
+        if fresh.import_text(path) != 2 or not fresh.is_duplicate(make_post("y", REPOSTS[0][1])):
+            print("❌ FAILED: Imported index does not detect the repost")
+            return False
+        print("✅ Text export/import round trip works")
+
+    print()
+    print("✅ TEST 2 PASSED")
+    print()
+    return True
+
+
+def test_lookup_speed():
+    """
+    Test 3: Banded lookup is sub-millisecond with 20k used posts
+    """
+    print("=" * 70)
+    print("TEST 3: Lookup Speed")
+    print("=" * 70)
+
+    rng = random.Random(7)
+    words = [f"word{i}" for i in range(5000)]
+
+    def random_title() -> str:
+        return " ".join(rng.choice(words) for _ in range(rng.randint(5, 12))) + "?"
+
+    with tempfile.TemporaryDirectory() as root:
+        store = UsedPostStore(os.path.join(root, "used.db"))
+        index = NearDuplicateIndex(store)
+        conn = store.connection()
+        conn.execute("BEGIN")
+        for i in range(20000):
+            store.mark(f"p{i}")
+            index.add(make_post(f"p{i}", random_title()))
+        conn.execute("COMMIT")
+
+        candidates = [make_post(f"c{i}", random_title()) for i in range(500)]
+        started = time.perf_counter()
+        for post in candidates:
+            index.find_duplicate(post)
+        per_lookup_ms = (time.perf_counter() - started) * 1000 / len(candidates)
+
+        print(f"   {per_lookup_ms:.3f} ms per candidate")
+        if per_lookup_ms >= 1.0:
+            print("❌ FAILED: Lookup is not sub-millisecond")
+            return False
+        print("✅ Sub-millisecond lookup")
+
+    print()
+    print("✅ TEST 3 PASSED")
+    print()
+    return True
+
+
+def main():
+    results = {
+        'reposts': test_reposts(),
+        'expiry': test_expiry_and_text(),
+        'speed': test_lookup_speed(),
+    }
+
+    print("=" * 70)
+    print("TEST SUMMARY")
+    print("=" * 70)
+    for test_name, result in results.items():
+        status = "✅ PASSED" if result else "❌ FAILED"
+        print(f"  {test_name.upper():15s} {status}")
+
+    sys.exit(0 if all(results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+test_pexels_cache.py
+Tests for the Pexels search cache and request budget
+
+Tests:
+1. Search cache: hit within TTL, miss after it, stale read on demand
+2. Budget: rate-limit headers and the hourly window defer searches
+3. 429 without headers: searches pause until a fallback reset time
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from pexels_cache import EXHAUSTED_BACKOFF, HOURLY_LIMIT, HOURLY_RESERVE, MONTHLY_RESERVE, PexelsCache
+
+PARAMS = {'query': "ocean waves relaxing", 'orientation': "portrait", 'size': "medium",
+          'per_page': 15, 'page': 1}
+RESPONSE = {'page': 1, 'per_page': 15, 'videos': [{'id': 1, 'duration': 45, 'video_files': []}]}
+
+
+def test_search_cache():
+    """
+    Test 1: Cached searches are local lookups until the TTL passes
+    """
+    print("=" * 70)
+    print("TEST 1: Search Cache")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        cache = PexelsCache(os.path.join(root, "pexels.db"), search_ttl=0.2)
+        if cache.get_search(PARAMS) is not None:
+            print("❌ FAILED: Empty cache returned a result")
+            return False
+        cache.put_search(PARAMS, RESPONSE)
+
+        started = time.perf_counter()
+        cached = cache.get_search(PARAMS)
+        lookup_ms = (time.perf_counter() - started) * 1000
+        if cached != RESPONSE:
+            print("❌ FAILED: Cached response differs")
+            return False
+        print(f"✅ Hit within TTL ({lookup_ms:.2f} ms)")
+
+        if cache.get_search({**PARAMS, 'page': 2}) is not None:
+            print("❌ FAILED: Different page shared an entry")
+            return False
+        print("✅ Page is part of the key")
+
+        time.sleep(0.25)
+        if cache.get_search(PARAMS) is not None or cache.get_search(PARAMS, allow_stale=True) != RESPONSE:
+            print("❌ FAILED: TTL / stale read")
+            return False
+        print("✅ Expired after TTL, still readable as stale")
+
+    print()
+    print("✅ TEST 1 PASSED")
+    print()
+    return True
+
+
+def test_budget():
+    """
+    Test 2: Searches are deferred before either limit runs out
+    """
+    print("=" * 70)
+    print("TEST 2: Request Budget")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        cache = PexelsCache(os.path.join(root, "pexels.db"))
+        if cache.deny_reason() is not None:
+            print("❌ FAILED: Fresh budget denied a search")
+            return False
+
+        cache.record_response(200, {'X-Ratelimit-Limit': "20000", 'X-Ratelimit-Remaining': "19999",
+                                    'X-Ratelimit-Reset': str(time.time() + 86400)})
+        budget = cache.budget()
+        if budget['remaining'] != 19999 or budget['quota'] != 20000 or cache.deny_reason():
+            print(f"❌ FAILED: Budget {budget}")
+            return False
+        print("✅ X-Ratelimit headers recorded, search allowed")
+
+        cache.record_response(200, {'x-ratelimit-limit': "20000",
+                                    'x-ratelimit-remaining': str(MONTHLY_RESERVE)})
+        reason = cache.deny_reason()
+        if not reason:
+            print("❌ FAILED: Monthly reserve not enforced")
+            return False
+        print(f"✅ Deferred: {reason}")
+
+        cache.record_response(200, {'X-Ratelimit-Limit': "20000", 'X-Ratelimit-Remaining': "5000",
+                                    'X-Ratelimit-Reset': str(time.time() - 1)})
+        if cache.budget()['remaining'] != 20000:
+            print("❌ FAILED: Quota not renewed after the reset time")
+            return False
+        print("✅ Quota renews after X-Ratelimit-Reset")
+
+    with tempfile.TemporaryDirectory() as root:
+        cache = PexelsCache(os.path.join(root, "pexels.db"))
+        for _ in range(HOURLY_LIMIT - HOURLY_RESERVE):
+            cache.record_response(200, {})
+        reason = cache.deny_reason()
+        if not reason:
+            print("❌ FAILED: Hourly window not enforced")
+            return False
+        print(f"✅ Deferred: {reason}")
+
+    print()
+    print("✅ TEST 2 PASSED")
+    print()
+    return True
+
+
+def test_exhausted():
+    """
+    Test 3: A 429 without rate-limit headers blocks searches only for a while
+    """
+    print("=" * 70)
+    print("TEST 3: 429 Without Headers")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        cache = PexelsCache(os.path.join(root, "pexels.db"))
+        cache.record_response(429, {})
+        budget = cache.budget()
+        if budget['remaining'] != 0 or not cache.deny_reason():
+            print("❌ FAILED: 429 not treated as exhausted")
+            return False
+        if budget['reset_at'] is None or abs(budget['reset_at'] - time.time() - EXHAUSTED_BACKOFF) > 5:
+            print(f"❌ FAILED: No fallback reset time ({budget['reset_at']})")
+            return False
+        print(f"✅ 429 counts as exhausted, resets in {EXHAUSTED_BACKOFF}s")
+
+        cache.record_response(429, {'Retry-After': "120"})
+        if abs(cache.budget()['reset_at'] - time.time() - 120) > 5:
+            print("❌ FAILED: Retry-After ignored")
+            return False
+        print("✅ Retry-After sets the reset time")
+
+        # Sıfırlama zamanı geçince arama tekrar serbest
+        cache.connection().execute("UPDATE rate_limit SET reset_at = ?", (time.time() - 1,))
+        if cache.deny_reason() is not None:
+            print(f"❌ FAILED: Still blocked after the reset time: {cache.deny_reason()}")
+            return False
+        print("✅ Searches allowed again after the reset time")
+
+    print()
+    print("✅ TEST 3 PASSED")
+    print()
+    return True
+
+
+def main():
+    results = {
+        'search_cache': test_search_cache(),
+        'budget': test_budget(),
+        'exhausted': test_exhausted(),
+    }
+
+    print("=" * 70)
+    print("TEST SUMMARY")
+    print("=" * 70)
+    for test_name, result in results.items():
+        status = "✅ PASSED" if result else "❌ FAILED"
+        print(f"  {test_name.upper():15s} {status}")
+
+    sys.exit(0 if all(results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+test_post_model.py
+Tests for the slotted post model and the columnar PostBatch
+
+Tests:
+1. Post/Comment behave like post_data dictionaries
+2. PostBatch features match candidate_ranker on dictionaries
+3. Save + memory-mapped load round trip; memory against dictionaries
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from candidate_ranker import extract_features, score_features, static_score
+from post_model import Post, PostBatch
+
+
+def make_posts(count: int, seed: int = 3) -> list[dict]:
+    rng = random.Random(seed)
+    now = time.time()
+    return [{
+        'id': f"p{i}",
+        'title': "What is the strangest thing " * rng.randint(1, 4),
+        'body': "",
+        'subreddit': rng.choice(["AskReddit", "NoStupidQuestions"]),
+        'url': f"https://reddit.com/r/AskReddit/comments/p{i}/",
+        'score': rng.randint(0, 50000),
+        'created_utc': now - rng.randint(0, 200000) if i % 7 else None,
+        'comments': [
+            {'author': f"user{rng.randint(0, 500)}", 'body': "ü" * rng.randint(21, 300),
+             'score': rng.randint(-5, 5000)}
+            for _ in range(rng.randint(0, 10))
+        ],
+    } for i in range(count)]
+
+
+def test_dict_view():
+    """
+    Test 1: Existing dict-style access keeps working
+    """
+    print("=" * 70)
+    print("TEST 1: Dict-Compatible View")
+    print("=" * 70)
+
+    data = make_posts(1)[0]
+    post = Post.from_dict(data)
+    checks = [
+        post['title'] == data['title'],
+        post.get('missing', 'x') == 'x',
+        post.get('comments', [])[:5] == tuple(post.comments[:5]),
+        all(c['body'] == d['body'] and c.get('score') == d['score']
+            for c, d in zip(post['comments'], data['comments'])),
+        'subreddit' in post and 'nope' not in post,
+        json.loads(json.dumps(post.to_dict())) == data,
+        static_score(post) == static_score(data),
+        not hasattr(post, '__dict__'),
+    ]
+    if not all(checks):
+        print(f"❌ FAILED: Checks {checks}")
+        return False
+    print("✅ Indexing, get(), membership, JSON round trip and ranker input work")
+    print("✅ No per-instance __dict__ (slots)")
+
+    print()
+    print("✅ TEST 1 PASSED")
+    print()
+    return True
+
+
+def test_features():
+    """
+    Test 2: Vectorised batch features equal the per-post extraction
+    """
+    print("=" * 70)
+    print("TEST 2: Batch Features")
+    print("=" * 70)
+
+    posts = make_posts(5000)
+    batch = PostBatch.from_posts(posts)
+    now = time.time()
+
+    started = time.perf_counter()
+    expected = score_features(extract_features(posts, now), now)
+    dict_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    actual = score_features(extract_features(batch, now), now)
+    batch_ms = (time.perf_counter() - started) * 1000
+
+    if not np.allclose(expected, actual, atol=1e-4):
+        print(f"❌ FAILED: Max difference {np.abs(expected - actual).max()}")
+        return False
+    print(f"✅ Same scores ({dict_ms:.1f} ms from dicts, {batch_ms:.1f} ms from columns)")
+
+    if batch[42].to_dict() != Post.from_dict(posts[42]).to_dict():
+        print("❌ FAILED: Row 42 does not round-trip")
+        return False
+    print("✅ Rows materialise back to the same posts")
+
+    print()
+    print("✅ TEST 2 PASSED")
+    print()
+    return True
+
+
+def test_mmap_and_memory():
+    """
+    Test 3: Saved batches load memory-mapped and cost less than dicts
+    """
+    print("=" * 70)
+    print("TEST 3: Memory-Mapped Storage")
+    print("=" * 70)
+
+    encoded = [json.dumps(p) for p in make_posts(5000)]
+    tracemalloc.start()
+    dicts = [json.loads(e) for e in encoded]
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    tracemalloc.start()
+    slotted = [Post.from_dict(json.loads(e)) for e in encoded]
+    slotted_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    batch = PostBatch.from_posts(dicts)
+    print(f"   dicts {dict_bytes / 1e6:.1f} MB, Post {slotted_bytes / 1e6:.1f} MB, "
+          f"batch {batch.nbytes() / 1e6:.1f} MB")
+    if not dict_bytes > slotted_bytes > batch.nbytes():
+        print("❌ FAILED: Expected dicts > Post > batch")
+        return False
+    print("✅ Slotted and columnar forms are smaller")
+
+    with tempfile.TemporaryDirectory() as root:
+        batch.save(root)
+        loaded = PostBatch.load(root)
+        if not isinstance(loaded.columns['score'], np.memmap):
+            print("❌ FAILED: Columns not memory-mapped")
+            return False
+        numeric = sum(loaded.columns[name].nbytes for name in PostBatch.NUMERIC)
+        print(f"   scoring scan touches {numeric / 1e6:.2f} MB of numeric columns")
+        if loaded[len(slotted) - 1] != slotted[-1]:
+            print("❌ FAILED: Loaded row differs")
+            return False
+        print("✅ Memory-mapped batch loads and reads rows lazily")
+
+        PostBatch.from_posts([]).save(os.path.join(root, "empty"))
+        if len(PostBatch.load(os.path.join(root, "empty"))) != 0:
+            print("❌ FAILED: Empty batch")
+            return False
+        print("✅ Empty batch round trip")
+
+    print()
+    print("✅ TEST 3 PASSED")
+    print()
+    return True
+
+
+def main():
+    results = {
+        'dict_view': test_dict_view(),
+        'features': test_features(),
+        'mmap': test_mmap_and_memory(),
+    }
+
+    print("=" * 70)
+    print("TEST SUMMARY")
+    print("=" * 70)
+    for test_name, result in results.items():
+        status = "✅ PASSED" if result else "❌ FAILED"
+        print(f"  {test_name.upper():15s} {status}")
+
+    sys.exit(0 if all(results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
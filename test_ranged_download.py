@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+test_ranged_download.py
+Tests for the parallel ranged downloader (against the offline Pexels stand-in)
+
+Tests:
+1. Parallel ranges: file arrives byte-identical, renamed into place
+2. Resume: only the missing segments of a .part file are fetched
+3. Integrity: a wrong announced size fails without publishing the file
+"""
+
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import ranged_download
+from offline_services import PexelsHandler, StandinServer
+from ranged_download import DownloadError, download_file
+
+SEGMENT = 1024 * 1024
+FILE_SIZE = 10 * SEGMENT + 12345
+
+
+@contextlib.contextmanager
+def standin():
+    """Serves a random clip from a temp dir; yields (server, media_dir, out_dir)."""
+    ranged_download.SEGMENT_SIZE = SEGMENT  # Küçük segmentler: testte çok aralık
+    with tempfile.TemporaryDirectory() as media_dir, tempfile.TemporaryDirectory() as out_dir:
+        with open(os.path.join(media_dir, "clip.mp4"), 'wb') as f:
+            f.write(os.urandom(FILE_SIZE))
+        server = StandinServer(PexelsHandler, {'media_dir': media_dir, 'videos': [],
+                                               'search_requests': 0}).start()
+        try:
+            yield server, media_dir, out_dir
+        finally:
+            server.stop()
+
+
+def read(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_parallel():
+    """
+    Test 1: Parallel ranged download
+    """
+    print("=" * 70)
+    print("TEST 1: Parallel Ranges")
+    print("=" * 70)
+
+    with standin() as (server, media_dir, out_dir):
+        dest = os.path.join(out_dir, "parallel", "clip.mp4")
+        started = time.perf_counter()
+        transferred = download_file(f"{server.base_url}/files/clip.mp4", dest, expected_size=FILE_SIZE)
+        elapsed = time.perf_counter() - started
+
+        if read(dest) != read(os.path.join(media_dir, "clip.mp4")):
+            print("❌ FAILED: Content differs")
+            return False
+        if transferred != FILE_SIZE or os.path.exists(dest + ".part") or os.path.exists(dest + ".part.json"):
+            print(f"❌ FAILED: Transferred {transferred}, leftovers present")
+            return False
+        print(f"✅ {FILE_SIZE / 1e6:.1f} MB in {elapsed * 1000:.0f} ms, "
+              f"{ranged_download.PARALLEL_RANGES} parallel ranges, no .part left")
+
+        if download_file(f"{server.base_url}/files/clip.mp4", dest, expected_size=FILE_SIZE) != 0:
+            print("❌ FAILED: Existing file downloaded again")
+            return False
+        print("✅ Complete file is not downloaded again")
+
+    print()
+    print("✅ TEST 1 PASSED")
+    print()
+    return True
+
+
+def test_resume():
+    """
+    Test 2: An interrupted download continues from its .part file
+    """
+    print("=" * 70)
+    print("TEST 2: Resume")
+    print("=" * 70)
+
+    with standin() as (server, media_dir, out_dir):
+        source = read(os.path.join(media_dir, "clip.mp4"))
+        dest = os.path.join(out_dir, "resume.mp4")
+        done = [0, 1, 2, 5]
+        # Yarım kalmış indirme: 0,1,2,5 segmentleri yazılmış, gerisi boş
+        with open(dest + ".part", 'wb') as f:
+            f.truncate(FILE_SIZE)
+            for index in done:
+                f.seek(index * SEGMENT)
+                f.write(source[index * SEGMENT:(index + 1) * SEGMENT])
+        with open(dest + ".part.json", 'w') as f:
+            json.dump({'size': FILE_SIZE, 'done': done}, f)
+
+        transferred = download_file(f"{server.base_url}/files/clip.mp4", dest, expected_size=FILE_SIZE)
+        if read(dest) != source:
+            print("❌ FAILED: Resumed file differs")
+            return False
+        if transferred != FILE_SIZE - len(done) * SEGMENT:
+            print(f"❌ FAILED: Transferred {transferred} bytes")
+            return False
+        print(f"✅ Resumed: fetched {transferred / 1e6:.1f} of {FILE_SIZE / 1e6:.1f} MB")
+
+    print()
+    print("✅ TEST 2 PASSED")
+    print()
+    return True
+
+
+def test_integrity():
+    """
+    Test 3: Size mismatch is an error and nothing is published
+    """
+    print("=" * 70)
+    print("TEST 3: Integrity")
+    print("=" * 70)
+
+    with standin() as (server, _, out_dir):
+        dest = os.path.join(out_dir, "wrong.mp4")
+        try:
+            download_file(f"{server.base_url}/files/clip.mp4", dest, expected_size=FILE_SIZE + 1)
+            print("❌ FAILED: Size mismatch accepted")
+            return False
+        except DownloadError as e:
+            print(f"✅ Rejected: {e}")
+        if os.path.exists(dest):
+            print("❌ FAILED: File published despite the mismatch")
+            return False
+        print("✅ Destination not created")
+
+    print()
+    print("✅ TEST 3 PASSED")
+    print()
+    return True
+
+
+def main():
+    results = {
+        'parallel': test_parallel(),
+        'resume': test_resume(),
+        'integrity': test_integrity(),
+    }
+
+    print("=" * 70)
+    print("TEST SUMMARY")
+    print("=" * 70)
+    for test_name, result in results.items():
+        status = "✅ PASSED" if result else "❌ FAILED"
+        print(f"  {test_name.upper():15s} {status}")
+
+    sys.exit(0 if all(results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
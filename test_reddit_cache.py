@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+test_reddit_cache.py
+Tests for the Reddit listing / comment cache
+
+Tests:
+1. Negative cache: a rejected post is skipped until REJECT_TTL or enough new comments
+2. Comment revalidation: a changed num_comments after the TTL forces a refetch
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from reddit_cache import REJECT_RECHECK_GROWTH, RedditCache
+
+COMMENTS = [{'author': "someone", 'body': "First answer", 'score': 42}]
+
+
+def age_rows(cache: RedditCache, table: str, column: str, seconds: float):
+    """Simulates time passing for every row of a table."""
+    cache.connection().execute(f"UPDATE {table} SET {column} = {column} - ?", (seconds,))
+
+
+def test_negative_cache():
+    """
+    Test 1: Rejected posts are served from the negative cache until the TTL
+    """
+    print("=" * 70)
+    print("TEST 1: Negative Cache")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        cache = RedditCache(os.path.join(root, "cache.db"), reject_ttl=3600)
+        cache.reject("abc123", "only 2 comments", 2)
+        listing = [{'id': "abc123", 'num_comments': 2}, {'id': "def456", 'num_comments': 50}]
+
+        if cache.rejected_among(listing) != {"abc123"}:
+            print("❌ FAILED: Rejected post not negatively cached")
+            return False
+        print("✅ Rejected post skipped, other listing posts unaffected")
+
+        age_rows(cache, "rejections", "rejected_at", 3500)
+        if cache.rejected_among(listing) != {"abc123"}:
+            print("❌ FAILED: Negative entry dropped before its TTL")
+            return False
+        print("✅ Still skipped just before REJECT_TTL")
+
+        grown = [{'id': "abc123", 'num_comments': 2 + REJECT_RECHECK_GROWTH}]
+        if cache.rejected_among(grown):
+            print("❌ FAILED: Post with many new comments still skipped")
+            return False
+        print(f"✅ Rechecked early after {REJECT_RECHECK_GROWTH} new comments")
+
+        age_rows(cache, "rejections", "rejected_at", 200)
+        if cache.rejected_among(listing):
+            print("❌ FAILED: Negative entry served past its TTL")
+            return False
+        print("✅ Rechecked once REJECT_TTL has passed")
+
+    print()
+    print("✅ TEST 1 PASSED")
+    print()
+    return True
+
+
+def test_comment_revalidation():
+    """
+    Test 2: num_comments is the validator for expired comment trees
+    """
+    print("=" * 70)
+    print("TEST 2: Comment Revalidation")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        cache = RedditCache(os.path.join(root, "cache.db"), comments_ttl=3600)
+        cache.put_comments("abc123", 10, COMMENTS)
+
+        if cache.get_comments("abc123", 11) != COMMENTS:
+            print("❌ FAILED: Fresh entry not served")
+            return False
+        print("✅ Within the TTL the cached tree is served")
+
+        age_rows(cache, "comment_trees", "fetched_at", 3700)
+        if cache.get_comments("abc123", 10) != COMMENTS:
+            print("❌ FAILED: Unchanged post was refetched")
+            return False
+        fetched_at = cache.connection().execute("SELECT fetched_at FROM comment_trees").fetchone()[0]
+        if time.time() - fetched_at > 60:
+            print("❌ FAILED: Revalidated entry was not renewed")
+            return False
+        print("✅ Expired but unchanged num_comments → reused and renewed")
+
+        age_rows(cache, "comment_trees", "fetched_at", 3700)
+        misses = cache.misses
+        if cache.get_comments("abc123", 12) is not None or cache.misses != misses + 1:
+            print("❌ FAILED: Changed num_comments did not force a refetch")
+            return False
+        print("✅ Expired and num_comments changed 10 → 12 → refetch")
+
+        if cache.get_comments("missing", 5) is not None:
+            print("❌ FAILED: Unknown post returned comments")
+            return False
+        print("✅ Unknown post → None")
+
+    print()
+    print("✅ TEST 2 PASSED")
+    print()
+    return True
+
+
+def main():
+    results = {
+        'negative': test_negative_cache(),
+        'revalidation': test_comment_revalidation(),
+    }
+
+    print("=" * 70)
+    print("TEST SUMMARY")
+    print("=" * 70)
+    for test_name, result in results.items():
+        status = "✅ PASSED" if result else "❌ FAILED"
+        print(f"  {test_name.upper():15s} {status}")
+
+    sys.exit(0 if all(results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
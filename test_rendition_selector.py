@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+test_rendition_selector.py
+Tests for cost-aware Pexels rendition selection
+
+Tests:
+1. Portrait video: the 1080x1920 file wins over 4K and under-resolved files
+2. Landscape video: only a covering file is accepted; report shows savings
+3. Local renditions cost no download; HLS and unknown sizes are skipped
+"""
+
+import sys
+
+from rendition_selector import rendition_cost, select_rendition
+
+
+def mp4(width: int, height: int, fps: float, mb: float) -> dict:
+    return {'width': width, 'height': height, 'fps': fps, 'file_type': 'video/mp4',
+            'file_size': int(mb * 1024 * 1024), 'link': f"https://videos.example/{width}x{height}.mp4"}
+
+
+# Pexels'in tipik bir portre videosu için döndürdüğü dosyalar
+PORTRAIT = [
+    mp4(2160, 3840, 59.94, 180),
+    mp4(1440, 2560, 59.94, 95),
+    mp4(1080, 1920, 29.97, 28),
+    mp4(720, 1280, 29.97, 11),
+    mp4(360, 640, 29.97, 3),
+    {'width': None, 'height': None, 'fps': None, 'file_type': 'application/x-mpegURL', 'link': "https://hls"},
+]
+
+
+def test_portrait():
+    """
+    Test 1: Cheapest file that still covers the crop
+    """
+    print("=" * 70)
+    print("TEST 1: Portrait Video")
+    print("=" * 70)
+
+    selection = select_rendition(PORTRAIT, duration=45)
+    chosen = selection['file']
+    if (chosen['width'], chosen['height']) != (1080, 1920):
+        print(f"❌ FAILED: Chose {chosen['width']}x{chosen['height']}")
+        return False
+    print(f"✅ Chose 1080x1920 (~{selection['cost']['seconds']:.1f}s estimated, "
+          f"upscale x{selection['cost']['upscale']})")
+
+    upscaled = rendition_cost(mp4(720, 1280, 30, 11), 45)
+    if upscaled['upscale'] <= 1.25:
+        print("❌ FAILED: 720x1280 should need a 1.5x upscale")
+        return False
+    print(f"✅ 720x1280 rejected despite being cheaper (upscale x{upscaled['upscale']})")
+
+    print()
+    print("✅ TEST 1 PASSED")
+    print()
+    return True
+
+
+def test_landscape():
+    """
+    Test 2: Landscape files have to cover the 1920 px height
+    """
+    print("=" * 70)
+    print("TEST 2: Landscape Video and Savings Report")
+    print("=" * 70)
+
+    files = [mp4(3840, 2160, 25, 210), mp4(2560, 1440, 25, 90), mp4(1920, 1080, 25, 40)]
+    selection = select_rendition(files, duration=45)
+    if selection['file']['width'] != 3840 or selection['cost']['crop_waste'] < 0.6:
+        print(f"❌ FAILED: {selection['file']['width']} / {selection['cost']}")
+        return False
+    print(f"✅ Only 4K covers the crop ({selection['cost']['crop_waste']:.0%} of pixels cropped away)")
+
+    # 1080 genişliğinde dosya yoksa eski kural en büyük dosyayı (4K) seçerdi
+    selection = select_rendition([mp4(3840, 2160, 25, 210), mp4(1440, 2560, 30, 60)], duration=45)
+    if selection['file']['width'] != 1440 or selection['saved_bytes'] <= 0 or selection['saved_seconds'] <= 0:
+        print(f"❌ FAILED: {selection}")
+        return False
+    print(f"✅ 1440x2560 instead of the largest file: saves "
+          f"{selection['saved_bytes'] / 1e6:.0f} MB, ~{selection['saved_seconds']:.1f}s")
+
+    print()
+    print("✅ TEST 2 PASSED")
+    print()
+    return True
+
+
+def test_local_and_filtering():
+    """
+    Test 3: Already-downloaded renditions are preferred when acceptable
+    """
+    print("=" * 70)
+    print("TEST 3: Local Renditions and Filtering")
+    print("=" * 70)
+
+    files = [mp4(1080, 1920, 29.97, 80), mp4(1152, 2048, 29.97, 90)]
+    selection = select_rendition(files, duration=45, local_renditions={"1152x2048"})
+    if selection['file']['width'] != 1152 or selection['cost']['download_s'] != 0:
+        print(f"❌ FAILED: Chose {selection['file']['width']}")
+        return False
+    print("✅ Local 1152x2048 beats downloading 80 MB of 1080x1920")
+
+    selection = select_rendition(PORTRAIT, duration=45, local_renditions={"1440x2560"})
+    if selection['file']['width'] != 1080:
+        print(f"❌ FAILED: Chose {selection['file']['width']}")
+        return False
+    print("✅ Local 1440x2560@60 still loses: decoding it costs more than the download")
+
+    if select_rendition([PORTRAIT[-1]], duration=45) is not None:
+        print("❌ FAILED: HLS playlist selected")
+        return False
+    print("✅ HLS / dimensionless entries skipped")
+
+    low = select_rendition([mp4(360, 640, 30, 3), mp4(720, 1280, 30, 11)], duration=45)
+    if low['file']['width'] != 720:
+        print("❌ FAILED: Without a covering file the sharpest should win")
+        return False
+    print("✅ No covering file → sharpest available")
+
+    print()
+    print("✅ TEST 3 PASSED")
+    print()
+    return True
+
+
+def main():
+    results = {
+        'portrait': test_portrait(),
+        'landscape': test_landscape(),
+        'local': test_local_and_filtering(),
+    }
+
+    print("=" * 70)
+    print("TEST SUMMARY")
+    print("=" * 70)
+    for test_name, result in results.items():
+        status = "✅ PASSED" if result else "❌ FAILED"
+        print(f"  {test_name.upper():15s} {status}")
+
+    sys.exit(0 if all(results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+test_stage_dag.py
+Tests for the per-job stage graph (sleep-based stub stages, no network)
+
+Tests:
+1. Topological order: requirements first, cycles and unknown stages rejected
+2. Critical path: longest chain of measured stage durations
+3. Overlap: independent stages run together, wall time ≈ critical path
+4. Failure: dependents of a failed stage never start
+"""
+
+import asyncio
+import sys
+
+from stage_dag import critical_path, run_dag, run_dag_sync, topological_order
+
+# main_v4.STAGE_SPECS ile aynı şekil (yalnızca bağımlılıklar)
+SPECS = {
+    'fetch': {'requires': []},
+    'audio': {'requires': ['fetch']},
+    'background_search': {'requires': []},
+    'background': {'requires': ['fetch', 'background_search']},
+    'background_verify': {'requires': ['audio', 'background']},
+    'frame': {'requires': ['fetch']},
+    'compose': {'requires': ['audio', 'background_verify', 'frame']},
+    'upload': {'requires': ['compose']},
+}
+
+SECONDS = {
+    'fetch': 0.05,
+    'audio': 0.3,
+    'background_search': 0.1,
+    'background': 0.1,
+    'background_verify': 0.05,
+    'frame': 0.2,
+    'compose': 0.1,
+    'upload': 0.05,
+}
+CRITICAL = ['fetch', 'audio', 'background_verify', 'compose', 'upload']
+
+
+def sleeping_runner(fail: str | None = None):
+    async def runner(job: dict, name: str) -> bool:
+        await asyncio.sleep(SECONDS[name])
+        job.setdefault('ran', []).append(name)
+        return name != fail
+    return runner
+
+
+def test_topological_order():
+    """
+    Test 1: Every stage comes after its requirements
+    """
+    print("=" * 70)
+    print("TEST 1: Topological Order")
+    print("=" * 70)
+
+    order = topological_order(SPECS)
+    if sorted(order) != sorted(SPECS):
+        print(f"❌ FAILED: Order {order} does not list every stage once")
+        return False
+    for name, spec in SPECS.items():
+        if any(order.index(dep) > order.index(name) for dep in spec['requires']):
+            print(f"❌ FAILED: {name} ordered before one of {spec['requires']}")
+            return False
+    print(f"✅ {' → '.join(order)}")
+
+    broken = {
+        'cycle': {'a': {'requires': ['b']}, 'b': {'requires': ['a']}},
+        'unknown': {'a': {'requires': ['missing']}},
+    }
+    for label, specs in broken.items():
+        try:
+            topological_order(specs)
+        except ValueError as e:
+            print(f"✅ {label.capitalize()} rejected: {e}")
+        else:
+            print(f"❌ FAILED: {label} graph accepted")
+            return False
+
+    print()
+    print("✅ TEST 1 PASSED")
+    print()
+    return True
+
+
+def test_critical_path():
+    """
+    Test 2: Longest chain through the measured timings
+    """
+    print("=" * 70)
+    print("TEST 2: Critical Path")
+    print("=" * 70)
+
+    # Her aşama bağımlılıkları bittiğinde başlamış gibi zamanlamalar
+    timings = {}
+    for name in topological_order(SPECS):
+        start = max((timings[dep][1] for dep in SPECS[name]['requires']), default=0.0)
+        timings[name] = (start, start + SECONDS[name])
+
+    path, total = critical_path(SPECS, timings)
+    expected = sum(SECONDS[name] for name in CRITICAL)
+    if path != CRITICAL or abs(total - expected) > 1e-9:
+        print(f"❌ FAILED: {path} ({total:.2f}s), expected {CRITICAL} ({expected:.2f}s)")
+        return False
+    print(f"✅ {' → '.join(path)} ({total:.2f}s)")
+
+    # Çalışmayan aşamalar (ör. başarısızlıktan sonra) yok sayılır
+    partial = {name: timings[name] for name in ('fetch', 'frame')}
+    if critical_path(SPECS, partial)[0] != ['fetch', 'frame'] or critical_path(SPECS, {}) != ([], 0.0):
+        print("❌ FAILED: Stages that did not run are not skipped")
+        return False
+    print("✅ Stages that did not run are skipped; no timings → ([], 0.0)")
+
+    print()
+    print("✅ TEST 2 PASSED")
+    print()
+    return True
+
+
+def test_overlap():
+    """
+    Test 3: Independent stages share the loop; wall time ≈ critical path
+    """
+    print("=" * 70)
+    print("TEST 3: Stage Overlap")
+    print("=" * 70)
+
+    job = {}
+    if not run_dag_sync(job, SPECS, sleeping_runner()):
+        print(f"❌ FAILED: Stage {job.get('failed_stage')} failed")
+        return False
+    if sorted(job['ran']) != sorted(SPECS):
+        print(f"❌ FAILED: Ran {job['ran']}")
+        return False
+
+    timings = job['stage_timings']
+    for name, spec in SPECS.items():
+        if any(timings[dep][1] > timings[name][0] + 1e-6 for dep in spec['requires']):
+            print(f"❌ FAILED: {name} started before its requirements finished")
+            return False
+    for group in (('fetch', 'background_search'), ('audio', 'frame')):
+        starts = [timings[name][0] for name in group]
+        if max(starts) - min(starts) > 0.02:
+            print(f"❌ FAILED: {' / '.join(group)} did not start together {starts}")
+            return False
+    print("✅ Requirements respected; fetch with background_search, audio with frame run together")
+
+    serial = sum(SECONDS.values())
+    path_time = sum(SECONDS[name] for name in CRITICAL)
+    if not path_time <= job['wall_time'] < path_time + 0.15:
+        print(f"❌ FAILED: Wall time {job['wall_time']:.2f}s, critical path {path_time:.2f}s")
+        return False
+    print(f"✅ Wall time {job['wall_time']:.2f}s ≈ critical path {path_time:.2f}s (serial {serial:.2f}s)")
+
+    print()
+    print("✅ TEST 3 PASSED")
+    print()
+    return True
+
+
+def test_failure():
+    """
+    Test 4: A failed stage stops its dependents, the job reports it
+    """
+    print("=" * 70)
+    print("TEST 4: Stage Failure")
+    print("=" * 70)
+
+    job = {}
+    if asyncio.run(run_dag(job, SPECS, sleeping_runner(fail='audio'))):
+        print("❌ FAILED: Job with a failed stage reported success")
+        return False
+    if job.get('failed_stage') != 'audio':
+        print(f"❌ FAILED: failed_stage {job.get('failed_stage')}")
+        return False
+    late = {'background_verify', 'compose', 'upload'} & set(job['ran'])
+    if late:
+        print(f"❌ FAILED: Dependents of the failed stage ran: {sorted(late)}")
+        return False
+    print("✅ failed_stage = audio; background_verify, compose and upload never started")
+
+    async def crashing(job: dict, name: str) -> bool:
+        raise RuntimeError("ffmpeg exploded")
+
+    job = {}
+    if run_dag_sync(job, {'fetch': {'requires': []}}, crashing) or job.get('failed_stage') != 'fetch':
+        print("❌ FAILED: Crashing stage not reported as failed")
+        return False
+    print("✅ Crashing stage counted as failed")
+
+    print()
+    print("✅ TEST 4 PASSED")
+    print()
+    return True
+
+
+def main():
+    results = {
+        'order': test_topological_order(),
+        'critical_path': test_critical_path(),
+        'overlap': test_overlap(),
+        'failure': test_failure(),
+    }
+
+    print("=" * 70)
+    print("TEST SUMMARY")
+    print("=" * 70)
+    for test_name, result in results.items():
+        status = "✅ PASSED" if result else "❌ FAILED"
+        print(f"  {test_name.upper():15s} {status}")
+
+    sys.exit(0 if all(results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+test_used_post_store.py
+Tests for the indexed used-post store
+
+Tests:
+1. Membership, batch lookup and TTL expiry
+2. Concurrent writers from several threads lose no IDs
+3. used_posts.txt import/export round trip (with time, subreddit, outcome, TTL)
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from used_post_store import UsedPostStore, OUTCOME_QUOTA_SAVED
+
+
+def test_membership_and_ttl():
+    """
+    Test 1: Marked posts are found until their TTL passes
+    """
+    print("=" * 70)
+    print("TEST 1: Membership and TTL")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = UsedPostStore(os.path.join(root, "used.db"))
+        store.mark("aaa", subreddit="AskReddit")
+        store.mark("bbb", outcome=OUTCOME_QUOTA_SAVED)
+        store.mark("ccc", ttl=0.05)
+
+        if "aaa" not in store or "zzz" in store:
+            print("❌ FAILED: Wrong membership result")
+            return False
+        print("✅ Membership check works")
+
+        used = store.used_among(["aaa", "bbb", "ccc", "zzz"])
+        if used != {"aaa", "bbb", "ccc"}:
+            print(f"❌ FAILED: Batch lookup returned {used}")
+            return False
+        print("✅ Batch lookup works")
+
+        time.sleep(0.1)
+        if "ccc" in store or store.expire() != 1:
+            print("❌ FAILED: Expired post still used")
+            return False
+        print("✅ Expired post can be used again")
+
+        stats = store.stats()
+        if stats['by_outcome'] != {'uploaded': 1, 'quota_saved': 1}:
+            print(f"❌ FAILED: Unexpected stats {stats}")
+            return False
+        print("✅ Outcomes recorded")
+
+    print()
+    print("✅ TEST 1 PASSED")
+    print()
+    return True
+
+
+def test_concurrent_writers():
+    """
+    Test 2: Parallel writers do not lose updates
+    """
+    print("=" * 70)
+    print("TEST 2: Concurrent Writers")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = UsedPostStore(os.path.join(root, "used.db"))
+
+        def writer(n):
+            for i in range(200):
+                store.mark(f"t{n}_{i}")
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        if len(store) != 800:
+            print(f"❌ FAILED: Expected 800 IDs, got {len(store)}")
+            return False
+        print("✅ 800 IDs from 4 threads")
+
+    print()
+    print("✅ TEST 2 PASSED")
+    print()
+    return True
+
+
+def test_text_round_trip():
+    """
+    Test 3: The legacy text file imports and exports cleanly
+    """
+    print("=" * 70)
+    print("TEST 3: used_posts.txt Import/Export")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as root:
+        legacy = os.path.join(root, "used_posts.txt")
+        with open(legacy, 'w') as f:
+            f.write("# comment line\n1abc\n1def\n\n1abc\n")
+
+        store = UsedPostStore(os.path.join(root, "used.db"))
+        if store.import_text(legacy) != 2:
+            print("❌ FAILED: Expected 2 imported IDs")
+            return False
+        print("✅ Comments and duplicates skipped on import")
+
+        store.mark("1ghi", subreddit="AskReddit", outcome=OUTCOME_QUOTA_SAVED, ttl=3600)
+        exported = os.path.join(root, "export.txt")
+        store.export_text(exported)
+        with open(exported) as f:
+            ids = [line.split('\t')[0] for line in f if line.strip() and not line.startswith('#')]
+        if sorted(ids) != ["1abc", "1def", "1ghi"]:
+            print(f"❌ FAILED: Exported {ids}")
+            return False
+        print("✅ Export contains every ID")
+
+        # Taze CI çalıştırması: yalnızca metin dosyası var
+        fresh = UsedPostStore(os.path.join(root, "fresh.db"))
+        fresh.import_text(exported)
+        query = "SELECT subreddit, outcome, used_at, expires_at FROM used_posts WHERE post_id = ?"
+        original = store.connection().execute(query, ("1ghi",)).fetchone()
+        restored = fresh.connection().execute(query, ("1ghi",)).fetchone()
+        if restored[:2] != ("AskReddit", OUTCOME_QUOTA_SAVED) or restored[3] is None \
+                or abs(restored[2] - original[2]) > 1 or abs(restored[3] - original[3]) > 1:
+            print(f"❌ FAILED: Metadata lost in the round trip {original} → {restored}")
+            return False
+        print("✅ Time, subreddit, outcome and TTL survive export → import")
+
+        fresh.connection().execute("UPDATE used_posts SET expires_at = ? WHERE post_id = '1ghi'", (time.time() - 1,))
+        if "1ghi" in fresh or "1abc" not in fresh:
+            print("❌ FAILED: Imported TTL entry became permanent")
+            return False
+        print("✅ Imported TTL entry still expires")
+
+    print()
+    print("✅ TEST 3 PASSED")
+    print()
+    return True
+
+
+def main():
+    results = {
+        'ttl': test_membership_and_ttl(),
+        'concurrent': test_concurrent_writers(),
+        'text': test_text_round_trip(),
+    }
+
+    print("=" * 70)
+    print("TEST SUMMARY")
+    print("=" * 70)
+    for test_name, result in results.items():
+        status = "✅ PASSED" if result else "❌ FAILED"
+        print(f"  {test_name.upper():15s} {status}")
+
+    sys.exit(0 if all(results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+tracing.py
+Hafif aşama/alt süreç izleme (span) ve Chrome trace / JSONL dışa aktarımı
+
+Her span duvar süresi, CPU süresi (çağıran thread + bekleyen alt
+süreçler) ve taşınan bayt sayısını kaydeder. İzleme kapalıyken span()
+paylaşılan boş bir nesne döndürür; maliyeti tek bir global kontrolüdür.
+
+Etkinleştirme:
+    SHORTS_TRACE=traces/run1 python main.py   # veya: python main.py --trace traces/run1
+    → traces/run1.trace.json (chrome://tracing, Perfetto)
+    → traces/run1.jsonl      (satır başına bir span)
+"""
+
+import atexit
+import json
+import os
+import resource
+import subprocess
+import threading
+import time
+
+TRACE_ENV = "SHORTS_TRACE"
+
+
+class _NullSpan:
+    """Returned while tracing is disabled: every method is a no-op."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add_bytes(self, count: int):
+        pass
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ('recorder', 'name', 'category', 'args', 'bytes',
+                 'start', 'cpu_start', 'children_start', 'tid')
+
+    def __init__(self, recorder, name: str, category: str, args: dict):
+        self.recorder = recorder
+        self.name = name
+        self.category = category
+        self.args = args
+        self.bytes = 0
+
+    def add_bytes(self, count: int):
+        self.bytes += count
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self):
+        self.tid = threading.get_ident()
+        self.children_start = _children_cpu()
+        self.cpu_start = time.thread_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        cpu = time.thread_time() - self.cpu_start
+        children = _children_cpu() - self.children_start
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.recorder.add({
+            'name': self.name,
+            'cat': self.category,
+            'start': self.start - self.recorder.origin,
+            'wall': end - self.start,
+            'cpu': cpu,
+            # Alt süreç CPU'su süreç genelidir; eşzamanlı span'lerde paylaşılır
+            'children_cpu': children,
+            'bytes': self.bytes,
+            'tid': self.tid,
+            'args': self.args,
+        })
+        return False
+
+
+def _children_cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class TraceRecorder:
+    """Collects finished spans in memory (thread-safe)."""
+
+    def __init__(self, prefix: str | None = None):
+        self.prefix = prefix
+        self.origin = time.perf_counter()
+        self.origin_epoch = time.time()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, record: dict):
+        with self._lock:
+            self.spans.append(record)
+
+    def chrome_events(self) -> list[dict]:
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        return [{
+            'name': s['name'],
+            'cat': s['cat'],
+            'ph': 'X',
+            'ts': round(s['start'] * 1e6, 1),
+            'dur': round(s['wall'] * 1e6, 1),
+            'pid': pid,
+            'tid': s['tid'],
+            'args': {
+                'cpu_ms': round(s['cpu'] * 1000, 3),
+                'children_cpu_ms': round(s['children_cpu'] * 1000, 3),
+                'bytes': s['bytes'],
+                **s['args'],
+            },
+        } for s in spans]
+
+    def export_chrome_trace(self, path: str):
+        _ensure_parent(path)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'traceEvents': self.chrome_events(),
+                'displayTimeUnit': 'ms',
+                'otherData': {'started_at': self.origin_epoch},
+            }, f, default=str)
+
+    def export_jsonl(self, path: str):
+        _ensure_parent(path)
+        with self._lock:
+            spans = list(self.spans)
+        with open(path, 'w', encoding='utf-8') as f:
+            for s in spans:
+                f.write(json.dumps({**s, 'started_at': self.origin_epoch + s['start']}, default=str))
+                f.write("\n")
+
+
+def _ensure_parent(path: str):
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+
+
+_recorder: TraceRecorder | None = None
+
+
+def enable_tracing(prefix: str | None = None) -> TraceRecorder:
+    """
+    Starts recording spans. With a prefix, the trace is written to
+    <prefix>.trace.json and <prefix>.jsonl when the process exits.
+    """
+    global _recorder
+    if _recorder is None:
+        _recorder = TraceRecorder(prefix)
+        if prefix:
+            atexit.register(flush_trace)
+    return _recorder
+
+
+def disable_tracing() -> TraceRecorder | None:
+    """Stops recording and returns the recorder that was active."""
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+
+def tracing_enabled() -> bool:
+    return _recorder is not None
+
+
+def span(name: str, category: str = "stage", **args):
+    """
+    Context manager that times a block:
+
+        with span("compose", "stage") as s:
+            ...
+            s.add_bytes(os.path.getsize(output))
+    """
+    if _recorder is None:
+        return _NULL_SPAN
+    return Span(_recorder, name, category, args)
+
+
+def traced_run(cmd: list, name: str | None = None, **kwargs) -> subprocess.CompletedProcess:
+    """
+    subprocess.run() inside a "subprocess" span named after the program.
+    """
+    if _recorder is None:
+        return subprocess.run(cmd, **kwargs)
+    with span(name or os.path.basename(str(cmd[0])), "subprocess", argc=len(cmd)):
+        return subprocess.run(cmd, **kwargs)
+
+
+def flush_trace() -> list[str]:
+    """
+    Writes the active trace to its prefix (no-op without one).
+
+    Returns:
+        Written file paths
+    """
+    if _recorder is None or not _recorder.prefix:
+        return []
+    paths = [f"{_recorder.prefix}.trace.json", f"{_recorder.prefix}.jsonl"]
+    _recorder.export_chrome_trace(paths[0])
+    _recorder.export_jsonl(paths[1])
+    print(f"🧭 Trace written: {paths[0]} ({len(_recorder.spans)} spans)")
+    return paths
+
+
+if os.environ.get(TRACE_ENV):
+    enable_tracing(os.environ[TRACE_ENV])
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+used_post_store.py
+Kullanılmış postlar için indeksli SQLite deposu (used_posts.txt yerine)
+
+- O(1) üyelik kontrolü (post_id birincil anahtar), toplu sorgu desteği
+- WAL modu: paralel işçiler kilitlenmeden yazar
+- Zaman, subreddit ve sonuç (uploaded / quota_saved) kaydı
+- İsteğe bağlı TTL: süresi dolan postlar tekrar kullanılabilir
+- used_posts.txt içe/dışa aktarma (GitHub Actions durumu git'te tutar).
+  Satır biçimi: post_id, used_at, subreddit, outcome, expires_at (sekmeyle
+  ayrılmış, boş alan = NULL); böylece taze bir CI çalıştırmasında zaman,
+  subreddit, sonuç ve TTL kaybolmaz. Yalnızca ID içeren eski satırlar
+  "imported" olarak okunur.
+
+Kullanım:
+    python used_post_store.py import used_posts.txt
+    python used_post_store.py export used_posts.txt
+    python used_post_store.py stats
+    python used_post_store.py expire
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from job_workspace import atomic_output
+
+USED_POSTS_DB = os.environ.get('SHORTS_USED_DB', "used_posts.db")
+USED_POSTS_TXT = "used_posts.txt"
+SQLITE_MAX_VARIABLES = 900  # IN (...) sorgusu başına parametre
+
+OUTCOME_UPLOADED = "uploaded"
+OUTCOME_QUOTA_SAVED = "quota_saved"
+OUTCOME_IMPORTED = "imported"
+
+TEXT_HEADER = (
+    "# This file tracks which Reddit posts have been used\n"
+    "# Do not delete this file - it prevents duplicate videos\n"
+    "# The bot will automatically add post IDs here\n"
+    "# Format: post_id<TAB>used_at<TAB>subreddit<TAB>outcome<TAB>expires_at (empty = none)\n"
+)
+TEXT_FIELDS = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS used_posts (
+    post_id TEXT PRIMARY KEY,
+    subreddit TEXT,
+    outcome TEXT NOT NULL,
+    used_at REAL NOT NULL,
+    expires_at REAL                      -- NULL = hiç dolmaz
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_used_posts_expiry ON used_posts (expires_at);
+"""
+
+
+class UsedPostStore:
+    """
+    Thread-safe store of post IDs that were already turned into videos.
+    Each thread gets its own SQLite connection.
+    """
+
+    def __init__(self, path: str = USED_POSTS_DB):
+        self.path = path
+        self._local = threading.local()
+        self.connection().executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def __contains__(self, post_id: str) -> bool:
+        row = self.connection().execute(
+            "SELECT 1 FROM used_posts WHERE post_id = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (post_id, time.time())
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self.connection().execute(
+            "SELECT COUNT(*) FROM used_posts WHERE expires_at IS NULL OR expires_at > ?",
+            (time.time(),)
+        ).fetchone()[0]
+
+    def used_among(self, post_ids) -> set:
+        """
+        Returns the subset of `post_ids` that is already used (one query per
+        900 IDs instead of loading the whole history).
+        """
+        post_ids = list(dict.fromkeys(post_ids))
+        now = time.time()
+        used = set()
+        conn = self.connection()
+        for i in range(0, len(post_ids), SQLITE_MAX_VARIABLES):
+            chunk = post_ids[i:i + SQLITE_MAX_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT post_id FROM used_posts WHERE post_id IN ({placeholders}) "
+                f"AND (expires_at IS NULL OR expires_at > ?)",
+                (*chunk, now)
+            )
+            used.update(row[0] for row in rows)
+        return used
+
+    def mark(
+        self,
+        post_id: str,
+        subreddit: str | None = None,
+        outcome: str = OUTCOME_UPLOADED,
+        ttl: float | None = None
+    ):
+        """
+        Records a used post (a later mark of the same post replaces it).
+
+        Args:
+            ttl: Seconds until the post may be used again (None = never)
+        """
+        now = time.time()
+        self.connection().execute(
+            "INSERT OR REPLACE INTO used_posts (post_id, subreddit, outcome, used_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (post_id, subreddit, outcome, now, now + ttl if ttl else None)
+        )
+
+    def expire(self) -> int:
+        """Deletes expired entries. Returns the number removed."""
+        cursor = self.connection().execute(
+            "DELETE FROM used_posts WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (time.time(),)
+        )
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        rows = self.connection().execute(
+            "SELECT outcome, COUNT(*) FROM used_posts GROUP BY outcome"
+        ).fetchall()
+        return {'total': sum(count for _, count in rows), 'by_outcome': dict(rows)}
+
+    def import_text(self, path: str = USED_POSTS_TXT) -> int:
+        """
+        Imports entries from the text file (comment lines are skipped).
+        Lines with only an ID are imported as OUTCOME_IMPORTED, used now.
+        Existing entries are kept. Returns the number of new IDs.
+        """
+        if not os.path.exists(path):
+            return 0
+        now = time.time()
+        rows = []
+        with open(path, 'r') as f:
+            for line in f:
+                if not line.strip() or line.startswith('#'):
+                    continue
+                fields = line.rstrip('\n').split('\t')
+                fields += [''] * (TEXT_FIELDS - len(fields))
+                post_id, used_at, subreddit, outcome, expires_at = (field.strip() for field in fields[:TEXT_FIELDS])
+                rows.append((
+                    post_id,
+                    subreddit or None,
+                    outcome or OUTCOME_IMPORTED,
+                    float(used_at) if used_at else now,
+                    float(expires_at) if expires_at else None,
+                ))
+
+        conn = self.connection()
+        before = conn.total_changes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO used_posts (post_id, subreddit, outcome, used_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return conn.total_changes - before
+
+    def export_text(self, path: str = USED_POSTS_TXT) -> int:
+        """
+        Writes all unexpired entries (oldest first) with their time,
+        subreddit, outcome and expiry. Returns the number of IDs written.
+        """
+        rows = self.connection().execute(
+            "SELECT post_id, used_at, subreddit, outcome, expires_at FROM used_posts "
+            "WHERE expires_at IS NULL OR expires_at > ? ORDER BY used_at, post_id",
+            (time.time(),)
+        ).fetchall()
+        with atomic_output(path) as tmp:
+            with open(tmp, 'w') as f:
+                f.write(TEXT_HEADER)
+                for post_id, used_at, subreddit, outcome, expires_at in rows:
+                    expiry = f"{expires_at:.0f}" if expires_at is not None else ""
+                    f.write(f"{post_id}\t{used_at:.0f}\t{subreddit or ''}\t{outcome}\t{expiry}\n")
+        return len(rows)
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_used_store(path: str | None = None, legacy_text: str = USED_POSTS_TXT) -> UsedPostStore:
+    """
+    Returns the shared store. A new database is seeded from used_posts.txt
+    (e.g. on a fresh CI runner where only the text file is in git).
+    """
+    global _store
+    with _store_lock:
+        if _store is None or (path and _store.path != path):
+            path = path or USED_POSTS_DB
+            is_new = not os.path.exists(path)
+            _store = UsedPostStore(path)
+            if is_new and os.path.exists(legacy_text):
+                imported = _store.import_text(legacy_text)
+                print(f"📥 Imported {imported} used post IDs from {legacy_text}")
+        return _store
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Used Reddit post store")
+    parser.add_argument("--db", default=USED_POSTS_DB)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="Import IDs from a used_posts.txt file")
+    p_import.add_argument("path", nargs="?", default=USED_POSTS_TXT)
+
+    p_export = sub.add_parser("export", help="Write IDs to a used_posts.txt file")
+    p_export.add_argument("path", nargs="?", default=USED_POSTS_TXT)
+
+    sub.add_parser("stats", help="Show counts by outcome")
+    sub.add_parser("expire", help="Delete entries whose TTL has passed")
+
+    args = parser.parse_args(argv)
+    store = UsedPostStore(args.db)
+
+    if args.command == "import":
+        print(f"📥 Imported {store.import_text(args.path)} new IDs from {args.path}")
+    elif args.command == "export":
+        print(f"📤 Exported {store.export_text(args.path)} IDs to {args.path}")
+    elif args.command == "stats":
+        stats = store.stats()
+        print(f"📊 {stats['total']} used posts")
+        for outcome, count in sorted(stats['by_outcome'].items()):
+            print(f"   {outcome:12s} {count}")
+    elif args.command == "expire":
+        print(f"🧹 Removed {store.expire()} expired entries")
+
+
+if __name__ == "__main__":
+    main()
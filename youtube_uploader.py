@@ -5,10 +5,12 @@ import os
 import shutil
 import json
 from datetime import datetime
-import google.oauth2.credentials
-import googleapiclient.discovery
-import googleapiclient.errors
-from googleapiclient.http import MediaFileUpload
+from typing import TYPE_CHECKING
+from tracing import span
+
+# Google istemcisi yalnızca yükleme sırasında import edilir (başlangıç süresi)
+if TYPE_CHECKING:
+    import googleapiclient.discovery
 
 # File paths for credentials, passed from main.py
 CLIENT_SECRETS_FILE = "client_secrets.json"
@@ -71,7 +73,7 @@ def save_video_for_manual_upload(video_path: str, title: str, description: str,
         print(f"❌ Error saving video for manual upload: {e}")
         return None
 
-def get_authenticated_service() -> googleapiclient.discovery.Resource | None:
+def get_authenticated_service() -> "googleapiclient.discovery.Resource | None":
     """
     Authenticates with the Google API using credentials from environment variables
     or files (token.json and client_secrets.json).
@@ -82,8 +84,8 @@ def get_authenticated_service() -> googleapiclient.discovery.Resource | None:
     print("Authenticating with YouTube API...")
     credentials = None
     try:
-        import json
-        import os
+        import google.oauth2.credentials
+        import googleapiclient.discovery
         
         # Try to load from environment variables first (GitHub Actions)
         token_content = os.environ.get('YOUTUBE_TOKEN_CONTENT')
@@ -123,14 +125,19 @@ def get_authenticated_service() -> googleapiclient.discovery.Resource | None:
                 return None
 
         # Build the YouTube API service
-        return googleapiclient.discovery.build("youtube", "v3", credentials=credentials)
+        # YOUTUBE_API_ENDPOINT points the client at another server (offline benchmark)
+        api_endpoint = os.environ.get('YOUTUBE_API_ENDPOINT')
+        client_options = {"api_endpoint": api_endpoint} if api_endpoint else None
+        return googleapiclient.discovery.build(
+            "youtube", "v3", credentials=credentials, client_options=client_options
+        )
     
     except Exception as e:
         print(f"Authentication failed: {e}")
         print("Ensure 'token.json' and 'client_secrets.json' are correct.")
         return None
 
-def upload_video(youtube_service: googleapiclient.discovery.Resource, 
+def upload_video(youtube_service: "googleapiclient.discovery.Resource", 
                  file_path: str, 
                  title: str, 
                  description: str, 
@@ -150,6 +157,9 @@ def upload_video(youtube_service: googleapiclient.discovery.Resource,
         False if upload failed
         "quota_exceeded" if quota limit reached (video saved, post should be marked as used)
     """
+    import googleapiclient.errors
+    from googleapiclient.http import MediaFileUpload
+
     try:
         print(f"Uploading video '{title}' to YouTube...")
         body = {
@@ -176,10 +186,12 @@ def upload_video(youtube_service: googleapiclient.discovery.Resource,
         
         # Execute the upload
         response = None
-        while response is None:
-            status, response = request.next_chunk()
-            if status:
-                print(f"Uploaded {int(status.progress() * 100)}%")
+        with span("youtube_upload", "network") as s:
+            while response is None:
+                status, response = request.next_chunk()
+                if status:
+                    print(f"Uploaded {int(status.progress() * 100)}%")
+            s.add_bytes(os.path.getsize(file_path))
         
         print(f"Upload successful! Video ID: {response['id']}")
         return True